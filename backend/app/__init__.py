@@ -1,10 +1,39 @@
 from flask import Flask
 from models import db
 from flasgger import Swagger
+from scraper import scraper
+from scraper.cache import RatingCache
+from scraper.client import HttpClient, RateLimiter
+from utilities import dimensions
+from utilities import response_cache
+from utilities import json_provider
 
 app = Flask(__name__)
 app.config.from_pyfile("../config.py")
+app.json = json_provider.provider(app, app.config.get("FAST_JSON", True))
 db.init_app(app)
 swagger = Swagger(app)
 
-from app import routes
+rate_limiter = None
+if app.config.get("SCRAPER_RATE_LIMIT"):
+    rate_limiter = RateLimiter(app.config["SCRAPER_RATE_LIMIT"], app.config["SCRAPER_RATE_BURST"])
+scraper.configure_client(HttpClient(app.config["SCRAPER_POOL_SIZE"],
+    app.config["SCRAPER_CONNECT_TIMEOUT"], app.config["SCRAPER_READ_TIMEOUT"],
+    app.config["SCRAPER_RETRIES"], app.config["SCRAPER_BACKOFF"], app.config["SCRAPER_BACKOFF_MAX"],
+    rate_limiter))
+
+if app.config.get("SCRAPER_CACHE_PATH"):
+    scraper.configure_cache(RatingCache(app.config["SCRAPER_CACHE_PATH"],
+        app.config["SCRAPER_CACHE_TTL"], app.config["SCRAPER_CACHE_NEGATIVE_TTL"]))
+
+if app.config.get("RESPONSE_CACHE"):
+    store = response_cache.MemoryStore(app.config["RESPONSE_CACHE_SIZE"])
+    if app.config["RESPONSE_CACHE"] == "shared":
+        store = response_cache.TieredStore(store, response_cache.SqliteStore(
+            app.config["RESPONSE_CACHE_PATH"], app.config["RESPONSE_CACHE_TTL"]))
+    response_cache.configure_cache(response_cache.ResponseCache(store))
+
+dimensions.configure_cache(app.config.get("DIMENSION_CACHE_SIZE", dimensions.CACHE_SIZE),
+    app.config.get("DIMENSION_CACHE_CHECK_SECONDS", dimensions.CHECK_SECONDS))
+
+from app import routes, commands
@@ -0,0 +1,83 @@
+"""
+Flask CLI commands.
+
+Long-running maintenance processes, run with `flask --app main <command>`.
+"""
+
+import click
+from datetime import timedelta
+from app import app
+import scraper.worker as rating_worker
+import scraper.refresh as rating_refresh
+import scraper.scheduler as rating_scheduler
+import utilities.stats as stats
+import utilities.search as search
+import utilities.schema as schema
+import utilities.versions as versions
+from models import db
+
+
+@app.cli.command("rating-worker")
+@click.option("--batch", default=50, show_default=True, help="Jobs fetched per poll.")
+@click.option("--interval", default=5.0, show_default=True, help="Seconds between polls when idle.")
+@click.option("--threads", default=4, show_default=True, help="Concurrent scrapes.")
+@click.option("--once", is_flag=True, help="Exit once the queue is empty.")
+def rating_worker_command(batch, interval, threads, once):
+    """Scrape ratings of wines queued by POST /wines."""
+    rating_worker.run(batch, interval, threads, once)
+
+
+@app.cli.command("refresh-ratings")
+@click.option("--target", type=click.Choice(rating_refresh.TARGETS), default="missing",
+    show_default=True, help="Wines without a rating, also stale ratings, or every wine.")
+@click.option("--limit", type=int, default=None, help="Maximum number of wines to refresh.")
+@click.option("--threads", type=int, default=None, help="Concurrent lookups [default: REFRESH_THREADS].")
+def refresh_ratings_command(target, limit, threads):
+    """Re-scrape ratings across the cellar and print a report."""
+    max_age = timedelta(days=app.config.get("RATING_MAX_AGE_DAYS", 30))
+    report = rating_refresh.refresh_ratings(rating_refresh.candidates(target, max_age),
+        threads or app.config.get("REFRESH_THREADS", 8), limit)
+    for key, value in report.items():
+        click.echo(f"{key}: {value}")
+
+
+@app.cli.command("rating-scheduler")
+@click.option("--budget", type=int, default=None, help="Lookups per tick [default: RATING_SCHEDULER_BUDGET].")
+@click.option("--interval", type=float, default=None, help="Seconds per tick [default: RATING_SCHEDULER_INTERVAL].")
+@click.option("--threads", default=4, show_default=True, help="Concurrent lookups within a tick.")
+@click.option("--ticks", type=int, default=None, help="Stop after this many ticks.")
+def rating_scheduler_command(budget, interval, threads, ticks):
+    """Keep ratings fresh by re-scraping the most overdue wines every tick."""
+    rating_scheduler.run(
+        budget or app.config.get("RATING_SCHEDULER_BUDGET", 20),
+        interval or app.config.get("RATING_SCHEDULER_INTERVAL", 60),
+        timedelta(days=app.config.get("RATING_MAX_AGE_DAYS", 30)),
+        timedelta(seconds=app.config.get("RATING_RETRY_FAILED_AFTER", 3600)),
+        threads, ticks)
+
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute the /stats totals from the wines table."""
+    stats.rebuild()
+    versions.bump("wines")
+    db.session.commit()
+    click.echo("Stats rebuilt")
+
+
+@app.cli.command("rebuild-search")
+def rebuild_search_command():
+    """Re-index every wine for GET /search."""
+    search.rebuild()
+    versions.bump("wines")
+    db.session.commit()
+    click.echo("Search index rebuilt")
+
+
+@app.cli.command("upgrade-db")
+def upgrade_db_command():
+    """Add the columns, indexes and tables an existing database is missing."""
+    changes = schema.upgrade()
+    for change in changes:
+        click.echo(change)
+    click.echo("Database is up to date" if not changes else f"{len(changes)} changes applied")
@@ -4,29 +4,340 @@ REST API routes.
 Defines endpoints for wines, producers, regions, and countries.
 """
 
-from flask import request, jsonify, Response
+from flask import request, jsonify, Response, stream_with_context, abort
 from app import app
-from models.wine import Wine
+from models.wine import Wine, NV, RATING_PENDING, MAX_QUANTITY
 from models.producer import Producer
 from models.region import Region
 from models.country import Country 
-from models import db
-from scraper.scraper import scrape_rating
+from models import db, MAX_ID
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+import scraper.worker as rating_worker
+from scraper import scraper
+import scraper.refresh as rating_refresh
 import pandas as pd
 import csv
+import itertools
+from datetime import timedelta
 import csv_io.csv_io as csvio
+from utilities.pagination import paginate, page_response, validate_limit
+import utilities.dimensions as dimensions
+import utilities.versions as versions
+import utilities.response_cache as response_cache
+import utilities.stats as stats
+import utilities.search as search
+import utilities.suggest as suggest
 
 
 
+MAX_BATCH = 1000    #wines per batch request
+
+_SET_QUANTITY = (Wine.__table__.update()
+    .where(Wine.__table__.c.id == bindparam("wine_id"))
+    .values(quantity=bindparam("new_quantity")))
+
+#relative change, only applied when the result stays in range
+_ADJUST_QUANTITY = (Wine.__table__.update()
+    .where(Wine.__table__.c.id == bindparam("wine_id"))
+    .where((Wine.__table__.c.quantity + bindparam("delta")).between(0, MAX_QUANTITY))
+    .values(quantity=Wine.__table__.c.quantity + bindparam("delta")))
+
+#columns of the list endpoints, selected as plain rows instead of ORM objects
+WINE_COLUMNS = (Wine.id, Wine.quantity, Wine.name, Wine.vintage, Wine.varietal, Wine.color,
+    Wine.type, Wine.producer_id, Wine.rating, Wine.rating_status)
+PRODUCER_COLUMNS = (Producer.id, Producer.name, Producer.region_id)
+REGION_COLUMNS = (Region.id, Region.name, Region.country_id)
+COUNTRY_COLUMNS = (Country.id, Country.name)
+
+
+def as_dicts(columns, rows) -> list:
+    """
+    Turn rows of a column-projected query into dicts keyed by column name.
+
+    Args:
+        columns: Columns the query selected, in order.
+        rows: Result rows.
+
+    Returns:
+        list[dict]: One dict per row.
+    """
+    keys = [column.key for column in columns]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+#related objects a wine read can embed, each joined through the ones before it
+EXPANSIONS = {
+    "producer": ("producers", PRODUCER_COLUMNS, (Producer, Wine.producer_id == Producer.id)),
+    "region": ("regions", REGION_COLUMNS, (Region, Producer.region_id == Region.id)),
+    "country": ("countries", COUNTRY_COLUMNS, (Country, Region.country_id == Country.id))
+}
+
+
+def parse_expand(expand: str) -> list:
+    """
+    Parse the expand query parameter.
+
+    Args:
+        expand: Comma separated names of EXPANSIONS, or None.
+
+    Returns:
+        list: Names to expand, in join order.
+
+    Raises:
+        ValueError: If a name is not expandable.
+    """
+    names = {name.strip() for name in (expand or "").split(",") if name.strip()}
+    for name in names:
+        if name not in EXPANSIONS:
+            raise ValueError(f"Invalid expand: {name}")
+    return [name for name in EXPANSIONS if name in names]
+
+
+def joined(expand: list) -> list:
+    """Relations to join for expand, including the ones a deeper expansion joins through."""
+    names = list(EXPANSIONS)
+    return names[:max((names.index(name) + 1 for name in expand), default=0)]
+
+
+def expanded_tables() -> tuple:
+    """Tables a wine read joins for the request's expand parameter, for its ETag."""
+    try:
+        expand = parse_expand(request.args.get("expand"))
+    except ValueError:
+        expand = []     #the view answers 400, nothing is cached
+    return ("wines",) + tuple(EXPANSIONS[name][0] for name in joined(expand))
+
+
+def wine_query(expand: list):
+    """
+    Build a column-projected wine query joining the expanded relations.
+
+    Expanded columns are labelled '<relation>.<column>' so they never
+    clash with wine columns.
+
+    Args:
+        expand (list): Names from parse_expand.
+
+    Returns:
+        Query: Query selecting WINE_COLUMNS and then each expansion's columns.
+    """
+    columns = list(WINE_COLUMNS)
+    for name in expand:
+        columns += [column.label(f"{name}.{column.key}") for column in EXPANSIONS[name][1]]
+    query = db.session.query(*columns)
+    for name in joined(expand):
+        query = query.join(*EXPANSIONS[name][2])
+    return query
+
+
+def as_wine_dicts(expand: list, rows) -> list:
+    """
+    Turn rows of wine_query into wine dicts with a nested dict per expansion.
+
+    Args:
+        expand (list): Names the query was built with.
+        rows: Result rows.
+
+    Returns:
+        list[dict]: One dict per wine.
+    """
+    keys = [column.key for column in WINE_COLUMNS]
+    nested = []
+    start = len(keys)
+    for name in expand:
+        columns = EXPANSIONS[name][1]
+        nested.append((name, [column.key for column in columns], start, start + len(columns)))
+        start += len(columns)
+    result = []
+    for row in rows:
+        wine = dict(zip(keys, row))
+        for name, columns, begin, end in nested:
+            wine[name] = dict(zip(columns, row[begin:end]))
+        result.append(wine)
+    return result
+
+
+WINE_SORT_COLUMNS = {
+    "name": Wine.name,
+    "vintage": Wine.vintage,
+    "rating": Wine.rating,
+    "quantity": Wine.quantity
+}
+
+
+def filter_wines(query, args):
+    """
+    Apply wine filter query parameters as SQL WHERE clauses.
+
+    Each filter maps onto an indexed column so that narrow filters
+    become index range scans rather than full table scans.
+
+    Args:
+        query: Wine query to filter.
+        args: Request query parameters.
+
+    Returns:
+        Query: Filtered query.
+
+    Raises:
+        ValueError: If a filter value is invalid.
+    """
+    if args.get("color"):
+        query = query.filter(Wine.color == Wine.validate_color(args["color"]))
+    if args.get("type"):
+        query = query.filter(Wine.type == Wine.validate_type(args["type"]))
+    if args.get("producer_id"):
+        query = query.filter(Wine.producer_id == Wine.validate_producer_id(args["producer_id"]))
+    for param in ("vintage_min", "vintage_max"):
+        if args.get(param):
+            vintage = Wine.validate_vintage(args[param])
+            if vintage == NV:
+                raise ValueError(f"Invalid {param}: {args[param]}")
+            #vintages are 4 digit strings so they compare in year order
+            if param == "vintage_min":
+                query = query.filter(Wine.vintage >= vintage, Wine.vintage != NV)
+            else:
+                query = query.filter(Wine.vintage <= vintage)
+    if args.get("rating_min"):
+        try:
+            rating = int(args["rating_min"])
+        except ValueError:
+            raise ValueError(f"Invalid rating_min: {args['rating_min']}.  Must be integer.")
+        if not 0 <= rating <= 100:
+            raise ValueError(f"Invalid rating_min: {rating}. Out of range 0 - 100.")
+        query = query.filter(Wine.rating >= rating)
+    if args.get("ids"):
+        query = query.filter(Wine.id.in_(parse_ids(args["ids"])))
+    return query
+
+
+def parse_ids(ids: str) -> list:
+    """
+    Parse the ids query parameter of a batch fetch.
+
+    Args:
+        ids: Comma separated wine IDs.
+
+    Returns:
+        list[int]: Distinct IDs.
+
+    Raises:
+        ValueError: If an ID is not an integer between 1 and MAX_ID or there are too many.
+    """
+    result = set()
+    for id in ids.split(","):
+        try:
+            id = int(id)
+        except ValueError:
+            raise ValueError(f"Invalid ids: {ids}.  Must be comma separated integers.")
+        if id < 1:
+            raise ValueError(f"Invalid ids: {ids}.  Must be greater than 0.")
+        if id > MAX_ID:
+            raise ValueError(f"Invalid ids: {ids}.  Must be at most {MAX_ID}.")
+        result.add(id)
+    if len(result) > MAX_BATCH:
+        raise ValueError(f"Too many ids: {len(result)}. Max {MAX_BATCH}.")
+    return sorted(result)
+
+
+def parse_wine_sort(sort: str):
+    """
+    Parse the wine sort query parameter.
+
+    Args:
+        sort: Column name, optionally prefixed with '-' for descending.
+
+    Returns:
+        tuple: (column or None for id order, descending flag).
+
+    Raises:
+        ValueError: If the column is not sortable.
+    """
+    if not sort:
+        return None, False
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key == "id":
+        return None, descending
+    if key not in WINE_SORT_COLUMNS:
+        raise ValueError(f"Invalid sort: {sort}")
+    return WINE_SORT_COLUMNS[key], descending
+
+
 #GET /wines
 @app.route("/wines", methods=["GET"])
+@versions.conditional(expanded_tables)
 def get_wines():
     """
-    Retrieve all wine entries
+    Retrieve all wine entries, one page at a time
     ---
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Page size (default 100, max 1000)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque cursor from the previous page's next link
+      - name: color
+        in: query
+        type: string
+        required: false
+        description: Only wines of this color
+      - name: type
+        in: query
+        type: string
+        required: false
+        description: Only wines of this type
+      - name: producer_id
+        in: query
+        type: integer
+        required: false
+        description: Only wines from this producer
+      - name: vintage_min
+        in: query
+        type: integer
+        required: false
+        description: Earliest vintage year, excludes non-vintage wines
+      - name: vintage_max
+        in: query
+        type: integer
+        required: false
+        description: Latest vintage year, excludes non-vintage wines
+      - name: rating_min
+        in: query
+        type: integer
+        required: false
+        description: Minimum rating
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: One of id, name, vintage, rating, quantity. Prefix with '-' for descending.
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: Comma separated wine IDs to fetch, at most 1000. Limit defaults to their count.
+      - name: expand
+        in: query
+        type: string
+        required: false
+        description: Comma separated related objects to embed, any of producer, region, country
     responses:
       200:
         description: A list of wines
+        headers:
+          Link:
+            type: string
+            description: URL of the next page with rel="next", omitted on the last page
+          ETag:
+            type: string
+            description: Version of this page, send back in If-None-Match
         schema:
           type: array
           items:
@@ -50,24 +361,43 @@ def get_wines():
                 type: integer
               rating:
                 type: number
+              rating_status:
+                type: string
+                description: pending, complete or failed while the rating is scraped, null if imported
+              producer:
+                type: object
+                description: Only with expand=producer, fields as in GET /producers
+              region:
+                type: object
+                description: Only with expand=region, fields as in GET /regions
+              country:
+                type: object
+                description: Only with expand=country, fields as in GET /countries
+      400:
+        description: Invalid filter, sort, ids, expand, limit or cursor
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
 
-    wines = Wine.query.all()
-    result = [
-        {"id": wine.id,
-        "quantity": wine.quantity,
-        "name": wine.name,
-        "vintage": wine.vintage,
-        "varietal": wine.varietal,
-        "color": wine.color,
-        "type": wine.type,
-        "producer_id": wine.producer_id,
-        "rating": wine.rating} 
-        for wine in wines]
-    return jsonify(result), 200
+    try:
+        limit = request.args.get("limit")
+        if not limit and request.args.get("ids"):
+            limit = len(parse_ids(request.args["ids"]))    #a batch fetch fits on one page
+        limit = validate_limit(limit)
+        expand = parse_expand(request.args.get("expand"))
+        query = filter_wines(wine_query(expand), request.args)
+        sort, descending = parse_wine_sort(request.args.get("sort"))
+        wines, next_cursor = paginate(query, Wine.id, limit, request.args.get("cursor"),
+            sort=sort, descending=descending)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = as_wine_dicts(expand, wines)
+    return page_response(result, next_cursor, limit), 200
 
 
 @app.route("/wines/<int:id>", methods=["GET"])
+@versions.conditional(expanded_tables)
 def get_wine(id):
     """
     Retrieve a single wine by ID
@@ -78,6 +408,11 @@ def get_wine(id):
         type: integer
         required: true
         description: ID of the wine
+      - name: expand
+        in: query
+        type: string
+        required: false
+        description: Comma separated related objects to embed, any of producer, region, country
     responses:
       200:
         description: Wine data
@@ -102,23 +437,33 @@ def get_wine(id):
               type: integer
             rating:
               type: number
+            rating_status:
+              type: string
+              description: pending, complete or failed while the rating is scraped, null if imported
+            producer:
+              type: object
+              description: Only with expand=producer, fields as in GET /producers
+            region:
+              type: object
+              description: Only with expand=region, fields as in GET /regions
+            country:
+              type: object
+              description: Only with expand=country, fields as in GET /countries
+      400:
+        description: Invalid expand
       404:
         description: Wine not found
     """
 
-    wine = Wine.query.get_or_404(id)
-    result = {
-        "id": wine.id,
-        "quantity": wine.quantity,
-        "name": wine.name,
-        "vintage": wine.vintage,
-        "varietal": wine.varietal,
-        "color": wine.color,
-        "type": wine.type,
-        "producer_id": wine.producer_id,
-        "rating": wine.rating
-    }
-    return jsonify(result), 200
+    try:
+        expand = parse_expand(request.args.get("expand"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    wines = as_wine_dicts(expand, wine_query(expand).filter(Wine.id == id).all())
+    if not wines:
+        abort(404)
+    return jsonify(wines[0]), 200
 
 
 @app.route("/wines", methods=["POST"])
@@ -179,6 +524,9 @@ def add_wine():
           properties:
             id:
               type: integer
+            rating_status:
+              type: string
+              description: Rating is scraped in the background, poll the wine for the result
             message:
               type: string
         headers:
@@ -210,50 +558,28 @@ def add_wine():
           if not country_id:
             #find or create country
             country_name = Country.validate_name(data.get("country_name"))
-            country = Country.query.filter_by(name=country_name).first()
-            if not country:
-              country = Country(name=country_name)
-              db.session.add(country)
-              db.session.flush()
-            country_id = country.id
+            country_id = dimensions.resolve_countries([country_name])[country_name]
+          elif not dimensions.existing_ids(Country, [Region.validate_country_id(country_id)]):
+            raise ValueError("Country not found")
           Region.validate_country_id(country_id)
           #find or create region
           region_name = Region.validate_name(data.get("region_name"))
-          region = Region.query.filter_by(name=region_name, country_id=country_id).first()
-          if not region:
-            region = Region(name=region_name, country_id=country_id)
-            db.session.add(region)
-            db.session.flush()
-          region_id = region.id
+          region_id = dimensions.resolve_regions({region_name: country_id})[region_name]
+        elif not dimensions.existing_ids(Region, [Producer.validate_region_id(region_id)]):
+          raise ValueError("Region not found")
         Producer.validate_region_id(region_id)
         #find or create producer
         producer_name = Producer.validate_name(data.get("producer_name"))
-        producer = Producer.query.filter_by(name=producer_name, region_id=region_id).first()
-        if not producer:
-          producer = Producer(name=producer_name, region_id=region_id)
-          db.session.add(producer)
-          db.session.flush()
-        producer_id = producer.id  
-      Wine.validate_producer_id(producer_id)
+        producer_id = dimensions.resolve_producers({producer_name: region_id})[producer_name]
+      producer_id = Wine.validate_producer_id(producer_id)
 
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
     #check if producer exists
-    producer = Producer.query.get(producer_id)
-    if not producer:
+    if not dimensions.existing_ids(Producer, [producer_id]):
         return jsonify({"error": "Producer not found"}), 400
 
-    #check if duplicate
-    existing = Wine.query.filter_by(
-        name = name,
-        vintage = vintage,
-        producer_id = producer_id
-    ).first()
-    if existing:
-        return jsonify({"error": "Duplicate Entry"}), 409
-    
-
     #build entry
     try:
         quantity = data.get("quantity")
@@ -268,7 +594,6 @@ def add_wine():
         wine_type = data.get("type")
         if wine_type is not None:
           wine_type = Wine.validate_type(wine_type)
-        rating = scrape_rating(name, vintage, producer.name)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     
@@ -280,17 +605,231 @@ def add_wine():
         color = color,
         type = wine_type,
         producer_id = producer_id,
-        rating = rating
+        rating = None,
+        rating_status = RATING_PENDING
     )
     db.session.add(wine)
+    try:
+        db.session.flush()     #the unique constraint rejects duplicates in the same round trip
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Duplicate Entry"}), 409
+    stats.apply([], [stats.snapshot_of(wine)])
+    search.index([wine], new=True)
+    versions.bump("wines")
     db.session.commit()
+
+    #scrape rating in the background instead of holding up the request
+    rating_worker.enqueue(wine.id)
     
-    response = jsonify({"id": wine.id, "message": "Wine added successfully"})
+    response = jsonify({"id": wine.id, "rating_status": wine.rating_status,
+        "message": "Wine added successfully"})
     response.status_code = 201
     response.headers["Location"] = f"/wines/{wine.id}"
     return response
 
 
+def validate_batch_wine(item) -> dict:
+    """
+    Validate one wine of a batch create request.
+
+    Args:
+        item: Wine in the flat shape accepted by POST /wines.
+
+    Returns:
+        dict: Validated wine fields plus whichever of producer_id,
+        producer_name, region_id, region_name, country_id and country_name
+        are needed to resolve the producer.
+
+    Raises:
+        ValueError: If a field is invalid.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Wine must be an object")
+    wine = {
+        "name": Wine.validate_name(item.get("name")),
+        "vintage": Wine.validate_vintage(item.get("vintage")),
+        "quantity": 1 if item.get("quantity") is None else Wine.validate_quantity(item.get("quantity")),
+        "varietal": None if item.get("varietal") is None else Wine.validate_varietal(item.get("varietal")),
+        "color": None if item.get("color") is None else Wine.validate_color(item.get("color")),
+        "type": None if item.get("type") is None else Wine.validate_type(item.get("type"))
+    }
+
+    #same resolution order as add_wine, ids take precedence over names
+    if item.get("producer_id"):
+        wine["producer_id"] = Wine.validate_producer_id(item["producer_id"])
+        return wine
+    wine["producer_name"] = Producer.validate_name(item.get("producer_name"))
+    if item.get("region_id"):
+        wine["region_id"] = Producer.validate_region_id(item["region_id"])
+        return wine
+    wine["region_name"] = Region.validate_name(item.get("region_name"))
+    if item.get("country_id"):
+        wine["country_id"] = Region.validate_country_id(item["country_id"])
+        return wine
+    wine["country_name"] = Country.validate_name(item.get("country_name"))
+    return wine
+
+
+@app.route("/wines/batch", methods=["POST"])
+def add_wines():
+    """
+    Create many wine entries in one request.
+
+    Each wine has the same flat shape POST /wines accepts. Countries, regions
+    and producers of the whole batch are resolved with one query per level,
+    duplicates are checked with a single query and everything is committed
+    once. Invalid or duplicate wines are reported per item without failing
+    the rest of the batch.
+    ---
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: wines
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              name:
+                type: string
+              vintage:
+                type: integer
+              quantity:
+                type: integer
+              varietal:
+                type: string
+              color:
+                type: string
+              type:
+                type: string
+              producer_id:
+                type: integer
+              producer_name:
+                type: string
+              region_id:
+                type: integer
+              region_name:
+                type: string
+              country_id:
+                type: integer
+              country_name:
+                type: string
+    responses:
+      200:
+        description: Per-wine results, in request order
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              index:
+                type: integer
+              status:
+                type: integer
+                description: 201 created, 400 validation error or 409 duplicate
+              id:
+                type: integer
+              error:
+                type: string
+      400:
+        description: Body is not a non-empty array or is too large
+    """
+
+    items = request.get_json()
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty array of wines"}), 400
+    if len(items) > MAX_BATCH:
+        return jsonify({"error": f"Too many wines: {len(items)}. Max {MAX_BATCH}."}), 400
+
+    results = [None] * len(items)
+    wines = {}
+    for index, item in enumerate(items):
+        try:
+            wines[index] = validate_batch_wine(item)
+        except ValueError as e:
+            results[index] = {"index": index, "status": 400, "error": str(e)}
+
+    #check explicitly given regions and countries exist, one query per level
+    for key, model in (("region_id", Region), ("country_id", Country)):
+        found = dimensions.existing_ids(model, {w[key] for w in wines.values() if key in w})
+        for index, w in list(wines.items()):
+            if key in w and w[key] not in found:
+                results[index] = {"index": index, "status": 400, "error": f"{model.__name__} not found"}
+                del wines[index]
+
+    #find or create each dimension level for the whole batch at once
+    country_map = dimensions.resolve_countries(
+        {w["country_name"] for w in wines.values() if "country_name" in w})
+    regions = {}
+    for w in wines.values():
+        if "region_name" in w:
+            w.setdefault("country_id", country_map.get(w.get("country_name")))
+            regions.setdefault(w["region_name"], w["country_id"])
+    region_map = dimensions.resolve_regions(regions)
+    producers = {}
+    for w in wines.values():
+        if "producer_name" in w:
+            w.setdefault("region_id", region_map.get(w.get("region_name")))
+            producers.setdefault(w["producer_name"], w["region_id"])
+    producer_map = dimensions.resolve_producers(producers)
+    for w in wines.values():
+        w.setdefault("producer_id", producer_map.get(w.get("producer_name")))
+
+    #check explicitly given producers exist
+    given = {w["producer_id"] for w in wines.values() if "producer_name" not in w}
+    found = dimensions.existing_ids(Producer, given)
+    for index, w in list(wines.items()):
+        if "producer_name" not in w and w["producer_id"] not in found:
+            results[index] = {"index": index, "status": 400, "error": "Producer not found"}
+            del wines[index]
+
+    #check duplicates against the database and within the batch with one query
+    existing = set()
+    if wines:
+        existing = {tuple(row) for row in db.session.query(Wine.name, Wine.vintage, Wine.producer_id)
+            .filter(Wine.producer_id.in_({w["producer_id"] for w in wines.values()}))
+            .filter(Wine.name.in_({w["name"] for w in wines.values()}))}
+    records = {}
+    for index, w in wines.items():
+        key = (w["name"], w["vintage"], w["producer_id"])
+        if key in existing or key in records:
+            results[index] = {"index": index, "status": 409, "error": "Duplicate Entry"}
+            continue
+        records[key] = {"name": w["name"], "vintage": w["vintage"], "quantity": w["quantity"],
+            "varietal": w["varietal"], "color": w["color"], "type": w["type"],
+            "producer_id": w["producer_id"], "rating": None, "rating_status": RATING_PENDING}
+
+    ids = {}
+    if records:
+        try:
+            db.session.execute(Wine.__table__.insert(), list(records.values()))
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Conflicting concurrent insert, retry the batch"}), 409
+        #read back the new ids with one query
+        ids = {(name, vintage, producer_id): id for id, name, vintage, producer_id in
+            db.session.query(Wine.id, Wine.name, Wine.vintage, Wine.producer_id)
+            .filter(Wine.producer_id.in_({k[2] for k in records}))
+            .filter(Wine.name.in_({k[0] for k in records}))
+            if (name, vintage, producer_id) in records}
+        stats.apply([], [stats.snapshot_of(record) for record in records.values()])
+        search.index([{**record, "id": ids[key]} for key, record in records.items()], new=True)
+        versions.bump("wines")
+    db.session.commit()
+
+    for index, w in wines.items():
+        if results[index] is None:
+            results[index] = {"index": index, "status": 201,
+                "id": ids[(w["name"], w["vintage"], w["producer_id"])]}
+    for id in ids.values():
+        rating_worker.enqueue(id)   #scrape ratings in the background
+
+    return jsonify(results), 200
+
+
 @app.route("/wines", methods=["PUT"])
 def update_quantity():
     """
@@ -331,7 +870,7 @@ def update_quantity():
     if not id:
         return jsonify({"error": "Missing wine id"}), 400
     
-    wine = Wine.query.get_or_404(id)    #fetch wine
+    wine = Wine.query.with_for_update().get_or_404(id)    #fetch wine, locked until commit
 
     #update quantiy
     try:
@@ -339,12 +878,156 @@ def update_quantity():
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
      
+    before = stats.snapshot_of(wine)
     wine.quantity = quantity
+    stats.apply([before], [stats.snapshot_of(wine)])
+    versions.bump("wines")
     db.session.commit()
 
     return jsonify({ "message": f"Wine id {id} updated to {quantity}"}), 200
     
 
+@app.route("/wines/batch", methods=["PUT"])
+def update_quantities():
+    """
+    Update quantities of many existing wines in one request.
+
+    Every pair is validated first; a single invalid quantity rejects the
+    whole batch. Valid pairs are written with one executemany UPDATE in one
+    transaction, and ids with no matching wine are reported back instead of
+    failing the batch. If an id appears more than once the last pair wins.
+    ---
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: quantities
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: ID of the wine
+              quantity:
+                type: integer
+                description: New quantity value
+    responses:
+      200:
+        description: Quantities updated
+        schema:
+          type: object
+          properties:
+            updated:
+              type: integer
+              description: Number of wines updated
+            not_found:
+              type: array
+              items:
+                type: integer
+      400:
+        description: Body is not a non-empty array, is too large or has an invalid pair
+    """
+
+    items = request.get_json()
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty array of {id, quantity} pairs"}), 400
+    if len(items) > MAX_BATCH:
+        return jsonify({"error": f"Too many wines: {len(items)}. Max {MAX_BATCH}."}), 400
+
+    #validate everything before writing anything
+    quantities = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return jsonify({"error": f"Item {index}: expected an object"}), 400
+        id = item.get("id")
+        if not isinstance(id, int) or isinstance(id, bool) or id < 1:
+            return jsonify({"error": f"Item {index}: invalid wine id: {id}"}), 400
+        try:
+            quantities[id] = Wine.validate_quantity(item.get("quantity"))
+        except ValueError as e:
+            return jsonify({"error": f"Item {index}: {e}"}), 400
+
+    #one query for the ids that exist, one executemany for the updates
+    found = stats.snapshot(quantities)
+    params = [{"wine_id": id, "new_quantity": q} for id, q in quantities.items() if id in found]
+    if params:
+        db.session.execute(_SET_QUANTITY, params)
+        stats.apply(list(found.values()),
+            [{**before, "quantity": quantities[id]} for id, before in found.items()])
+        versions.bump("wines")
+    db.session.commit()
+
+    not_found = [id for id in quantities if id not in found]
+    return jsonify({"updated": len(params), "not_found": not_found}), 200
+
+
+@app.route("/wines/<int:id>/adjust", methods=["POST"])
+def adjust_quantity(id):
+    """
+    Add to or remove from the quantity of a wine
+
+    Applied as a single conditional UPDATE, so concurrent adjustments never
+    overwrite each other.
+    ---
+    consumes:
+      - application/json
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+        description: ID of the wine
+      - in: body
+        name: adjustment
+        required: true
+        schema:
+          type: object
+          properties:
+            delta:
+              type: integer
+              description: Bottles to add, negative to remove
+    responses:
+      200:
+        description: Quantity adjusted
+        schema:
+          type: object
+          properties:
+            id:
+              type: integer
+            quantity:
+              type: integer
+              description: New quantity value
+      400:
+        description: Missing or invalid delta
+      404:
+        description: Wine not found
+      409:
+        description: Quantity would go out of range
+    """
+
+    data = request.get_json(silent=True) or {}
+    delta = data.get("delta")
+    if not isinstance(delta, int) or isinstance(delta, bool):
+        return jsonify({"error": f"Invalid delta: {delta}.  Must be integer."}), 400
+
+    result = db.session.execute(_ADJUST_QUANTITY, {"wine_id": id, "delta": delta})
+    after = stats.snapshot([id], lock=False).get(id)
+    quantity = after and after["quantity"]
+    if result.rowcount:
+        stats.apply([{**after, "quantity": quantity - delta}], [after])
+        versions.bump("wines")
+    db.session.commit()
+
+    if after is None:
+        return jsonify({"error": "Wine not found"}), 404
+    if result.rowcount == 0:
+        return jsonify({"error": f"Quantity {quantity} {delta:+d} out of range 0 - {MAX_QUANTITY}"}), 409
+    return jsonify({"id": id, "quantity": quantity}), 200
+
+
 @app.route("/wines/<int:id>", methods=["DELETE"])
 def remove_wine(id):
     """
@@ -368,20 +1051,42 @@ def remove_wine(id):
         description: Wine not found
     """
 
-    wine = Wine.query.get_or_404(id)
+    wine = Wine.query.with_for_update().get_or_404(id)
+    stats.apply([stats.snapshot_of(wine)], [])
+    search.remove([id])
     db.session.delete(wine)
+    versions.bump("wines")
     db.session.commit()
     return jsonify({"message": f"Wine id {id} deleted"}), 200
 
 
 @app.route("/producers", methods=["GET"])
+@versions.conditional("producers")
 def get_producers():
     """
-    Retrieve all producers
+    Retrieve all producers, one page at a time
     ---
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Page size (default 100, max 1000)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque cursor from the previous page's next link
     responses:
       200:
         description: A list of producers
+        headers:
+          Link:
+            type: string
+            description: URL of the next page with rel="next", omitted on the last page
+          ETag:
+            type: string
+            description: Version of this page, send back in If-None-Match
         schema:
           type: array
           items:
@@ -393,18 +1098,22 @@ def get_producers():
                 type: string
               region_id:
                 type: integer
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
 
-    producers = Producer.query.all()
-    result = [
-        {"id": producer.id,
-        "name": producer.name,
-        "region_id": producer.region_id} 
-        for producer in producers]
-    return jsonify(result), 200
+    try:
+        limit = validate_limit(request.args.get("limit"))
+        producers, next_cursor = paginate(db.session.query(*PRODUCER_COLUMNS), Producer.id, limit, request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = as_dicts(PRODUCER_COLUMNS, producers)
+    return page_response(result, next_cursor, limit), 200
     
 
 @app.route("/producers/<int:id>", methods=["GET"])
+@versions.conditional("producers")
 def get_producer(id):
     """
     Retrieve a single producer by ID
@@ -441,13 +1150,32 @@ def get_producer(id):
 
 
 @app.route("/regions", methods=["GET"])
+@versions.conditional("regions")
 def get_regions():
     """
-    Retrieve all regions
+    Retrieve all regions, one page at a time
     ---
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Page size (default 100, max 1000)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque cursor from the previous page's next link
     responses:
       200:
         description: A list of regions
+        headers:
+          Link:
+            type: string
+            description: URL of the next page with rel="next", omitted on the last page
+          ETag:
+            type: string
+            description: Version of this page, send back in If-None-Match
         schema:
           type: array
           items:
@@ -459,18 +1187,22 @@ def get_regions():
                 type: string
               country_id:
                 type: integer
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
 
-    regions = Region.query.all()
-    result = [
-        {"id": region.id,
-        "name": region.name,
-        "country_id": region.country_id} 
-        for region in regions]
-    return jsonify(result), 200
+    try:
+        limit = validate_limit(request.args.get("limit"))
+        regions, next_cursor = paginate(db.session.query(*REGION_COLUMNS), Region.id, limit, request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = as_dicts(REGION_COLUMNS, regions)
+    return page_response(result, next_cursor, limit), 200
 
 
 @app.route("/regions/<int:id>", methods=["GET"])
+@versions.conditional("regions")
 def get_region(id):
     """
     Retrieve a single region by ID
@@ -507,13 +1239,32 @@ def get_region(id):
 
 
 @app.route("/countries", methods=["GET"])
+@versions.conditional("countries")
 def get_countries():
     """
-    Retrieve all countries
+    Retrieve all countries, one page at a time
     ---
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Page size (default 100, max 1000)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Opaque cursor from the previous page's next link
     responses:
       200:
         description: A list of countries
+        headers:
+          Link:
+            type: string
+            description: URL of the next page with rel="next", omitted on the last page
+          ETag:
+            type: string
+            description: Version of this page, send back in If-None-Match
         schema:
           type: array
           items:
@@ -523,17 +1274,22 @@ def get_countries():
                 type: integer
               name:
                 type: string
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
 
-    countries = Country.query.all()
-    result = [
-        {"id": country.id,
-        "name": country.name}
-        for country in countries]
-    return jsonify(result), 200
+    try:
+        limit = validate_limit(request.args.get("limit"))
+        countries, next_cursor = paginate(db.session.query(*COUNTRY_COLUMNS), Country.id, limit, request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = as_dicts(COUNTRY_COLUMNS, countries)
+    return page_response(result, next_cursor, limit), 200
 
 
 @app.route("/countries/<int:id>", methods=["GET"])
+@versions.conditional("countries")
 def get_country(id):
     """
     Retrieve a single country by ID
@@ -566,6 +1322,332 @@ def get_country(id):
     return jsonify(result), 200
 
 
+@app.route("/search", methods=["GET"])
+@versions.conditional(expanded_tables)
+def search_wines():
+    """
+    Search wines by name, varietal, vintage, producer and region
+
+    Matches on trigrams, so words may be partial, in any order and contain
+    typos. Results are ranked by how much of the query they contain.
+    ---
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Free text, ex "pol roger brut 2012"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of results (default 100, max 1000)
+      - name: expand
+        in: query
+        type: string
+        required: false
+        description: Comma separated relations to embed, any of producer, region, country
+    responses:
+      200:
+        description: Matching wines, best first
+        headers:
+          ETag:
+            type: string
+            description: Version of the results, send back in If-None-Match
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              name:
+                type: string
+              vintage:
+                type: string
+              score:
+                type: number
+                description: Share of the query found in the wine, 0.3 to 1
+      304:
+        description: Not modified since the ETag in If-None-Match
+      400:
+        description: Missing or too short query, or invalid limit or expand
+    """
+
+    try:
+        limit = validate_limit(request.args.get("limit"))
+        expand = parse_expand(request.args.get("expand"))
+        matches = search.search(request.args.get("q"), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    scores = dict(matches)
+    wines = {wine["id"]: wine for wine in as_wine_dicts(expand,
+        wine_query(expand).filter(Wine.id.in_(scores)))} if scores else {}
+    result = []
+    for id, score in matches:
+        if id in wines:
+            wines[id]["score"] = score
+            result.append(wines[id])
+    return jsonify(result), 200
+
+
+@app.route("/suggest", methods=["GET"])
+def suggest_names():
+    """
+    Suggest country, region or producer names as they are typed
+
+    Served from an in-memory prefix index, without a database query.
+    ---
+    parameters:
+      - name: field
+        in: query
+        type: string
+        enum: [country, region, producer]
+        required: true
+        description: Names to suggest
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Start of the name or of any word in it, case and accents ignored
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of names (default 10, max 50)
+    responses:
+      200:
+        description: Matching names, the ones with most wines first
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              name:
+                type: string
+              wines:
+                type: integer
+                description: Number of wines referencing the name
+      400:
+        description: Invalid field, missing prefix or invalid limit
+    """
+
+    try:
+        limit = suggest.validate_limit(request.args.get("limit"))
+        result = suggest.suggest(request.args.get("field"), request.args.get("prefix"), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 200
+
+
+def stats_tables() -> tuple:
+    """Tables read by GET /stats/<dimension>, names come from the dimension's own table."""
+    model = stats.NAMED.get(request.view_args.get("dimension"))
+    return ("wines", model.__tablename__) if model else ("wines",)
+
+
+@app.route("/stats", methods=["GET"])
+@versions.conditional("wines")
+def get_stats():
+    """
+    Retrieve cellar wide totals
+    ---
+    responses:
+      200:
+        description: Totals over every wine
+        headers:
+          ETag:
+            type: string
+            description: Version of the totals, send back in If-None-Match
+        schema:
+          type: object
+          properties:
+            wines:
+              type: integer
+            bottles:
+              type: integer
+            avg_rating:
+              type: number
+              description: Average over rated wines, null if none are rated
+            dimensions:
+              type: array
+              items:
+                type: string
+              description: Groupings available under /stats/{dimension}
+      304:
+        description: Not modified since the ETag in If-None-Match
+    """
+
+    return jsonify(dimensions=list(stats.DIMENSIONS), **stats.totals()), 200
+
+
+@app.route("/stats/<dimension>", methods=["GET"])
+@versions.conditional(stats_tables)
+def get_stats_by(dimension):
+    """
+    Retrieve bottle counts and average rating grouped by a dimension
+
+    Served from totals kept up to date by every write, not computed per request.
+    ---
+    parameters:
+      - name: dimension
+        in: path
+        type: string
+        enum: [country, region, producer, color, type, vintage]
+        required: true
+        description: Grouping
+    responses:
+      200:
+        description: One entry per group holding wines, most bottles first
+        headers:
+          ETag:
+            type: string
+            description: Version of the groups, send back in If-None-Match
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              key:
+                type: string
+                description: ID for country, region and producer, else the value; null when unset
+              name:
+                type: string
+                description: Name for country, region and producer, else null
+              wines:
+                type: integer
+              bottles:
+                type: integer
+              avg_rating:
+                type: number
+                description: Average over rated wines, null if none are rated
+      304:
+        description: Not modified since the ETag in If-None-Match
+      400:
+        description: Unknown dimension
+    """
+
+    try:
+        return jsonify(stats.groups(dimension)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/ratings/refresh", methods=["POST"])
+def refresh_ratings():
+    """
+    Re-scrape ratings of many wines at once
+
+    Lookups run concurrently under the scraper's per-host rate limit and
+    results are written back in batches. A request refreshes at most
+    MAX_LIMIT wines; for the whole cellar use the `flask refresh-ratings`
+    command, which is not bound by request timeouts.
+    ---
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: refresh
+        required: false
+        schema:
+          type: object
+          properties:
+            target:
+              type: string
+              enum: [missing, stale, all]
+              description: Wines without a rating (default), also ratings older than RATING_MAX_AGE_DAYS, or every wine
+            limit:
+              type: integer
+              description: Maximum number of wines to refresh, default 50, at most 200
+    responses:
+      200:
+        description: Refresh report
+        schema:
+          type: object
+          properties:
+            processed:
+              type: integer
+            rated:
+              type: integer
+            not_found:
+              type: integer
+            failed:
+              type: integer
+            elapsed:
+              type: number
+            per_second:
+              type: number
+      400:
+        description: Validation error
+    """
+
+    data = request.get_json(silent=True) or {}
+    try:
+        query = rating_refresh.candidates(data.get("target", "missing"),
+            timedelta(days=app.config.get("RATING_MAX_AGE_DAYS", 30)))
+        limit = rating_refresh.validate_limit(data.get("limit"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    report = rating_refresh.refresh_ratings(query, app.config.get("REFRESH_THREADS", 8), limit)
+    return jsonify(report), 200
+
+
+@app.route("/scraper/cache", methods=["GET"])
+def get_scraper_cache():
+    """
+    Retrieve rating cache counters
+    ---
+    responses:
+      200:
+        description: Cache hit/miss counters of this worker process
+        schema:
+          type: object
+          properties:
+            enabled:
+              type: boolean
+            hits:
+              type: integer
+            misses:
+              type: integer
+            entries:
+              type: integer
+              description: Fresh entries shared by all processes
+    """
+
+    return jsonify(scraper.cache_stats()), 200
+
+
+@app.route("/responses/cache", methods=["GET"])
+def get_response_cache():
+    """
+    Retrieve response cache counters
+    ---
+    responses:
+      200:
+        description: Cache hit/miss counters of this worker process
+        schema:
+          type: object
+          properties:
+            enabled:
+              type: boolean
+            hits:
+              type: integer
+            misses:
+              type: integer
+            coalesced:
+              type: integer
+              description: Misses served by waiting on another request's build
+            entries:
+              type: integer
+    """
+
+    return jsonify(response_cache.stats()), 200
+
+
 @app.route("/csv", methods=["GET"])
 def download_csv():
     """
@@ -597,15 +1679,11 @@ def download_csv():
     .join(Producer, Wine.producer_id == Producer.id)
     .join(Region, Producer.region_id == Region.id)
     .join(Country, Region.country_id == Country.id)
-    .order_by(Wine.id)
-    .all())
-
-
-    dataframe = pd.DataFrame(wines, columns=csvio.CSV_HEADERS)
-    csv_data = dataframe.to_csv(index=False)
+    .order_by(Wine.id))
 
+    #stream rows as they are read instead of building the whole file in memory
     return Response(
-        csv_data,
+        stream_with_context(csvio.stream_csv(wines)),
         mimetype="text/csv",
         headers={"Content-Disposition": "attachment; filename=wines.csv"},
         status=200
@@ -614,7 +1692,11 @@ def download_csv():
 @app.route("/csv", methods=["POST"])
 def upload_csv():
     """
-    Upload and replace wine database from CSV file
+    Upload wine data from CSV file, replacing or merging into the database
+
+    In replace mode (default) the database is wiped and reloaded from the file.
+    In merge mode wines are matched on producer, name and vintage: new wines
+    are inserted, changed wines are updated in place and keep their IDs.
     ---
     consumes:
       - multipart/form-data
@@ -624,14 +1706,37 @@ def upload_csv():
         type: file
         required: true
         description: CSV file containing wine data
+      - name: mode
+        in: formData
+        type: string
+        enum: [replace, merge]
+        required: false
+        description: Import mode (default replace)
+      - name: delete_missing
+        in: formData
+        type: boolean
+        required: false
+        description: In merge mode, also delete wines missing from the file
     responses:
       200:
-        description: File uploaded and database replaced
+        description: File uploaded and database replaced or merged
         schema:
           type: object
           properties:
             message:
               type: string
+            inserted:
+              type: integer
+              description: Merge mode only
+            updated:
+              type: integer
+              description: Merge mode only
+            unchanged:
+              type: integer
+              description: Merge mode only
+            deleted:
+              type: integer
+              description: Merge mode only
       400:
         description: Invalid or missing file
     """
@@ -647,34 +1752,53 @@ def upload_csv():
     if not file.filename.lower().endswith(".csv"):
         return jsonify({"error": "Invalid file type"}), 400
     
-    #read to dataframe
+    #read in fixed size chunks so memory is bounded by chunk size, not file size
     try:
-        df = pd.read_csv(file)
+        #only empty cells are missing, so a wine or region called "NA" stays text
+        chunks = pd.read_csv(file, chunksize=app.config.get("CSV_CHUNK_SIZE", csvio.CHUNK_SIZE),
+            dtype=csvio.CSV_DTYPES, keep_default_na=False, na_values=[""])
+        first = next(chunks)
     except Exception as e:
         return jsonify({"error": "Failed to parse file"}), 400
 
     #validate headers
-    if list(df.columns) != csvio.CSV_HEADERS:
+    if list(first.columns) != csvio.CSV_HEADERS:
         return jsonify({"error": "Invalid CSV headers"}), 400
-    
-    #convert to dict
-    rows = df.to_dict(orient="records")
 
-    #wipe db
-    csvio.clear_database()
+    mode = request.values.get("mode", "replace")
+    if mode not in ("replace", "merge"):
+        return jsonify({"error": f"Invalid mode: {mode}"}), 400
+    delete_missing = request.values.get("delete_missing", "").lower() in ("1", "true", "yes")
+    chunks = itertools.chain([first], chunks)
 
-    #insert each distinct country and map ids to names
-    country_map = csvio.insert_countries(rows)
-
-    #insert each distinct region and map ids to names
-    region_map = csvio.insert_regions(rows, country_map)
-
-    #insert each distinct producer and map ids to names
-    producer_map = csvio.insert_producers(rows, region_map)
+    try:
+        if mode == "merge":
+            #match wines on producer, name and vintage and upsert the differences
+            counts = csvio.merge_chunks(chunks, delete_missing)
+        else:
+            #wipe db in the same transaction, a bad row in any chunk keeps the old data
+            csvio.clear_database(commit=False)
 
-    #insert all wines
-    csvio.insert_wines(rows, producer_map)
+            #insert countries, regions, producers and wines chunk by chunk
+            csvio.import_chunks(chunks)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to parse file"}), 400
+    except IntegrityError as e:
+        db.session.rollback()
+        if csvio.is_duplicate_wine(e):
+            return jsonify({"error": "Duplicate wine in file"}), 400
+        return jsonify({"error": f"Invalid wine in file: {e.orig}"}), 400
     
+    if mode == "replace":
+        #merge applied its own changes, a whole new file is cheaper to recompute
+        stats.rebuild()
+        search.rebuild()
+    versions.bump("wines")
     db.session.commit()
-    
+    if mode == "replace":
+        csvio.clear_caches()    #other requests may have cached the replaced rows meanwhile
+
+    if mode == "merge":
+        return jsonify(message="File merged successfully", **counts), 200
     return jsonify(message="File uploaded successfully"), 200
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+CSV import benchmark.
+
+Measures rows/sec of the set-based CSV loader against a SQLite file.
+
+Usage:
+    python benchmarks/bench_csv_import.py [rows ...]
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db
+import csv_io.csv_io as csvio
+
+SIZES = [10_000, 100_000, 1_000_000]
+COUNTRIES = ["France", "Italy", "Spain", "Germany", "Portugal", "Austria",
+    "United States", "Australia", "New Zealand", "Chile", "Argentina", "South Africa"]
+
+
+def make_rows(count: int) -> list:
+    """Generate synthetic CSV rows with realistic dimension cardinality."""
+    rng = random.Random(count)
+    regions = [(f"Region {i}", rng.choice(COUNTRIES)) for i in range(max(10, count // 2000))]
+    producers = [(f"Producer {i}", rng.choice(regions)) for i in range(max(50, count // 20))]
+    rows = []
+    for i in range(count):
+        producer, (region, country) = rng.choice(producers)
+        rows.append({
+            "name": f"Cuvee {i}",
+            "vintage": rng.randint(1980, 2023),
+            "varietal": "Pinot Noir",
+            "color": rng.choice(["Red", "White", "Rosé"]),
+            "type": "Still",
+            "rating": rng.randint(80, 100),
+            "quantity": rng.randint(0, 48),
+            "producer": producer,
+            "region": region,
+            "country": country
+        })
+    return rows
+
+
+def run(count: int) -> float:
+    """Load count rows into an empty database and return rows/sec."""
+    rows = make_rows(count)
+    start = time.perf_counter()
+    csvio.clear_database()
+    country_map = csvio.insert_countries(rows)
+    region_map = csvio.insert_regions(rows, country_map)
+    producer_map = csvio.insert_producers(rows, region_map)
+    csvio.insert_wines(rows, producer_map)
+    db.session.commit()
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        with app.app_context():
+            db.create_all()
+            for count in sizes:
+                print(f"{count:>10,} rows: {run(count):>10,.0f} rows/sec")
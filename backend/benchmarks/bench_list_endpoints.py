@@ -0,0 +1,76 @@
+"""
+List endpoint benchmark.
+
+Measures requests/sec and peak allocation per request of GET /wines and
+GET /producers through the Flask test client against a SQLite file, with
+the response cache disabled so every request runs the query and the
+serializer.
+
+Usage:
+    python benchmarks/bench_list_endpoints.py [rows] [--stdlib]
+
+--stdlib serializes with Flask's default provider instead of orjson.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db
+import csv_io.csv_io as csvio
+import utilities.response_cache as response_cache
+import utilities.json_provider as json_provider
+from bench_csv_import import make_rows
+
+ROWS = 100_000
+URLS = ["/wines?limit=1000", "/wines?limit=100&sort=-rating", "/producers?limit=1000"]
+SECONDS = 3
+
+
+def measure(client, url: str) -> tuple:
+    """Return (requests/sec, peak KiB allocated while serving one request) for url."""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        assert client.get(url).status_code == 200
+        count += 1
+    rate = count / (time.perf_counter() - start)
+
+    samples = 20
+    peak = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        client.get(url)
+        peak += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return rate, peak / samples / 1024
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--stdlib"]
+    rows = int(args[0]) if args else ROWS
+    app.json = json_provider.provider(app, fast="--stdlib" not in sys.argv)
+    response_cache.configure_cache(None)
+    app.config["RATING_WORKER"] = "external"
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        with app.app_context():
+            db.create_all()
+            data = make_rows(rows)
+            csvio.insert_wines(data, csvio.insert_producers(data,
+                csvio.insert_regions(data, csvio.insert_countries(data))))
+            db.session.commit()
+            db.session.remove()
+
+            client = app.test_client()
+            print(f"{rows:,} wines, JSON provider: {type(app.json).__name__}")
+            for url in URLS:
+                rate, peak = measure(client, url)
+                print(f"{url:32s} {rate:>8,.0f} req/sec  {peak:>8,.0f} KiB peak/request")
@@ -0,0 +1,73 @@
+"""
+Rating parser benchmark.
+
+Measures pages/sec and peak memory per parse of Cellar Tracker result pages
+for the original full-tree parse and the targeted parse_rating paths.
+
+Usage:
+    python benchmarks/bench_parse.py [page.html ...]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.scraper import parse_rating
+
+CORPUS = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "test", "CellarTracker.html")]
+ROUNDS = 50
+
+
+def parse_full_tree(html: str):
+    """Original parser: build the whole page tree, then find the first score."""
+    soup = BeautifulSoup(html, "html.parser")
+    el_scr = soup.find("span", class_="el scr")
+    if el_scr:
+        score_action = el_scr.find("a", class_="action")
+        if score_action:
+            return int(float(score_action.text.strip().split()[0]))
+    return None
+
+
+PARSERS = {
+    "full tree": parse_full_tree,
+    "strainer": lambda html: parse_rating(html, early_exit=False),
+    "early exit": parse_rating
+}
+
+
+def measure(parse, pages: list) -> tuple:
+    """Return (pages/sec, peak KiB per parse) of a parser over the corpus."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for html in pages:
+            parse(html)
+    rate = ROUNDS * len(pages) / (time.perf_counter() - start)
+
+    peaks = []
+    for html in pages:
+        tracemalloc.start()
+        parse(html)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return rate, sum(peaks) / len(peaks) / 1024
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or CORPUS
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+
+    expected = [parse_full_tree(html) for html in pages]
+    print(f"{len(pages)} page(s), {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB average")
+    for name, parse in PARSERS.items():
+        assert [parse(html) for html in pages] == expected, f"{name} disagrees with full tree"
+        rate, peak = measure(parse, pages)
+        print(f"{name:>10}: {rate:>8,.0f} pages/sec  {peak:>8,.0f} KiB peak per parse")
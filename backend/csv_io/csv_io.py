@@ -3,95 +3,238 @@ CSV I/O utilities for database population and export.
 
 """
 
+import csv
+import io
 from models.wine import Wine
 from models.producer import Producer
 from models.region import Region
 from models.country import Country 
+from models.wine_stat import WineStat
 from models import db
+from sqlalchemy import func
+from utilities.upsert import upsert
+import utilities.dimensions as dimensions
+import utilities.versions as versions
+import utilities.stats as stats
+import utilities.search as search
+import utilities.suggest as suggest
 
 
 CSV_HEADERS = ["name", "vintage", "varietal", "color", "type", "rating", "quantity",
              "producer", "region", "country"]
 
+#read as text in every chunk, dtypes inferred per chunk would turn an all numeric name into a float
+CSV_DTYPES = {column: str for column in ["name", "vintage", "varietal", "color", "type",
+    "producer", "region", "country"]}
 
-def clear_database():
+BATCH_SIZE = 5000   #rows per executemany and per streamed export chunk
+CHUNK_SIZE = 10000  #rows parsed per chunk on import
+
+WINE_KEY = ["name", "vintage", "producer_id"]    #identifies a wine across imports
+WINE_UNIQUE = "uq_wines_name_vintage_producer"   #constraint on WINE_KEY
+DEFAULT_QUANTITY = Wine.__table__.c.quantity.default.arg     #for blank quantity cells
+MERGE_COLUMNS = ["varietal", "color", "type", "rating", "quantity"]
+
+
+def clear_database(commit: bool = True):
     """
-    Delete all records from Wine, Producer, Region, and Country tables.
+    Delete all records from Wine, Producer, Region, and Country tables, the wine stats and the search index.
 
     This function should be used before inserting new data from CSV to avoid duplicates.
-    Commits the session after deletion.
+    Empties the dimension name, stats and suggestion caches so the deleted IDs are not reused.
+
+    Args:
+        commit (bool): Commit the deletion. Pass False to replace the data in
+            one transaction with the import, then commit and call clear_caches.
     """
     db.session.query(Wine).delete()
+    db.session.query(WineStat).delete()
+    search.remove_all()
     db.session.query(Producer).delete()
     db.session.query(Region).delete()
     db.session.query(Country).delete()
-    db.session.commit()
+    versions.bump("wines", "producers", "regions", "countries", dimensions.GENERATION)
+    if commit:
+        db.session.commit()
+    clear_caches()
+
+
+def clear_caches():
+    """Empty the dimension name, stats and suggestion caches, e.g. after the tables are replaced."""
+    dimensions.clear_cache()
+    stats.clear_cache()
+    suggest.clear_cache()
+
+
+def stream_csv(query, batch_size: int = BATCH_SIZE):
+    """
+    Render query rows as CSV text, one chunk per batch.
+
+    Rows are read with a server-side cursor in batches of batch_size,
+    so memory stays flat regardless of the number of rows.
+
+    Args:
+        query: SQLAlchemy query returning rows in CSV_HEADERS order.
+        batch_size (int): Rows fetched and written per chunk.
+
+    Yields:
+        str: CSV text, starting with the header line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    #send the header right away so the first byte goes out before any query
+    writer.writerow(CSV_HEADERS)
+    yield _drain(buffer)
+
+    count = 0
+    for row in query.yield_per(batch_size):
+        writer.writerow(row)
+        count += 1
+        if count % batch_size == 0:
+            yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Return the buffered text and reset the buffer."""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def _value(value):
+    """Convert a parsed CSV cell to a database value, mapping blanks (NaN) to None."""
+    if value is None or value != value:
+        return None
+    return value
+
 
-    
-def insert_countries(rows) -> dict:
+def _required(row, column: str) -> str:
+    """Read a text cell of a CSV row that must not be blank."""
+    value = _value(row[column])
+    if value is None or not str(value).strip():
+        raise ValueError(f"Missing {column}")
+    return str(value).strip()
+
+
+def _default(value, default):
+    """Convert a parsed CSV cell like _value, replacing a blank with default."""
+    value = _value(value)
+    return default if value is None else value
+
+
+def is_duplicate_wine(error) -> bool:
+    """
+    Tell whether an IntegrityError was raised by the WINE_KEY unique constraint.
+
+    Args:
+        error (IntegrityError): Error raised by an insert or upsert of wines.
+
+    Returns:
+        bool: True for a duplicate wine, False for any other violation, ex: NOT NULL.
+    """
+    message = str(error.orig)
+    sqlite = "UNIQUE constraint failed: " + ", ".join(f"{Wine.__tablename__}.{c}" for c in WINE_KEY)
+    return WINE_UNIQUE in message or sqlite in message
+
+
+def bulk_insert(table, records: list):
+    """
+    Insert records with one executemany per batch instead of one INSERT per row.
+
+    Args:
+        table: SQLAlchemy Table to insert into.
+        records (list[dict]): Column values for each row.
+    """
+    for start in range(0, len(records), BATCH_SIZE):
+        db.session.execute(table.insert(), records[start:start + BATCH_SIZE])
+
+
+def _text(value):
+    """Convert a parsed CSV cell to text, keeping whole numbers free of a trailing '.0'."""
+    value = _value(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return None if value is None else str(value)
+
+
+def load_map(model) -> dict:
+    """
+    Map every name of a dimension table to its ID with a single SELECT.
+
+    Args:
+        model: Country, Region or Producer.
+
+    Returns:
+        dict: Mapping of name to database ID.
+    """
+    return {name: id for name, id in db.session.query(model.name, model.id)}
+
+
+def insert_countries(rows, country_map=None) -> dict:
     """
     Insert distinct countries from CSV rows.
 
     Args:
         rows (list[dict]): Parsed CSV rows.
+        country_map (dict): Mapping of already inserted country names to IDs.
 
     Returns:
         dict: Mapping of country name to database ID.
     """
-    country_map = {}
-    countries = {r["country"].strip() for r in rows}
-    for name in countries:
-        if name not in country_map:
-            c = Country(name=name)
-            db.session.add(c)
-            db.session.flush()
-            country_map[name] = c.id
+    country_map = {} if country_map is None else country_map
+    missing = {_required(r, "country") for r in rows} - country_map.keys()
+    country_map.update(dimensions.resolve_countries(missing))
     return country_map
 
 
-def insert_regions(rows, country_map) -> dict:
+def insert_regions(rows, country_map, region_map=None) -> dict:
     """
     Insert distinct regions from CSV rows.
 
     Args:
         rows (list[dict]): Parsed CSV rows.
         country_map (dict): Mapping of country names to IDs.
+        region_map (dict): Mapping of already inserted region names to IDs.
 
     Returns:
         dict: Mapping of region name to database ID.
     """
-    region_map = {}
-    regions = {(r["region"].strip(), r["country"].strip()) for r in rows}
-    for region_name, country_name in regions:
+    region_map = {} if region_map is None else region_map
+    regions = {}
+    for r in rows:
+        region_name = _required(r, "region")
         if region_name not in region_map:
-            r = Region(name=region_name, country_id=country_map[country_name])
-            db.session.add(r)
-            db.session.flush()
-            region_map[region_name] = r.id
+            regions.setdefault(region_name, country_map[_required(r, "country")])
+    region_map.update(dimensions.resolve_regions(regions))
     return region_map
 
 
-def insert_producers(rows, region_map) -> dict:
+def insert_producers(rows, region_map, producer_map=None) -> dict:
     """
     Insert distinct producers from CSV rows.
 
     Args:
         rows (list[dict]): Parsed CSV rows.
         region_map (dict): Mapping of region names to IDs.
+        producer_map (dict): Mapping of already inserted producer names to IDs.
 
     Returns:
         dict: Mapping of producer name to database ID.
     """
-    producer_map = {}
-    producers = {(r["producer"].strip(), r["region"].strip()) for r in rows}
-    for producer_name, region_name in producers:
-        if producer_name not in producer_map:            
-            p = Producer(name=producer_name, region_id=region_map[region_name])
-            db.session.add(p)
-            db.session.flush()
-            producer_map[producer_name] = p.id
+    producer_map = {} if producer_map is None else producer_map
+    producers = {}
+    for r in rows:
+        producer_name = _required(r, "producer")
+        if producer_name not in producer_map:
+            producers.setdefault(producer_name, region_map[_required(r, "region")])
+    producer_map.update(dimensions.resolve_producers(producers))
     return producer_map
 
+
 def insert_wines(rows, producer_map):
     """
     Insert wines from CSV rows.
@@ -100,15 +243,157 @@ def insert_wines(rows, producer_map):
         rows (list[dict]): Parsed CSV rows.
         producer_map (dict): Mapping of producer names to IDs.
     """
+    bulk_insert(Wine.__table__, [_wine_record(row, producer_map) for row in rows])
+
+
+def _wine_record(row, producer_map) -> dict:
+    """Build the wines table values for a CSV row."""
+    return {
+        "name": _required(row, "name"),
+        "vintage": _text(row["vintage"]),
+        "varietal": _value(row["varietal"]),
+        "color": _value(row["color"]),
+        "type": _value(row["type"]),
+        "rating": _value(row["rating"]),
+        "quantity": _default(row["quantity"], DEFAULT_QUANTITY),
+        "producer_id": producer_map[_required(row, "producer")]
+    }
+
+
+def import_chunks(chunks):
+    """
+    Insert parsed CSV chunks, carrying the dimension maps from chunk to chunk.
+
+    Each chunk only inserts countries, regions and producers it has not
+    already seen, then inserts its wines as one batch, so memory is bounded
+    by the chunk size rather than the file size.
+
+    Args:
+        chunks: Iterable of DataFrames with CSV_HEADERS columns.
+    """
+    country_map, region_map, producer_map = {}, {}, {}
+    for chunk in chunks:
+        rows = chunk.to_dict(orient="records")
+        insert_countries(rows, country_map)
+        insert_regions(rows, country_map, region_map)
+        insert_producers(rows, region_map, producer_map)
+        insert_wines(rows, producer_map)
+
+
+def merge_chunks(chunks, delete_missing: bool = False) -> dict:
+    """
+    Merge parsed CSV chunks into the existing data instead of replacing it.
+
+    Wines are matched on (producer, name, vintage). New wines are inserted,
+    matched wines only have their changed columns updated and keep their IDs.
+    The stats and the search index are updated for the inserted, changed and
+    deleted wines only.
+
+    Args:
+        chunks: Iterable of DataFrames with CSV_HEADERS columns.
+        delete_missing (bool): Also delete existing wines missing from the file.
+
+    Returns:
+        dict: Counts of inserted, updated, unchanged and deleted wines.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    country_map = load_map(Country)
+    region_map = load_map(Region)
+    producer_map = load_map(Producer)
+    last_id = db.session.query(func.max(Wine.id)).scalar() or 0
+    matched = set()     #ids of existing wines found in the file
+
+    for chunk in chunks:
+        rows = chunk.to_dict(orient="records")
+        insert_countries(rows, country_map)
+        insert_regions(rows, country_map, region_map)
+        insert_producers(rows, region_map, producer_map)
+        merge_wines(rows, producer_map, counts, matched)
+
+    if delete_missing:
+        counts["deleted"] = _delete_unmatched(last_id, matched)
+    return counts
+
+
+def merge_wines(rows, producer_map, counts: dict, matched: set):
+    """
+    Upsert wines from CSV rows, sending only new and changed rows to the database,
+    and apply them to the stats and the search index.
+
+    Args:
+        rows (list[dict]): Parsed CSV rows.
+        producer_map (dict): Mapping of producer names to IDs.
+        counts (dict): Running inserted/updated/unchanged counts to add to.
+        matched (set): Running set of existing wine IDs found in the file.
+    """
+    records = {}
     for row in rows:
-        wine = Wine(
-            name = row["name"].strip(),
-            vintage = row["vintage"],
-            varietal = row["varietal"],
-            color = row["color"],
-            type = row["type"],
-            rating = row["rating"],
-            quantity = row["quantity"],
-            producer_id = producer_map[row["producer"].strip()]
-        )
-        db.session.add(wine)
\ No newline at end of file
+        record = _wine_record(row, producer_map)
+        records[tuple(record[k] for k in WINE_KEY)] = record   #last row for a wine wins
+    if not records:
+        return
+
+    #fetch candidate matches for the whole chunk with one query, locked like stats.snapshot
+    existing = _candidates(records, lock=True)
+
+    inserts, updates = {}, {}
+    before, after, reindex = [], [], []
+    for key, record in records.items():
+        wine = existing.get(key)
+        if wine is None:
+            inserts[key] = record
+            continue
+        matched.add(wine["id"])
+        changed = tuple(c for c in MERGE_COLUMNS if wine[c] != record[c])
+        if changed:
+            updates.setdefault(changed, []).append(record)
+            before.append(stats.snapshot_of(wine))
+            after.append(stats.snapshot_of({**record, "id": wine["id"]}))
+            if "varietal" in changed:
+                reindex.append({**record, "id": wine["id"]})
+        else:
+            counts["unchanged"] += 1
+
+    #one upsert per set of changed columns so untouched columns are never written
+    upsert(Wine.__table__, list(inserts.values()), WINE_KEY, MERGE_COLUMNS)
+    for columns, group in updates.items():
+        upsert(Wine.__table__, group, WINE_KEY, list(columns))
+        counts["updated"] += len(group)
+    counts["inserted"] += len(inserts)
+
+    if inserts:
+        created = _candidates(inserts)     #their new IDs
+        inserted = [{**record, "id": created[key]["id"]} for key, record in inserts.items()]
+        after += [stats.snapshot_of(w) for w in inserted]
+        search.index(inserted, new=True)
+    stats.apply(before, after)
+    search.index(reindex)
+
+
+def _candidates(records: dict, lock: bool = False) -> dict:
+    """Find the stored wines of (name, vintage, producer_id) -> record with one query."""
+    query = (db.session.query(Wine.id, *[getattr(Wine, c) for c in WINE_KEY + MERGE_COLUMNS])
+        .filter(Wine.producer_id.in_({r["producer_id"] for r in records.values()}))
+        .filter(Wine.name.in_({r["name"] for r in records.values()})))
+    if lock:
+        query = query.with_for_update()
+    found = {}
+    for wine in query:
+        key = tuple(getattr(wine, k) for k in WINE_KEY)
+        if key in records:
+            found[key] = wine._asdict()
+    return found
+
+
+def _delete_unmatched(last_id: int, matched: set) -> int:
+    """Delete wines that existed before the merge but were not in the file."""
+    ids = [id for (id,) in db.session.query(Wine.id).filter(Wine.id <= last_id)
+        if id not in matched]
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        stats.apply(list(stats.snapshot(batch).values()), [])
+        search.remove(batch)
+        (db.session.query(Wine)
+            .filter(Wine.id.in_(batch))
+            .delete(synchronize_session=False))
+    return len(ids)
@@ -1,8 +1,18 @@
+import os
 from app import app
 from models import db
+from utilities import dimensions
+from utilities import stats
+import scraper.worker as rating_worker
 
 
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
+        dimensions.warm()   #load dimension names before the first request
+        stats.warm()
+        #the reloader runs this file in a watcher process and again in the serving
+        #child, only the child (WERKZEUG_RUN_MAIN set) serves and should resume
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            rating_worker.resume()  #ratings still pending from the last run
     app.run(debug=True)
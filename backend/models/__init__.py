@@ -1,3 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+MAX_ID = 2**63 - 1  #largest signed 64 bit integer, bigger values overflow the drivers
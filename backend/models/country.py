@@ -6,32 +6,52 @@ Referenced by producers.
 """
 
 from models import db
-import pycountry
+import functools
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    """Fold case, accents, apostrophes and spacing so spellings of a name compare equal."""
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name.replace("\u2019", "'"))
+        name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(name.casefold().split())
+
+
+@functools.lru_cache(maxsize=None)
+def _country_names() -> dict:
+    """Load the generated lookup table on first use."""
+    from models.country_names import COUNTRY_NAMES
+    return COUNTRY_NAMES
+
 
 class Country(db.Model):
     __tablename__ = "countries"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
-    COUNTRY_MAP = {c.name.lower(): c.name for c in pycountry.countries}
 
 
     @staticmethod
     def validate_name(name: str) -> str:
         """Validate country name.
 
+        Accepts ISO names, official and common names, alpha-2 and alpha-3
+        codes and common aliases, ignoring case and accents. The lookup
+        table is loaded on first use.
+
         Args:
             name: Input string to validate.
 
         Returns:
-            str: Trimmed name.
+            str: Canonical country name.
 
         Raises:
-            ValueError: If name is empty or exceeds 100 characters.
+            ValueError: If name is empty or not a known country.
         """
         
         if not name or not name.strip():
             raise ValueError("Country name is required")
-        lower = name.strip().lower()
-        if not lower in Country.COUNTRY_MAP:
+        canonical = _country_names().get(normalize_name(name))
+        if canonical is None:
             raise ValueError(f"Invalid country name: '{name}'")
-        return Country.COUNTRY_MAP[lower]
+        return canonical
@@ -0,0 +1,978 @@
+"""
+Country name lookup table.
+
+Generated by utilities/build_country_names.py from pycountry; do not edit.
+Maps normalized spellings, codes and aliases to canonical country names.
+"""
+
+COUNTRY_NAMES = {'abw': 'Aruba',
+ 'ad': 'Andorra',
+ 'ae': 'United Arab Emirates',
+ 'af': 'Afghanistan',
+ 'afg': 'Afghanistan',
+ 'afghanistan': 'Afghanistan',
+ 'ag': 'Antigua and Barbuda',
+ 'ago': 'Angola',
+ 'ai': 'Anguilla',
+ 'aia': 'Anguilla',
+ 'al': 'Albania',
+ 'ala': 'Åland Islands',
+ 'aland islands': 'Åland Islands',
+ 'alb': 'Albania',
+ 'albania': 'Albania',
+ 'alemania': 'Germany',
+ 'algeria': 'Algeria',
+ 'allemagne': 'Germany',
+ 'am': 'Armenia',
+ 'america': 'United States',
+ 'american samoa': 'American Samoa',
+ 'and': 'Andorra',
+ 'andorra': 'Andorra',
+ 'angola': 'Angola',
+ 'anguilla': 'Anguilla',
+ 'antarctica': 'Antarctica',
+ 'antigua and barbuda': 'Antigua and Barbuda',
+ 'ao': 'Angola',
+ 'aotearoa': 'New Zealand',
+ 'aq': 'Antarctica',
+ 'ar': 'Argentina',
+ 'arab republic of egypt': 'Egypt',
+ 'are': 'United Arab Emirates',
+ 'arg': 'Argentina',
+ 'argentina': 'Argentina',
+ 'argentine republic': 'Argentina',
+ 'arm': 'Armenia',
+ 'armenia': 'Armenia',
+ 'aruba': 'Aruba',
+ 'as': 'American Samoa',
+ 'asm': 'American Samoa',
+ 'at': 'Austria',
+ 'ata': 'Antarctica',
+ 'atf': 'French Southern Territories',
+ 'atg': 'Antigua and Barbuda',
+ 'au': 'Australia',
+ 'aus': 'Australia',
+ 'australia': 'Australia',
+ 'austria': 'Austria',
+ 'aut': 'Austria',
+ 'autriche': 'Austria',
+ 'aw': 'Aruba',
+ 'ax': 'Åland Islands',
+ 'az': 'Azerbaijan',
+ 'aze': 'Azerbaijan',
+ 'azerbaijan': 'Azerbaijan',
+ 'ba': 'Bosnia and Herzegovina',
+ 'bahamas': 'Bahamas',
+ 'bahrain': 'Bahrain',
+ 'bangladesh': 'Bangladesh',
+ 'barbados': 'Barbados',
+ 'bb': 'Barbados',
+ 'bd': 'Bangladesh',
+ 'bdi': 'Burundi',
+ 'be': 'Belgium',
+ 'bel': 'Belgium',
+ 'belarus': 'Belarus',
+ 'belgium': 'Belgium',
+ 'belize': 'Belize',
+ 'ben': 'Benin',
+ 'benin': 'Benin',
+ 'bermuda': 'Bermuda',
+ 'bes': 'Bonaire, Sint Eustatius and Saba',
+ 'bf': 'Burkina Faso',
+ 'bfa': 'Burkina Faso',
+ 'bg': 'Bulgaria',
+ 'bgd': 'Bangladesh',
+ 'bgr': 'Bulgaria',
+ 'bh': 'Bahrain',
+ 'bhr': 'Bahrain',
+ 'bhs': 'Bahamas',
+ 'bhutan': 'Bhutan',
+ 'bi': 'Burundi',
+ 'bih': 'Bosnia and Herzegovina',
+ 'bj': 'Benin',
+ 'bl': 'Saint Barthélemy',
+ 'blm': 'Saint Barthélemy',
+ 'blr': 'Belarus',
+ 'blz': 'Belize',
+ 'bm': 'Bermuda',
+ 'bmu': 'Bermuda',
+ 'bn': 'Brunei Darussalam',
+ 'bo': 'Bolivia, Plurinational State of',
+ 'bol': 'Bolivia, Plurinational State of',
+ 'bolivarian republic of venezuela': 'Venezuela, Bolivarian Republic of',
+ 'bolivia': 'Bolivia, Plurinational State of',
+ 'bolivia, plurinational state of': 'Bolivia, Plurinational State of',
+ 'bonaire, sint eustatius and saba': 'Bonaire, Sint Eustatius and Saba',
+ 'bosnia and herzegovina': 'Bosnia and Herzegovina',
+ 'botswana': 'Botswana',
+ 'bouvet island': 'Bouvet Island',
+ 'bq': 'Bonaire, Sint Eustatius and Saba',
+ 'br': 'Brazil',
+ 'bra': 'Brazil',
+ 'brazil': 'Brazil',
+ 'brb': 'Barbados',
+ 'britain': 'United Kingdom',
+ 'british indian ocean territory': 'British Indian Ocean Territory',
+ 'british virgin islands': 'Virgin Islands, British',
+ 'brn': 'Brunei Darussalam',
+ 'brunei darussalam': 'Brunei Darussalam',
+ 'bs': 'Bahamas',
+ 'bt': 'Bhutan',
+ 'btn': 'Bhutan',
+ 'bulgaria': 'Bulgaria',
+ 'burkina faso': 'Burkina Faso',
+ 'burundi': 'Burundi',
+ 'bv': 'Bouvet Island',
+ 'bvt': 'Bouvet Island',
+ 'bw': 'Botswana',
+ 'bwa': 'Botswana',
+ 'by': 'Belarus',
+ 'bz': 'Belize',
+ 'ca': 'Canada',
+ 'cabo verde': 'Cabo Verde',
+ 'caf': 'Central African Republic',
+ 'cambodia': 'Cambodia',
+ 'cameroon': 'Cameroon',
+ 'can': 'Canada',
+ 'canada': 'Canada',
+ 'cape verde': 'Cabo Verde',
+ 'cayman islands': 'Cayman Islands',
+ 'cc': 'Cocos (Keeling) Islands',
+ 'cck': 'Cocos (Keeling) Islands',
+ 'cd': 'Congo, The Democratic Republic of the',
+ 'central african republic': 'Central African Republic',
+ 'cf': 'Central African Republic',
+ 'cg': 'Congo',
+ 'ch': 'Switzerland',
+ 'chad': 'Chad',
+ 'che': 'Switzerland',
+ 'chile': 'Chile',
+ 'china': 'China',
+ 'chl': 'Chile',
+ 'chn': 'China',
+ 'christmas island': 'Christmas Island',
+ 'ci': "Côte d'Ivoire",
+ 'civ': "Côte d'Ivoire",
+ 'ck': 'Cook Islands',
+ 'cl': 'Chile',
+ 'cm': 'Cameroon',
+ 'cmr': 'Cameroon',
+ 'cn': 'China',
+ 'co': 'Colombia',
+ 'cocos (keeling) islands': 'Cocos (Keeling) Islands',
+ 'cod': 'Congo, The Democratic Republic of the',
+ 'cog': 'Congo',
+ 'cok': 'Cook Islands',
+ 'col': 'Colombia',
+ 'colombia': 'Colombia',
+ 'com': 'Comoros',
+ 'commonwealth of dominica': 'Dominica',
+ 'commonwealth of the bahamas': 'Bahamas',
+ 'commonwealth of the northern mariana islands': 'Northern Mariana Islands',
+ 'comoros': 'Comoros',
+ 'congo': 'Congo',
+ 'congo, the democratic republic of the': 'Congo, The Democratic Republic of the',
+ 'cook islands': 'Cook Islands',
+ 'costa rica': 'Costa Rica',
+ "cote d'ivoire": "Côte d'Ivoire",
+ 'cpv': 'Cabo Verde',
+ 'cr': 'Costa Rica',
+ 'cri': 'Costa Rica',
+ 'croatia': 'Croatia',
+ 'cu': 'Cuba',
+ 'cub': 'Cuba',
+ 'cuba': 'Cuba',
+ 'curacao': 'Curaçao',
+ 'cuw': 'Curaçao',
+ 'cv': 'Cabo Verde',
+ 'cw': 'Curaçao',
+ 'cx': 'Christmas Island',
+ 'cxr': 'Christmas Island',
+ 'cy': 'Cyprus',
+ 'cym': 'Cayman Islands',
+ 'cyp': 'Cyprus',
+ 'cyprus': 'Cyprus',
+ 'cz': 'Czechia',
+ 'cze': 'Czechia',
+ 'czech republic': 'Czechia',
+ 'czechia': 'Czechia',
+ 'de': 'Germany',
+ "democratic people's republic of korea": "Korea, Democratic People's Republic of",
+ 'democratic republic of sao tome and principe': 'Sao Tome and Principe',
+ 'democratic republic of timor-leste': 'Timor-Leste',
+ 'democratic socialist republic of sri lanka': 'Sri Lanka',
+ 'denmark': 'Denmark',
+ 'deu': 'Germany',
+ 'deutschland': 'Germany',
+ 'dj': 'Djibouti',
+ 'dji': 'Djibouti',
+ 'djibouti': 'Djibouti',
+ 'dk': 'Denmark',
+ 'dm': 'Dominica',
+ 'dma': 'Dominica',
+ 'dnk': 'Denmark',
+ 'do': 'Dominican Republic',
+ 'dom': 'Dominican Republic',
+ 'dominica': 'Dominica',
+ 'dominican republic': 'Dominican Republic',
+ 'dr congo': 'Congo, The Democratic Republic of the',
+ 'drc': 'Congo, The Democratic Republic of the',
+ 'dz': 'Algeria',
+ 'dza': 'Algeria',
+ 'eastern republic of uruguay': 'Uruguay',
+ 'ec': 'Ecuador',
+ 'ecu': 'Ecuador',
+ 'ecuador': 'Ecuador',
+ 'ee': 'Estonia',
+ 'eg': 'Egypt',
+ 'egy': 'Egypt',
+ 'egypt': 'Egypt',
+ 'eh': 'Western Sahara',
+ 'el salvador': 'El Salvador',
+ 'england': 'United Kingdom',
+ 'equatorial guinea': 'Equatorial Guinea',
+ 'er': 'Eritrea',
+ 'eri': 'Eritrea',
+ 'eritrea': 'Eritrea',
+ 'es': 'Spain',
+ 'esh': 'Western Sahara',
+ 'esp': 'Spain',
+ 'espagne': 'Spain',
+ 'espana': 'Spain',
+ 'est': 'Estonia',
+ 'estados unidos': 'United States',
+ 'estonia': 'Estonia',
+ 'eswatini': 'Eswatini',
+ 'et': 'Ethiopia',
+ 'eth': 'Ethiopia',
+ 'ethiopia': 'Ethiopia',
+ 'falkland islands (malvinas)': 'Falkland Islands (Malvinas)',
+ 'faroe islands': 'Faroe Islands',
+ 'federal democratic republic of ethiopia': 'Ethiopia',
+ 'federal democratic republic of nepal': 'Nepal',
+ 'federal republic of germany': 'Germany',
+ 'federal republic of nigeria': 'Nigeria',
+ 'federal republic of somalia': 'Somalia',
+ 'federated states of micronesia': 'Micronesia, Federated States of',
+ 'federative republic of brazil': 'Brazil',
+ 'fi': 'Finland',
+ 'fiji': 'Fiji',
+ 'fin': 'Finland',
+ 'finland': 'Finland',
+ 'fj': 'Fiji',
+ 'fji': 'Fiji',
+ 'fk': 'Falkland Islands (Malvinas)',
+ 'flk': 'Falkland Islands (Malvinas)',
+ 'fm': 'Micronesia, Federated States of',
+ 'fo': 'Faroe Islands',
+ 'fr': 'France',
+ 'fra': 'France',
+ 'france': 'France',
+ 'francia': 'France',
+ 'frankreich': 'France',
+ 'french guiana': 'French Guiana',
+ 'french polynesia': 'French Polynesia',
+ 'french republic': 'France',
+ 'french southern territories': 'French Southern Territories',
+ 'fro': 'Faroe Islands',
+ 'fsm': 'Micronesia, Federated States of',
+ 'ga': 'Gabon',
+ 'gab': 'Gabon',
+ 'gabon': 'Gabon',
+ 'gabonese republic': 'Gabon',
+ 'gambia': 'Gambia',
+ 'gb': 'United Kingdom',
+ 'gbr': 'United Kingdom',
+ 'gd': 'Grenada',
+ 'ge': 'Georgia',
+ 'geo': 'Georgia',
+ 'georgia': 'Georgia',
+ 'germania': 'Germany',
+ 'germany': 'Germany',
+ 'gf': 'French Guiana',
+ 'gg': 'Guernsey',
+ 'ggy': 'Guernsey',
+ 'gh': 'Ghana',
+ 'gha': 'Ghana',
+ 'ghana': 'Ghana',
+ 'gi': 'Gibraltar',
+ 'gib': 'Gibraltar',
+ 'gibraltar': 'Gibraltar',
+ 'gin': 'Guinea',
+ 'gl': 'Greenland',
+ 'glp': 'Guadeloupe',
+ 'gm': 'Gambia',
+ 'gmb': 'Gambia',
+ 'gn': 'Guinea',
+ 'gnb': 'Guinea-Bissau',
+ 'gnq': 'Equatorial Guinea',
+ 'gp': 'Guadeloupe',
+ 'gq': 'Equatorial Guinea',
+ 'gr': 'Greece',
+ 'grand duchy of luxembourg': 'Luxembourg',
+ 'grc': 'Greece',
+ 'grd': 'Grenada',
+ 'great britain': 'United Kingdom',
+ 'greece': 'Greece',
+ 'greenland': 'Greenland',
+ 'grenada': 'Grenada',
+ 'grl': 'Greenland',
+ 'gs': 'South Georgia and the South Sandwich Islands',
+ 'gt': 'Guatemala',
+ 'gtm': 'Guatemala',
+ 'gu': 'Guam',
+ 'guadeloupe': 'Guadeloupe',
+ 'guam': 'Guam',
+ 'guatemala': 'Guatemala',
+ 'guernsey': 'Guernsey',
+ 'guf': 'French Guiana',
+ 'guinea': 'Guinea',
+ 'guinea-bissau': 'Guinea-Bissau',
+ 'gum': 'Guam',
+ 'guy': 'Guyana',
+ 'guyana': 'Guyana',
+ 'gw': 'Guinea-Bissau',
+ 'gy': 'Guyana',
+ 'haiti': 'Haiti',
+ 'hashemite kingdom of jordan': 'Jordan',
+ 'heard island and mcdonald islands': 'Heard Island and McDonald Islands',
+ 'hellas': 'Greece',
+ 'hellenic republic': 'Greece',
+ 'hk': 'Hong Kong',
+ 'hkg': 'Hong Kong',
+ 'hm': 'Heard Island and McDonald Islands',
+ 'hmd': 'Heard Island and McDonald Islands',
+ 'hn': 'Honduras',
+ 'hnd': 'Honduras',
+ 'holland': 'Netherlands',
+ 'holy see (vatican city state)': 'Holy See (Vatican City State)',
+ 'honduras': 'Honduras',
+ 'hong kong': 'Hong Kong',
+ 'hong kong special administrative region of china': 'Hong Kong',
+ 'hr': 'Croatia',
+ 'hrv': 'Croatia',
+ 'hrvatska': 'Croatia',
+ 'ht': 'Haiti',
+ 'hti': 'Haiti',
+ 'hu': 'Hungary',
+ 'hun': 'Hungary',
+ 'hungary': 'Hungary',
+ 'iceland': 'Iceland',
+ 'id': 'Indonesia',
+ 'idn': 'Indonesia',
+ 'ie': 'Ireland',
+ 'il': 'Israel',
+ 'im': 'Isle of Man',
+ 'imn': 'Isle of Man',
+ 'in': 'India',
+ 'ind': 'India',
+ 'independent state of papua new guinea': 'Papua New Guinea',
+ 'independent state of samoa': 'Samoa',
+ 'india': 'India',
+ 'indonesia': 'Indonesia',
+ 'io': 'British Indian Ocean Territory',
+ 'iot': 'British Indian Ocean Territory',
+ 'iq': 'Iraq',
+ 'ir': 'Iran, Islamic Republic of',
+ 'iran': 'Iran, Islamic Republic of',
+ 'iran, islamic republic of': 'Iran, Islamic Republic of',
+ 'iraq': 'Iraq',
+ 'ireland': 'Ireland',
+ 'irl': 'Ireland',
+ 'irn': 'Iran, Islamic Republic of',
+ 'irq': 'Iraq',
+ 'is': 'Iceland',
+ 'isl': 'Iceland',
+ 'islamic republic of afghanistan': 'Afghanistan',
+ 'islamic republic of iran': 'Iran, Islamic Republic of',
+ 'islamic republic of mauritania': 'Mauritania',
+ 'islamic republic of pakistan': 'Pakistan',
+ 'isle of man': 'Isle of Man',
+ 'isr': 'Israel',
+ 'israel': 'Israel',
+ 'it': 'Italy',
+ 'ita': 'Italy',
+ 'italia': 'Italy',
+ 'italian republic': 'Italy',
+ 'italie': 'Italy',
+ 'italien': 'Italy',
+ 'italy': 'Italy',
+ 'ivory coast': "Côte d'Ivoire",
+ 'jam': 'Jamaica',
+ 'jamaica': 'Jamaica',
+ 'japan': 'Japan',
+ 'je': 'Jersey',
+ 'jersey': 'Jersey',
+ 'jey': 'Jersey',
+ 'jm': 'Jamaica',
+ 'jo': 'Jordan',
+ 'jor': 'Jordan',
+ 'jordan': 'Jordan',
+ 'jp': 'Japan',
+ 'jpn': 'Japan',
+ 'kaz': 'Kazakhstan',
+ 'kazakhstan': 'Kazakhstan',
+ 'ke': 'Kenya',
+ 'ken': 'Kenya',
+ 'kenya': 'Kenya',
+ 'kg': 'Kyrgyzstan',
+ 'kgz': 'Kyrgyzstan',
+ 'kh': 'Cambodia',
+ 'khm': 'Cambodia',
+ 'ki': 'Kiribati',
+ 'kingdom of bahrain': 'Bahrain',
+ 'kingdom of belgium': 'Belgium',
+ 'kingdom of bhutan': 'Bhutan',
+ 'kingdom of cambodia': 'Cambodia',
+ 'kingdom of denmark': 'Denmark',
+ 'kingdom of eswatini': 'Eswatini',
+ 'kingdom of lesotho': 'Lesotho',
+ 'kingdom of morocco': 'Morocco',
+ 'kingdom of norway': 'Norway',
+ 'kingdom of saudi arabia': 'Saudi Arabia',
+ 'kingdom of spain': 'Spain',
+ 'kingdom of sweden': 'Sweden',
+ 'kingdom of thailand': 'Thailand',
+ 'kingdom of the netherlands': 'Netherlands',
+ 'kingdom of tonga': 'Tonga',
+ 'kir': 'Kiribati',
+ 'kiribati': 'Kiribati',
+ 'km': 'Comoros',
+ 'kn': 'Saint Kitts and Nevis',
+ 'kna': 'Saint Kitts and Nevis',
+ 'kor': 'Korea, Republic of',
+ "korea, democratic people's republic of": "Korea, Democratic People's Republic of",
+ 'korea, republic of': 'Korea, Republic of',
+ 'kp': "Korea, Democratic People's Republic of",
+ 'kr': 'Korea, Republic of',
+ 'kuwait': 'Kuwait',
+ 'kw': 'Kuwait',
+ 'kwt': 'Kuwait',
+ 'ky': 'Cayman Islands',
+ 'kyrgyz republic': 'Kyrgyzstan',
+ 'kyrgyzstan': 'Kyrgyzstan',
+ 'kz': 'Kazakhstan',
+ 'la': "Lao People's Democratic Republic",
+ 'lao': "Lao People's Democratic Republic",
+ "lao people's democratic republic": "Lao People's Democratic Republic",
+ 'laos': "Lao People's Democratic Republic",
+ 'latvia': 'Latvia',
+ 'lb': 'Lebanon',
+ 'lbn': 'Lebanon',
+ 'lbr': 'Liberia',
+ 'lby': 'Libya',
+ 'lc': 'Saint Lucia',
+ 'lca': 'Saint Lucia',
+ 'lebanese republic': 'Lebanon',
+ 'lebanon': 'Lebanon',
+ 'lesotho': 'Lesotho',
+ 'li': 'Liechtenstein',
+ 'liberia': 'Liberia',
+ 'libya': 'Libya',
+ 'lie': 'Liechtenstein',
+ 'liechtenstein': 'Liechtenstein',
+ 'lithuania': 'Lithuania',
+ 'lk': 'Sri Lanka',
+ 'lka': 'Sri Lanka',
+ 'lr': 'Liberia',
+ 'ls': 'Lesotho',
+ 'lso': 'Lesotho',
+ 'lt': 'Lithuania',
+ 'ltu': 'Lithuania',
+ 'lu': 'Luxembourg',
+ 'lux': 'Luxembourg',
+ 'luxembourg': 'Luxembourg',
+ 'lv': 'Latvia',
+ 'lva': 'Latvia',
+ 'ly': 'Libya',
+ 'ma': 'Morocco',
+ 'mac': 'Macao',
+ 'macao': 'Macao',
+ 'macao special administrative region of china': 'Macao',
+ 'macedonia': 'North Macedonia',
+ 'madagascar': 'Madagascar',
+ 'maf': 'Saint Martin (French part)',
+ 'magyarorszag': 'Hungary',
+ 'malawi': 'Malawi',
+ 'malaysia': 'Malaysia',
+ 'maldives': 'Maldives',
+ 'mali': 'Mali',
+ 'malta': 'Malta',
+ 'mar': 'Morocco',
+ 'marshall islands': 'Marshall Islands',
+ 'martinique': 'Martinique',
+ 'mauritania': 'Mauritania',
+ 'mauritius': 'Mauritius',
+ 'mayotte': 'Mayotte',
+ 'mc': 'Monaco',
+ 'mco': 'Monaco',
+ 'md': 'Moldova, Republic of',
+ 'mda': 'Moldova, Republic of',
+ 'mdg': 'Madagascar',
+ 'mdv': 'Maldives',
+ 'me': 'Montenegro',
+ 'mex': 'Mexico',
+ 'mexico': 'Mexico',
+ 'mf': 'Saint Martin (French part)',
+ 'mg': 'Madagascar',
+ 'mh': 'Marshall Islands',
+ 'mhl': 'Marshall Islands',
+ 'micronesia, federated states of': 'Micronesia, Federated States of',
+ 'mk': 'North Macedonia',
+ 'mkd': 'North Macedonia',
+ 'ml': 'Mali',
+ 'mli': 'Mali',
+ 'mlt': 'Malta',
+ 'mm': 'Myanmar',
+ 'mmr': 'Myanmar',
+ 'mn': 'Mongolia',
+ 'mne': 'Montenegro',
+ 'mng': 'Mongolia',
+ 'mnp': 'Northern Mariana Islands',
+ 'mo': 'Macao',
+ 'moldova': 'Moldova, Republic of',
+ 'moldova, republic of': 'Moldova, Republic of',
+ 'monaco': 'Monaco',
+ 'mongolia': 'Mongolia',
+ 'montenegro': 'Montenegro',
+ 'montserrat': 'Montserrat',
+ 'morocco': 'Morocco',
+ 'moz': 'Mozambique',
+ 'mozambique': 'Mozambique',
+ 'mp': 'Northern Mariana Islands',
+ 'mq': 'Martinique',
+ 'mr': 'Mauritania',
+ 'mrt': 'Mauritania',
+ 'ms': 'Montserrat',
+ 'msr': 'Montserrat',
+ 'mt': 'Malta',
+ 'mtq': 'Martinique',
+ 'mu': 'Mauritius',
+ 'mus': 'Mauritius',
+ 'mv': 'Maldives',
+ 'mw': 'Malawi',
+ 'mwi': 'Malawi',
+ 'mx': 'Mexico',
+ 'my': 'Malaysia',
+ 'myanmar': 'Myanmar',
+ 'mys': 'Malaysia',
+ 'myt': 'Mayotte',
+ 'mz': 'Mozambique',
+ 'na': 'Namibia',
+ 'nam': 'Namibia',
+ 'namibia': 'Namibia',
+ 'nauru': 'Nauru',
+ 'nc': 'New Caledonia',
+ 'ncl': 'New Caledonia',
+ 'ne': 'Niger',
+ 'nederland': 'Netherlands',
+ 'nepal': 'Nepal',
+ 'ner': 'Niger',
+ 'netherlands': 'Netherlands',
+ 'new caledonia': 'New Caledonia',
+ 'new zealand': 'New Zealand',
+ 'nf': 'Norfolk Island',
+ 'nfk': 'Norfolk Island',
+ 'ng': 'Nigeria',
+ 'nga': 'Nigeria',
+ 'ni': 'Nicaragua',
+ 'nic': 'Nicaragua',
+ 'nicaragua': 'Nicaragua',
+ 'niger': 'Niger',
+ 'nigeria': 'Nigeria',
+ 'niu': 'Niue',
+ 'niue': 'Niue',
+ 'nl': 'Netherlands',
+ 'nld': 'Netherlands',
+ 'no': 'Norway',
+ 'nor': 'Norway',
+ 'norfolk island': 'Norfolk Island',
+ 'north korea': "Korea, Democratic People's Republic of",
+ 'north macedonia': 'North Macedonia',
+ 'northern ireland': 'United Kingdom',
+ 'northern mariana islands': 'Northern Mariana Islands',
+ 'norway': 'Norway',
+ 'np': 'Nepal',
+ 'npl': 'Nepal',
+ 'nr': 'Nauru',
+ 'nru': 'Nauru',
+ 'nu': 'Niue',
+ 'nz': 'New Zealand',
+ 'nzl': 'New Zealand',
+ 'om': 'Oman',
+ 'oman': 'Oman',
+ 'omn': 'Oman',
+ 'osterreich': 'Austria',
+ 'pa': 'Panama',
+ 'pak': 'Pakistan',
+ 'pakistan': 'Pakistan',
+ 'palau': 'Palau',
+ 'palestine, state of': 'Palestine, State of',
+ 'pan': 'Panama',
+ 'panama': 'Panama',
+ 'papua new guinea': 'Papua New Guinea',
+ 'paraguay': 'Paraguay',
+ 'pcn': 'Pitcairn',
+ 'pe': 'Peru',
+ "people's democratic republic of algeria": 'Algeria',
+ "people's republic of bangladesh": 'Bangladesh',
+ "people's republic of china": 'China',
+ 'per': 'Peru',
+ 'peru': 'Peru',
+ 'pf': 'French Polynesia',
+ 'pg': 'Papua New Guinea',
+ 'ph': 'Philippines',
+ 'philippines': 'Philippines',
+ 'phl': 'Philippines',
+ 'pitcairn': 'Pitcairn',
+ 'pk': 'Pakistan',
+ 'pl': 'Poland',
+ 'plurinational state of bolivia': 'Bolivia, Plurinational State of',
+ 'plw': 'Palau',
+ 'pm': 'Saint Pierre and Miquelon',
+ 'pn': 'Pitcairn',
+ 'png': 'Papua New Guinea',
+ 'pol': 'Poland',
+ 'poland': 'Poland',
+ 'portugal': 'Portugal',
+ 'portuguese republic': 'Portugal',
+ 'pr': 'Puerto Rico',
+ 'pri': 'Puerto Rico',
+ 'principality of andorra': 'Andorra',
+ 'principality of liechtenstein': 'Liechtenstein',
+ 'principality of monaco': 'Monaco',
+ 'prk': "Korea, Democratic People's Republic of",
+ 'prt': 'Portugal',
+ 'pry': 'Paraguay',
+ 'ps': 'Palestine, State of',
+ 'pse': 'Palestine, State of',
+ 'pt': 'Portugal',
+ 'puerto rico': 'Puerto Rico',
+ 'pw': 'Palau',
+ 'py': 'Paraguay',
+ 'pyf': 'French Polynesia',
+ 'qa': 'Qatar',
+ 'qat': 'Qatar',
+ 'qatar': 'Qatar',
+ 're': 'Réunion',
+ 'republic of albania': 'Albania',
+ 'republic of angola': 'Angola',
+ 'republic of armenia': 'Armenia',
+ 'republic of austria': 'Austria',
+ 'republic of azerbaijan': 'Azerbaijan',
+ 'republic of belarus': 'Belarus',
+ 'republic of benin': 'Benin',
+ 'republic of bosnia and herzegovina': 'Bosnia and Herzegovina',
+ 'republic of botswana': 'Botswana',
+ 'republic of bulgaria': 'Bulgaria',
+ 'republic of burundi': 'Burundi',
+ 'republic of cabo verde': 'Cabo Verde',
+ 'republic of cameroon': 'Cameroon',
+ 'republic of chad': 'Chad',
+ 'republic of chile': 'Chile',
+ 'republic of colombia': 'Colombia',
+ 'republic of costa rica': 'Costa Rica',
+ "republic of cote d'ivoire": "Côte d'Ivoire",
+ 'republic of croatia': 'Croatia',
+ 'republic of cuba': 'Cuba',
+ 'republic of cyprus': 'Cyprus',
+ 'republic of djibouti': 'Djibouti',
+ 'republic of ecuador': 'Ecuador',
+ 'republic of el salvador': 'El Salvador',
+ 'republic of equatorial guinea': 'Equatorial Guinea',
+ 'republic of estonia': 'Estonia',
+ 'republic of fiji': 'Fiji',
+ 'republic of finland': 'Finland',
+ 'republic of ghana': 'Ghana',
+ 'republic of guatemala': 'Guatemala',
+ 'republic of guinea': 'Guinea',
+ 'republic of guinea-bissau': 'Guinea-Bissau',
+ 'republic of guyana': 'Guyana',
+ 'republic of haiti': 'Haiti',
+ 'republic of honduras': 'Honduras',
+ 'republic of iceland': 'Iceland',
+ 'republic of india': 'India',
+ 'republic of indonesia': 'Indonesia',
+ 'republic of iraq': 'Iraq',
+ 'republic of kazakhstan': 'Kazakhstan',
+ 'republic of kenya': 'Kenya',
+ 'republic of kiribati': 'Kiribati',
+ 'republic of latvia': 'Latvia',
+ 'republic of liberia': 'Liberia',
+ 'republic of lithuania': 'Lithuania',
+ 'republic of madagascar': 'Madagascar',
+ 'republic of malawi': 'Malawi',
+ 'republic of maldives': 'Maldives',
+ 'republic of mali': 'Mali',
+ 'republic of malta': 'Malta',
+ 'republic of mauritius': 'Mauritius',
+ 'republic of moldova': 'Moldova, Republic of',
+ 'republic of mozambique': 'Mozambique',
+ 'republic of myanmar': 'Myanmar',
+ 'republic of namibia': 'Namibia',
+ 'republic of nauru': 'Nauru',
+ 'republic of nicaragua': 'Nicaragua',
+ 'republic of north macedonia': 'North Macedonia',
+ 'republic of palau': 'Palau',
+ 'republic of panama': 'Panama',
+ 'republic of paraguay': 'Paraguay',
+ 'republic of peru': 'Peru',
+ 'republic of poland': 'Poland',
+ 'republic of san marino': 'San Marino',
+ 'republic of senegal': 'Senegal',
+ 'republic of serbia': 'Serbia',
+ 'republic of seychelles': 'Seychelles',
+ 'republic of sierra leone': 'Sierra Leone',
+ 'republic of singapore': 'Singapore',
+ 'republic of slovenia': 'Slovenia',
+ 'republic of south africa': 'South Africa',
+ 'republic of south sudan': 'South Sudan',
+ 'republic of suriname': 'Suriname',
+ 'republic of tajikistan': 'Tajikistan',
+ 'republic of the congo': 'Congo',
+ 'republic of the gambia': 'Gambia',
+ 'republic of the marshall islands': 'Marshall Islands',
+ 'republic of the niger': 'Niger',
+ 'republic of the philippines': 'Philippines',
+ 'republic of the sudan': 'Sudan',
+ 'republic of trinidad and tobago': 'Trinidad and Tobago',
+ 'republic of tunisia': 'Tunisia',
+ 'republic of turkiye': 'Türkiye',
+ 'republic of uganda': 'Uganda',
+ 'republic of uzbekistan': 'Uzbekistan',
+ 'republic of vanuatu': 'Vanuatu',
+ 'republic of yemen': 'Yemen',
+ 'republic of zambia': 'Zambia',
+ 'republic of zimbabwe': 'Zimbabwe',
+ 'reu': 'Réunion',
+ 'reunion': 'Réunion',
+ 'ro': 'Romania',
+ 'romania': 'Romania',
+ 'rou': 'Romania',
+ 'rs': 'Serbia',
+ 'ru': 'Russian Federation',
+ 'rus': 'Russian Federation',
+ 'russia': 'Russian Federation',
+ 'russian federation': 'Russian Federation',
+ 'rw': 'Rwanda',
+ 'rwa': 'Rwanda',
+ 'rwanda': 'Rwanda',
+ 'rwandese republic': 'Rwanda',
+ 'sa': 'Saudi Arabia',
+ 'saint barthelemy': 'Saint Barthélemy',
+ 'saint helena, ascension and tristan da cunha': 'Saint Helena, Ascension and Tristan da Cunha',
+ 'saint kitts and nevis': 'Saint Kitts and Nevis',
+ 'saint lucia': 'Saint Lucia',
+ 'saint martin (french part)': 'Saint Martin (French part)',
+ 'saint pierre and miquelon': 'Saint Pierre and Miquelon',
+ 'saint vincent and the grenadines': 'Saint Vincent and the Grenadines',
+ 'samoa': 'Samoa',
+ 'san marino': 'San Marino',
+ 'sao tome and principe': 'Sao Tome and Principe',
+ 'sau': 'Saudi Arabia',
+ 'saudi arabia': 'Saudi Arabia',
+ 'sb': 'Solomon Islands',
+ 'sc': 'Seychelles',
+ 'schweiz': 'Switzerland',
+ 'scotland': 'United Kingdom',
+ 'sd': 'Sudan',
+ 'sdn': 'Sudan',
+ 'se': 'Sweden',
+ 'sen': 'Senegal',
+ 'senegal': 'Senegal',
+ 'serbia': 'Serbia',
+ 'seychelles': 'Seychelles',
+ 'sg': 'Singapore',
+ 'sgp': 'Singapore',
+ 'sgs': 'South Georgia and the South Sandwich Islands',
+ 'sh': 'Saint Helena, Ascension and Tristan da Cunha',
+ 'shn': 'Saint Helena, Ascension and Tristan da Cunha',
+ 'si': 'Slovenia',
+ 'sierra leone': 'Sierra Leone',
+ 'singapore': 'Singapore',
+ 'sint maarten (dutch part)': 'Sint Maarten (Dutch part)',
+ 'sj': 'Svalbard and Jan Mayen',
+ 'sjm': 'Svalbard and Jan Mayen',
+ 'sk': 'Slovakia',
+ 'sl': 'Sierra Leone',
+ 'slb': 'Solomon Islands',
+ 'sle': 'Sierra Leone',
+ 'slovak republic': 'Slovakia',
+ 'slovakia': 'Slovakia',
+ 'slovenia': 'Slovenia',
+ 'slovenija': 'Slovenia',
+ 'slv': 'El Salvador',
+ 'sm': 'San Marino',
+ 'smr': 'San Marino',
+ 'sn': 'Senegal',
+ 'so': 'Somalia',
+ 'socialist republic of viet nam': 'Viet Nam',
+ 'solomon islands': 'Solomon Islands',
+ 'som': 'Somalia',
+ 'somalia': 'Somalia',
+ 'south africa': 'South Africa',
+ 'south georgia and the south sandwich islands': 'South Georgia and the South Sandwich Islands',
+ 'south korea': 'Korea, Republic of',
+ 'south sudan': 'South Sudan',
+ 'spagna': 'Spain',
+ 'spain': 'Spain',
+ 'spanien': 'Spain',
+ 'spm': 'Saint Pierre and Miquelon',
+ 'sr': 'Suriname',
+ 'srb': 'Serbia',
+ 'sri lanka': 'Sri Lanka',
+ 'ss': 'South Sudan',
+ 'ssd': 'South Sudan',
+ 'st': 'Sao Tome and Principe',
+ 'state of israel': 'Israel',
+ 'state of kuwait': 'Kuwait',
+ 'state of qatar': 'Qatar',
+ 'stp': 'Sao Tome and Principe',
+ 'sudan': 'Sudan',
+ 'suisse': 'Switzerland',
+ 'sultanate of oman': 'Oman',
+ 'sur': 'Suriname',
+ 'suriname': 'Suriname',
+ 'sv': 'El Salvador',
+ 'svalbard and jan mayen': 'Svalbard and Jan Mayen',
+ 'svizzera': 'Switzerland',
+ 'svk': 'Slovakia',
+ 'svn': 'Slovenia',
+ 'swaziland': 'Eswatini',
+ 'swe': 'Sweden',
+ 'sweden': 'Sweden',
+ 'swiss confederation': 'Switzerland',
+ 'switzerland': 'Switzerland',
+ 'swz': 'Eswatini',
+ 'sx': 'Sint Maarten (Dutch part)',
+ 'sxm': 'Sint Maarten (Dutch part)',
+ 'sy': 'Syrian Arab Republic',
+ 'syc': 'Seychelles',
+ 'syr': 'Syrian Arab Republic',
+ 'syria': 'Syrian Arab Republic',
+ 'syrian arab republic': 'Syrian Arab Republic',
+ 'sz': 'Eswatini',
+ 'taiwan': 'Taiwan, Province of China',
+ 'taiwan, province of china': 'Taiwan, Province of China',
+ 'tajikistan': 'Tajikistan',
+ 'tanzania': 'Tanzania, United Republic of',
+ 'tanzania, united republic of': 'Tanzania, United Republic of',
+ 'tc': 'Turks and Caicos Islands',
+ 'tca': 'Turks and Caicos Islands',
+ 'tcd': 'Chad',
+ 'td': 'Chad',
+ 'tf': 'French Southern Territories',
+ 'tg': 'Togo',
+ 'tgo': 'Togo',
+ 'th': 'Thailand',
+ 'tha': 'Thailand',
+ 'thailand': 'Thailand',
+ 'the netherlands': 'Netherlands',
+ 'the state of eritrea': 'Eritrea',
+ 'the state of palestine': 'Palestine, State of',
+ 'timor-leste': 'Timor-Leste',
+ 'tj': 'Tajikistan',
+ 'tjk': 'Tajikistan',
+ 'tk': 'Tokelau',
+ 'tkl': 'Tokelau',
+ 'tkm': 'Turkmenistan',
+ 'tl': 'Timor-Leste',
+ 'tls': 'Timor-Leste',
+ 'tm': 'Turkmenistan',
+ 'tn': 'Tunisia',
+ 'to': 'Tonga',
+ 'togo': 'Togo',
+ 'togolese republic': 'Togo',
+ 'tokelau': 'Tokelau',
+ 'ton': 'Tonga',
+ 'tonga': 'Tonga',
+ 'tr': 'Türkiye',
+ 'trinidad and tobago': 'Trinidad and Tobago',
+ 'tt': 'Trinidad and Tobago',
+ 'tto': 'Trinidad and Tobago',
+ 'tun': 'Tunisia',
+ 'tunisia': 'Tunisia',
+ 'tur': 'Türkiye',
+ 'turkey': 'Türkiye',
+ 'turkiye': 'Türkiye',
+ 'turkmenistan': 'Turkmenistan',
+ 'turks and caicos islands': 'Turks and Caicos Islands',
+ 'tuv': 'Tuvalu',
+ 'tuvalu': 'Tuvalu',
+ 'tv': 'Tuvalu',
+ 'tw': 'Taiwan, Province of China',
+ 'twn': 'Taiwan, Province of China',
+ 'tz': 'Tanzania, United Republic of',
+ 'tza': 'Tanzania, United Republic of',
+ 'u.k.': 'United Kingdom',
+ 'u.s.': 'United States',
+ 'u.s.a.': 'United States',
+ 'ua': 'Ukraine',
+ 'ug': 'Uganda',
+ 'uga': 'Uganda',
+ 'uganda': 'Uganda',
+ 'uk': 'United Kingdom',
+ 'ukr': 'Ukraine',
+ 'ukraine': 'Ukraine',
+ 'um': 'United States Minor Outlying Islands',
+ 'umi': 'United States Minor Outlying Islands',
+ 'union of the comoros': 'Comoros',
+ 'united arab emirates': 'United Arab Emirates',
+ 'united kingdom': 'United Kingdom',
+ 'united kingdom of great britain and northern ireland': 'United Kingdom',
+ 'united mexican states': 'Mexico',
+ 'united republic of tanzania': 'Tanzania, United Republic of',
+ 'united states': 'United States',
+ 'united states minor outlying islands': 'United States Minor Outlying Islands',
+ 'united states of america': 'United States',
+ 'uruguay': 'Uruguay',
+ 'ury': 'Uruguay',
+ 'us': 'United States',
+ 'usa': 'United States',
+ 'uy': 'Uruguay',
+ 'uz': 'Uzbekistan',
+ 'uzb': 'Uzbekistan',
+ 'uzbekistan': 'Uzbekistan',
+ 'va': 'Holy See (Vatican City State)',
+ 'vanuatu': 'Vanuatu',
+ 'vat': 'Holy See (Vatican City State)',
+ 'vatican': 'Holy See (Vatican City State)',
+ 'vatican city': 'Holy See (Vatican City State)',
+ 'vc': 'Saint Vincent and the Grenadines',
+ 'vct': 'Saint Vincent and the Grenadines',
+ 've': 'Venezuela, Bolivarian Republic of',
+ 'ven': 'Venezuela, Bolivarian Republic of',
+ 'venezuela': 'Venezuela, Bolivarian Republic of',
+ 'venezuela, bolivarian republic of': 'Venezuela, Bolivarian Republic of',
+ 'vg': 'Virgin Islands, British',
+ 'vgb': 'Virgin Islands, British',
+ 'vi': 'Virgin Islands, U.S.',
+ 'viet nam': 'Viet Nam',
+ 'vietnam': 'Viet Nam',
+ 'vir': 'Virgin Islands, U.S.',
+ 'virgin islands of the united states': 'Virgin Islands, U.S.',
+ 'virgin islands, british': 'Virgin Islands, British',
+ 'virgin islands, u.s.': 'Virgin Islands, U.S.',
+ 'vn': 'Viet Nam',
+ 'vnm': 'Viet Nam',
+ 'vu': 'Vanuatu',
+ 'vut': 'Vanuatu',
+ 'wales': 'United Kingdom',
+ 'wallis and futuna': 'Wallis and Futuna',
+ 'western sahara': 'Western Sahara',
+ 'wf': 'Wallis and Futuna',
+ 'wlf': 'Wallis and Futuna',
+ 'ws': 'Samoa',
+ 'wsm': 'Samoa',
+ 'ye': 'Yemen',
+ 'yem': 'Yemen',
+ 'yemen': 'Yemen',
+ 'yt': 'Mayotte',
+ 'za': 'South Africa',
+ 'zaf': 'South Africa',
+ 'zambia': 'Zambia',
+ 'zimbabwe': 'Zimbabwe',
+ 'zm': 'Zambia',
+ 'zmb': 'Zambia',
+ 'zw': 'Zimbabwe',
+ 'zwe': 'Zimbabwe'}
@@ -5,7 +5,7 @@ Represents a wine producer entry.
 Each producer belongs to a region.
 """
 
-from models import db
+from models import db, MAX_ID
 
 class Producer(db.Model):
     __tablename__ = "producers"
@@ -46,7 +46,7 @@ class Producer(db.Model):
             int: Validated region ID.
 
         Raises:
-            ValueError: If region_id is not a positive integer.
+            ValueError: If region_id is not an integer between 1 and MAX_ID.
         """
 
         try:
@@ -55,4 +55,6 @@ class Producer(db.Model):
             raise ValueError(f"Invalid region_id: {region_id}.  Must be integer.")
         if not 0 < region_id:
             raise ValueError(f"Invalid region_id: {region_id}. Must be greater than 0.") 
+        if region_id > MAX_ID:
+            raise ValueError(f"Invalid region_id: {region_id}. Must be at most {MAX_ID}.")
         return region_id
\ No newline at end of file
@@ -5,7 +5,7 @@ Represents a wine-producing region entry.
 Each region belongs to a country and is referenced by producers.
 """
 
-from models import db
+from models import db, MAX_ID
 
 class Region(db.Model):
     __tablename__ = "regions"
@@ -48,7 +48,7 @@ class Region(db.Model):
             int: Validated country ID.
 
         Raises:
-            ValueError: If country_id is not a positive integer.
+            ValueError: If country_id is not an integer between 1 and MAX_ID.
         """
 
         try:
@@ -57,4 +57,6 @@ class Region(db.Model):
             raise ValueError(f"Invalid country_id: '{country_id}'.  Must be integer.")
         if not 0 < converted:
             raise ValueError(f"Invalid country_id: '{country_id}'. Must be greater than 0.") 
+        if converted > MAX_ID:
+            raise ValueError(f"Invalid country_id: '{country_id}'. Must be at most {MAX_ID}.")
         return converted
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+Table version model.
+
+Holds a change counter per table.
+Bumped by every write path, read to build ETags for list endpoints.
+"""
+
+from models import db
+
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+    name = db.Column(db.String(50), primary_key=True)   #ex: "wines"
+    version = db.Column(db.Integer, default=0, nullable=False)
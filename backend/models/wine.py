@@ -5,22 +5,34 @@ Represents a wine entry.
 Each wine belongs to a producer.
 """
 
-from models import db
+from models import db, MAX_ID
 from datetime import datetime
 
 NV = 'nv'   #non-vintage
+MAX_QUANTITY = 1000 #bottles of one wine
+
+#rating enrichment states
+RATING_PENDING = "pending"      #queued for the rating worker
+RATING_COMPLETE = "complete"    #scraped, rating may still be None if not found
+RATING_FAILED = "failed"        #scrape request failed
 
 class Wine(db.Model):
     __tablename__ = "wines"
+    __table_args__ = (
+        db.Index("ix_wines_color_type", "color", "type"),   #ex: all sparkling whites
+        db.UniqueConstraint("name", "vintage", "producer_id", name="uq_wines_name_vintage_producer"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     quantity = db.Column(db.Integer, default=1, nullable=False)
     name = db.Column(db.String(255), nullable=False)
-    vintage = db.Column(db.String(10), default=NV, nullable=False)
+    vintage = db.Column(db.String(10), default=NV, nullable=False, index=True)
     varietal = db.Column(db.String(100))    #ex: "Chardonnay", "Bordeaux Blend"
     color = db.Column(db.String(50))    #ex: "Red", "White", "Rosé"
     type = db.Column(db.String(100))    #ex: "Still", "Sparkling", "Dessert", "Fortified"
-    producer_id = db.Column(db.Integer, db.ForeignKey("producers.id"), nullable=False)
-    rating = db.Column(db.Integer)  #scraped upon insert/update
+    producer_id = db.Column(db.Integer, db.ForeignKey("producers.id"), nullable=False, index=True)
+    rating = db.Column(db.Integer, index=True)  #scraped upon insert/update
+    rating_status = db.Column(db.String(10), index=True)    #None for imported ratings
+    rating_fetched_at = db.Column(db.DateTime, index=True)  #UTC time of the last scrape attempt
     producer = db.relationship("Producer", backref="wines") #link to Producer
 
     @staticmethod
@@ -34,16 +46,15 @@ class Wine(db.Model):
             int: Validated quantity.
 
         Raises:
-            ValueError: If quantity is not an integer between 0 and 1000.
+            ValueError: If quantity is not an integer between 0 and MAX_QUANTITY.
         """
 
         try:
             quantity = int(quantity)
         except (TypeError, ValueError):
             raise ValueError(f"Invalid quantity: {quantity}.  Must be integer.")
-        MAX = 1000
-        if not 0 <= quantity <= MAX:
-            raise ValueError(f"Invalid quantity: {quantity}. Out of range 0 - {MAX}.")
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise ValueError(f"Invalid quantity: {quantity}. Out of range 0 - {MAX_QUANTITY}.")
         return quantity
 
     def validate_color(color: str) -> str:
@@ -166,7 +177,7 @@ class Wine(db.Model):
             int: Validated producer ID.
 
         Raises:
-            ValueError: If producer_id is not a positive integer.
+            ValueError: If producer_id is not an integer between 1 and MAX_ID.
         """
 
         try:
@@ -175,4 +186,6 @@ class Wine(db.Model):
             raise ValueError(f"Invalid producer_id: {producer_id}.  Must be integer.")
         if not 0 < producer_id:
             raise ValueError(f"Invalid producer_id: {producer_id}. Must be greater than 0.") 
+        if producer_id > MAX_ID:
+            raise ValueError(f"Invalid producer_id: {producer_id}. Must be at most {MAX_ID}.")
         return producer_id
@@ -0,0 +1,17 @@
+"""
+Wine stat model.
+
+Holds running inventory totals per group of wines.
+Kept up to date by every write to the wines table, read by /stats.
+"""
+
+from models import db
+
+class WineStat(db.Model):
+    __tablename__ = "wine_stats"
+    dimension = db.Column(db.String(20), primary_key=True)  #ex: "country", "color"
+    key = db.Column(db.String(255), primary_key=True)   #id or value of the group, "" for none
+    wines = db.Column(db.Integer, default=0, nullable=False)
+    bottles = db.Column(db.Integer, default=0, nullable=False)
+    rated = db.Column(db.Integer, default=0, nullable=False)    #wines with a rating
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
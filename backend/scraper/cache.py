@@ -0,0 +1,95 @@
+"""
+Persistent rating cache.
+
+Stores scrape results in a SQLite file keyed by the normalized search URL,
+so lookups survive restarts and are shared by every worker process.
+"""
+
+import re
+import threading
+import time
+from utilities.sqlite import ThreadConnections
+
+MISSING = object()  #returned by get on a cache miss, None is a cached "not found"
+
+
+def cache_key(url: str) -> str:
+    """
+    Normalize a search URL so equivalent lookups share an entry.
+
+    Args:
+        url (str): URL from build_url.
+
+    Returns:
+        str: Lowercased URL with repeated separators collapsed.
+    """
+    return re.sub(r"\+{2,}", "+", url.strip().lower())
+
+
+class RatingCache:
+    """
+    TTL cache of ratings backed by a SQLite table.
+
+    Found ratings live for ttl seconds, "not found" results for negative_ttl.
+    Failed requests are never cached.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, negative_ttl: float = 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._connections = ThreadConnections(path, ["""CREATE TABLE IF NOT EXISTS rating_cache (
+            url TEXT PRIMARY KEY,
+            rating INTEGER,
+            expires_at REAL NOT NULL)"""])
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return self._connections.connect()
+
+    def get(self, url: str):
+        """
+        Look up a cached rating.
+
+        Args:
+            url (str): Search URL.
+
+        Returns:
+            int, None or MISSING: Cached rating, None if cached as not found,
+            MISSING if there is no fresh entry.
+        """
+        row = self._connect().execute(
+            "SELECT rating FROM rating_cache WHERE url = ? AND expires_at > ?",
+            (cache_key(url), time.time())).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+        return row[0]
+
+    def set(self, url: str, rating):
+        """
+        Store a scrape result.
+
+        Args:
+            url (str): Search URL.
+            rating (int or None): Rating, or None if the wine was not found.
+        """
+        ttl = self.negative_ttl if rating is None else self.ttl
+        self._connect().execute(
+            "INSERT OR REPLACE INTO rating_cache (url, rating, expires_at) VALUES (?, ?, ?)",
+            (cache_key(url), rating, time.time() + ttl))
+
+    def stats(self) -> dict:
+        """
+        Get hit/miss counters of this process and the number of fresh entries.
+
+        Returns:
+            dict: hits, misses and entries.
+        """
+        entries = self._connect().execute(
+            "SELECT COUNT(*) FROM rating_cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -0,0 +1,120 @@
+"""
+Pooled HTTP client for the scraper.
+
+Reuses keep-alive connections across lookups and retries transient
+failures with exponential backoff and jitter.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0"
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket per host.
+
+    Allows bursts of up to burst requests, then rate requests per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  #host -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """
+        Block until a request to host is allowed.
+
+        Args:
+            host (str): Host name the request goes to.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpClient:
+    """
+    requests.Session wrapper with a bounded connection pool and retries.
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried up
+    to retries times. Before retry n (0-based) it sleeps a random time in
+    [delay / 2, delay] where delay = min(backoff_max, backoff * 2 ** n).
+    Every attempt waits for the optional per-host rate limiter first.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05, read_timeout: float = 10,
+            retries: int = 3, backoff: float = 0.5, backoff_max: float = 8.0, rate_limiter: RateLimiter = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Get the sleep before a retry.
+
+        Args:
+            attempt (int): 0-based number of the retry.
+
+        Returns:
+            float: Seconds to sleep.
+        """
+        delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def get(self, url: str) -> requests.Response:
+        """
+        GET a URL, retrying transient failures.
+
+        Args:
+            url (str): URL to fetch.
+
+        Returns:
+            Response: Successful response.
+
+        Raises:
+            requests.RequestException: If the request still fails after all retries.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(host)
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    response.raise_for_status()
+                    return response
+                response.close()    #release the connection back to the pool
+            time.sleep(self.backoff_delay(attempt))
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
@@ -0,0 +1,187 @@
+"""
+Bulk rating refresh.
+
+Re-scrapes ratings for many wines at once, fanning lookups out over a
+bounded thread pool and writing results back with batched UPDATEs.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, or_
+from models import db
+from models.wine import Wine, RATING_COMPLETE, RATING_FAILED, RATING_PENDING
+from models.producer import Producer
+from scraper.scraper import lookup_rating, ScrapeError
+import utilities.versions as versions
+import utilities.stats as stats
+
+TARGETS = ("missing", "stale", "all")
+PAGE_SIZE = 500     #wines read, scraped and written per round
+DEFAULT_LIMIT = 50  #wines refreshed per POST /ratings/refresh
+MAX_LIMIT = 200     #keeps a request within a proxy timeout at the scraper rate limit
+
+_wines = Wine.__table__
+_SET_RATING = (_wines.update()
+    .where(_wines.c.id == bindparam("wine_id"))
+    .values(rating=bindparam("rating"), rating_status=bindparam("rating_status"),
+        rating_fetched_at=bindparam("fetched_at")))
+_SET_STATUS = (_wines.update()
+    .where(_wines.c.id == bindparam("wine_id"))
+    .values(rating_status=bindparam("rating_status"), rating_fetched_at=bindparam("fetched_at")))
+
+
+def candidates(target: str = "missing", max_age: timedelta = timedelta(days=30)):
+    """
+    Build the query of wines to refresh.
+
+    Args:
+        target (str): "missing" for wines without a rating, "stale" for wines
+            without a rating or last scraped more than max_age ago, "all" for
+            every wine. Wines queued for the rating worker are left to it.
+        max_age (timedelta): Age after which a scraped rating is stale.
+
+    Returns:
+        Query: (id, name, vintage, producer) rows.
+
+    Raises:
+        ValueError: If target is unknown.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Invalid target: {target}")
+    query = (db.session.query(Wine.id, Wine.name, Wine.vintage, Producer.name.label("producer"))
+        .join(Producer, Wine.producer_id == Producer.id)
+        .filter(or_(Wine.rating_status.is_(None), Wine.rating_status != RATING_PENDING)))
+    if target == "missing":
+        query = query.filter(Wine.rating.is_(None))
+    elif target == "stale":
+        query = query.filter(or_(Wine.rating.is_(None), Wine.rating_fetched_at.is_(None),
+            Wine.rating_fetched_at < datetime.utcnow() - max_age))
+    return query
+
+
+def validate_limit(limit) -> int:
+    """
+    Validate the number of wines one request refreshes.
+
+    Args:
+        limit: Input value to validate, or None for the default.
+
+    Returns:
+        int: Validated limit.
+
+    Raises:
+        ValueError: If limit is not an integer between 1 and MAX_LIMIT.
+    """
+    if limit is None or limit == "":
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {limit}.  Must be integer.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"Invalid limit: {limit}. Out of range 1 - {MAX_LIMIT}.")
+    return limit
+
+
+def _lookup(wine):
+    """Scrape one wine on a pool thread, returning (id, rating, status)."""
+    try:
+        return wine.id, lookup_rating(wine.name, wine.vintage, wine.producer), RATING_COMPLETE
+    except ScrapeError:
+        return wine.id, None, RATING_FAILED
+
+
+def scrape(pool: ThreadPoolExecutor, wines: list) -> list:
+    """
+    Scrape wines concurrently.
+
+    Args:
+        pool (ThreadPoolExecutor): Pool to run lookups on.
+        wines (list): Rows from candidates.
+
+    Returns:
+        list[tuple]: (wine id, rating, status) tuples.
+    """
+    return list(pool.map(_lookup, wines))
+
+
+def write_results(results: list):
+    """
+    Store lookup results with one executemany UPDATE per kind of result.
+
+    Failed lookups keep their existing rating and are only marked failed.
+
+    Args:
+        results (list[tuple]): (wine id, rating, status) tuples.
+    """
+    now = datetime.utcnow()
+    rated = [{"wine_id": id, "rating": rating, "rating_status": status, "fetched_at": now}
+        for id, rating, status in results if status == RATING_COMPLETE]
+    failed = [{"wine_id": id, "rating_status": status, "fetched_at": now}
+        for id, rating, status in results if status == RATING_FAILED]
+    if rated:
+        before = stats.snapshot(r["wine_id"] for r in rated)
+        db.session.execute(_SET_RATING, rated)
+        stats.apply(list(before.values()), [{**before[r["wine_id"]], "rating": r["rating"]}
+            for r in rated if r["wine_id"] in before])
+    if failed:
+        db.session.execute(_SET_STATUS, failed)
+    if rated or failed:
+        versions.bump("wines")
+    db.session.commit()
+
+
+def tally(report: dict, results: list):
+    """
+    Add lookup results to processed, rated, not_found and failed counts.
+
+    Args:
+        report (dict): Counts to update.
+        results (list[tuple]): (wine id, rating, status) tuples.
+    """
+    for id, rating, status in results:
+        if status == RATING_FAILED:
+            report["failed"] += 1
+        elif rating is None:
+            report["not_found"] += 1
+        else:
+            report["rated"] += 1
+    report["processed"] += len(results)
+
+
+def refresh_ratings(query, threads: int = 8, limit: int = None) -> dict:
+    """
+    Re-scrape ratings of the wines selected by a candidates query.
+
+    Wines are read in pages of PAGE_SIZE by id. Each page is scraped
+    concurrently and written back before the next page is read. The per-host
+    request rate is bounded by the scraper client's rate limiter.
+
+    Args:
+        query: Query from candidates.
+        threads (int): Concurrent lookups.
+        limit (int): Maximum number of wines to refresh, None for all.
+
+    Returns:
+        dict: processed, rated, not_found and failed counts, elapsed seconds
+        and wines per second.
+    """
+    report = {"processed": 0, "rated": 0, "not_found": 0, "failed": 0}
+    start = time.perf_counter()
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rating-refresh") as pool:
+        while limit is None or report["processed"] < limit:
+            size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - report["processed"])
+            page = query.filter(Wine.id > last_id).order_by(Wine.id).limit(size).all()
+            if not page:
+                break
+            last_id = page[-1].id
+
+            results = scrape(pool, page)
+            write_results(results)
+            tally(report, results)
+
+    report["elapsed"] = round(time.perf_counter() - start, 3)
+    report["per_second"] = round(report["processed"] / report["elapsed"], 1) if report["elapsed"] else 0
+    return report
@@ -0,0 +1,89 @@
+"""
+Rating refresh scheduler.
+
+Re-scrapes a fixed budget of the most overdue wines per tick, so scraping
+load stays flat instead of bursting after imports.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, case
+from models import db
+from models.wine import Wine, RATING_FAILED
+from scraper import refresh
+
+
+def due(max_age: timedelta, retry_failed_after: timedelta):
+    """
+    Build the query of wines due for a scrape, most urgent first.
+
+    Never scraped wines come first, newest first. Then the rest, high-quantity
+    wines first and the stalest ratings among equal quantities. Wines still
+    RATING_PENDING are left out by refresh.candidates, the rating worker
+    scrapes those, so the two never race on the same wine.
+
+    Args:
+        max_age (timedelta): Age after which a scraped rating is stale.
+        retry_failed_after (timedelta): Wait before retrying a failed scrape.
+
+    Returns:
+        Query: (id, name, vintage, producer) rows.
+    """
+    now = datetime.utcnow()
+    return (refresh.candidates("all")
+        .filter(or_(
+            Wine.rating_fetched_at.is_(None),
+            Wine.rating_fetched_at < now - max_age,
+            and_(Wine.rating_status == RATING_FAILED, Wine.rating_fetched_at < now - retry_failed_after)))
+        .order_by(Wine.rating_fetched_at.is_(None).desc(),
+            case((Wine.rating_fetched_at.is_(None), Wine.id)).desc(),   #newest first, NULL for the rest
+            Wine.quantity.desc(), Wine.rating_fetched_at.asc(), Wine.id.desc()))
+
+
+def tick(pool: ThreadPoolExecutor, budget: int, max_age: timedelta, retry_failed_after: timedelta) -> dict:
+    """
+    Scrape up to budget of the most overdue wines and store the results.
+
+    Args:
+        pool (ThreadPoolExecutor): Pool to run lookups on.
+        budget (int): Maximum lookups this tick.
+        max_age (timedelta): Age after which a scraped rating is stale.
+        retry_failed_after (timedelta): Wait before retrying a failed scrape.
+
+    Returns:
+        dict: processed, rated, not_found and failed counts.
+    """
+    report = {"processed": 0, "rated": 0, "not_found": 0, "failed": 0}
+    wines = due(max_age, retry_failed_after).limit(budget).all()
+    if wines:
+        results = refresh.scrape(pool, wines)
+        refresh.write_results(results)
+        refresh.tally(report, results)
+    db.session.remove()
+    return report
+
+
+def run(budget: int, interval: float, max_age: timedelta, retry_failed_after: timedelta,
+        threads: int = 4, ticks: int = None):
+    """
+    Run ticks every interval seconds until stopped.
+
+    Args:
+        budget (int): Maximum lookups per tick.
+        interval (float): Seconds from the start of one tick to the next.
+        max_age (timedelta): Age after which a scraped rating is stale.
+        retry_failed_after (timedelta): Wait before retrying a failed scrape.
+        threads (int): Concurrent lookups within a tick.
+        ticks (int): Number of ticks to run, None to run forever.
+    """
+    count = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rating-scheduler") as pool:
+        while ticks is None or count < ticks:
+            start = time.monotonic()
+            report = tick(pool, budget, max_age, retry_failed_after)
+            current_app.logger.info(f"Rating scheduler tick: {report}")
+            count += 1
+            if ticks is None or count < ticks:
+                time.sleep(max(0, interval - (time.monotonic() - start)))
@@ -5,8 +5,55 @@ Extracts rating score from Cellar Tracker
 Cellar Tracker's TOS do not prohibit scraping
 """
 
+import re
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from scraper.cache import MISSING
+from scraper.client import HttpClient
+
+_SCORE_STRAINER = SoupStrainer("span", class_="el scr")   #community score spans
+_SCORE_SPAN = re.compile(r"""<span\b[^>]*\bclass\s*=\s*["']?el scr["'\s>]""", re.IGNORECASE)
+
+_cache = None   #RatingCache set by configure_cache, None disables caching
+_client = HttpClient()  #shared pooled session, replaced by configure_client
+
+
+def configure_client(client: HttpClient):
+    """
+    Set the HTTP client used for lookups.
+
+    Args:
+        client (HttpClient): Client to use.
+    """
+    global _client
+    _client = client
+
+
+def configure_cache(cache):
+    """
+    Set the cache consulted by lookup_rating.
+
+    Args:
+        cache (RatingCache or None): Cache to use, None to disable caching.
+    """
+    global _cache
+    _cache = cache
+
+
+def cache_stats() -> dict:
+    """
+    Get rating cache counters.
+
+    Returns:
+        dict: enabled flag, plus hits, misses and entries when enabled.
+    """
+    if _cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **_cache.stats()}
+
+
+class ScrapeError(Exception):
+    """Raised when Cellar Tracker could not be reached or returned an error."""
 
 
 def scrape_rating(name: str, vintage: str, producer: str) -> str:
@@ -21,24 +68,88 @@ def scrape_rating(name: str, vintage: str, producer: str) -> str:
     Returns:
         int or None: Aggregate score (1-100) if found, else None.
     """
+    try:
+        return lookup_rating(name, vintage, producer)
+    except ScrapeError:
+        return None
+
+
+def lookup_rating(name: str, vintage: str, producer: str) -> str:
+    """
+    Fetch rating score from Cellar Tracker, reporting request failures.
+
+    Args:
+        name (str): Wine name.
+        vintage (str): Vintage year or 'nv'.
+        producer (str): Producer name.
+
+    Returns:
+        int or None: Aggregate score (1-100) if found, else None.
+
+    Raises:
+        ScrapeError: If the request failed, so the lookup can be retried.
+    """
     #generate search url from args
     try:
         url = build_url(name, vintage, producer)
     except ValueError:
         return None
 
-    #send HTTP get request
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0"
-    }
+    #serve repeat lookups from the cache, including "not found"
+    cache = _cache
+    if cache is not None:
+        rating = cache.get(url)
+        if rating is not MISSING:
+            return rating
+
+    rating = _fetch_rating(url)
+    if cache is not None:
+        cache.set(url, rating)
+    return rating
+
+
+def _fetch_rating(url: str):
+    """Request a search URL and parse the first score, raising ScrapeError on failure."""
+    #send HTTP get request over the pooled session, retrying transient errors
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException:
-        return None
+        response = _client.get(url)
+    except requests.RequestException as e:
+        raise ScrapeError(str(e))
     
     #parse response and locate first score
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_rating(response.text)
+
+
+def parse_rating(html: str, early_exit: bool = True):
+    """
+    Extract the first aggregate score from a Cellar Tracker results page.
+
+    Only score spans are parsed instead of building the whole page tree.
+    With early_exit the first score span is located with a regex and just
+    that fragment is parsed, falling back to scanning the whole page if the
+    span can't be located or holds no score.
+
+    Args:
+        html (str): Results page HTML.
+        early_exit (bool): Parse only the first score span when it can be located.
+
+    Returns:
+        int or None: Aggregate score (1-100) if found, else None.
+    """
+    match = _SCORE_SPAN.search(html) if early_exit else None
+    if match is not None:
+        end = html.find("</span>", match.end())
+        fragment = html[match.start():] if end == -1 else html[match.start():end + len("</span>")]
+        score = _parse_score(fragment)
+        if score is not None:
+            return score
+
+    return _parse_score(html)
+
+
+def _parse_score(html: str):
+    """Parse score spans of html with a strainer and read the first score."""
+    soup = BeautifulSoup(html, "html.parser", parse_only=_SCORE_STRAINER)
     el_scr = soup.find("span", class_="el scr")
     if el_scr:
         score_action = el_scr.find("a", class_="action")
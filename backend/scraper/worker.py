@@ -0,0 +1,160 @@
+"""
+Background rating worker.
+
+Fills in wine ratings outside the request path.
+Queued jobs are wines with a pending rating_status, so they survive restarts
+and can be processed in-process or by a separate `flask rating-worker` process.
+In thread mode, jobs left pending by a previous run are picked up again by
+resume(), which main.py calls once at startup, in the serving process.
+"""
+
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from models import db
+from models.wine import Wine, RATING_PENDING, RATING_COMPLETE, RATING_FAILED
+from models.producer import Producer
+from scraper.scraper import lookup_rating, ScrapeError
+import utilities.versions as versions
+import utilities.stats as stats
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enqueue(wine_id: int):
+    """
+    Queue a rating lookup for a committed wine.
+
+    RATING_WORKER config selects how the job runs:
+        "thread" (default): in-process worker pool.
+        "external": left pending for the `flask rating-worker` command.
+        "sync": immediately, on the calling thread.
+
+    Args:
+        wine_id (int): ID of a wine with a pending rating_status.
+    """
+    mode = current_app.config.get("RATING_WORKER", "thread")
+    if mode == "sync":
+        process(wine_id)
+    elif mode == "thread":
+        app = current_app._get_current_object()
+        _get_executor(app).submit(_run, app, wine_id)
+
+
+def resume() -> int:
+    """
+    Queue every pending job on the in-process pool, e.g. after a restart.
+
+    Does nothing unless RATING_WORKER is "thread"; the external worker
+    drains pending jobs itself. Needs an app context.
+
+    Returns:
+        int: Number of jobs queued.
+    """
+    if current_app.config.get("RATING_WORKER", "thread") != "thread":
+        return 0
+    app = current_app._get_current_object()
+    ids = pending_ids(None)
+    for id in ids:
+        _get_executor(app).submit(_run, app, id)
+    return len(ids)
+
+
+def _get_executor(app) -> ThreadPoolExecutor:
+    """Create the in-process worker pool on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("RATING_WORKER_THREADS", 4),
+                thread_name_prefix="rating-worker")
+        return _executor
+
+
+def _run(app, wine_id: int):
+    """Process one job on a pool thread with its own app context and session."""
+    with app.app_context():
+        try:
+            process(wine_id)
+        except Exception:
+            app.logger.exception(f"Rating job for wine id {wine_id} failed")
+        finally:
+            db.session.remove()
+
+
+def process(wine_id: int) -> str:
+    """
+    Scrape and store the rating of one wine.
+
+    Args:
+        wine_id (int): ID of the wine to rate.
+
+    Returns:
+        str or None: New rating_status, or None if the wine no longer exists.
+    """
+    wine = (db.session.query(Wine.name, Wine.vintage, Producer.name.label("producer"))
+        .join(Producer, Wine.producer_id == Producer.id)
+        .filter(Wine.id == wine_id)
+        .first())
+    if wine is None:
+        return None
+
+    try:
+        values = {"rating": lookup_rating(wine.name, wine.vintage, wine.producer),
+            "rating_status": RATING_COMPLETE}
+    except ScrapeError:
+        values = {"rating_status": RATING_FAILED}
+    values["rating_fetched_at"] = datetime.utcnow()
+
+    before = stats.snapshot([wine_id]).get(wine_id)
+    if before is None:
+        return None     #deleted while scraping
+    db.session.query(Wine).filter(Wine.id == wine_id).update(values, synchronize_session=False)
+    if "rating" in values:
+        stats.apply([before], [{**before, "rating": values["rating"]}])
+    versions.bump("wines")
+    db.session.commit()
+    return values["rating_status"]
+
+
+def pending_ids(limit: int) -> list:
+    """
+    Get the oldest queued rating jobs.
+
+    Args:
+        limit (int): Maximum number of jobs, or None for all.
+
+    Returns:
+        list[int]: Wine IDs with a pending rating_status.
+    """
+    rows = (db.session.query(Wine.id)
+        .filter(Wine.rating_status == RATING_PENDING)
+        .order_by(Wine.id)
+        .limit(limit))
+    return [id for (id,) in rows]
+
+
+def run(batch_size: int = 50, interval: float = 5.0, threads: int = 4, once: bool = False):
+    """
+    Process queued rating jobs until stopped.
+
+    Args:
+        batch_size (int): Jobs fetched per poll.
+        interval (float): Seconds to sleep when the queue is empty.
+        threads (int): Concurrent scrapes.
+        once (bool): Return once the queue is empty instead of polling.
+    """
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rating-worker") as pool:
+        while True:
+            ids = pending_ids(batch_size)
+            db.session.remove()
+            if ids:
+                list(pool.map(lambda id: _run(app, id), ids))
+            elif once:
+                return
+            else:
+                time.sleep(interval)
@@ -11,18 +11,58 @@ from models.region import Region
 from models.producer import Producer
 from models.wine import Wine
 from models import db
+from scraper import scraper
+from scraper.client import HttpClient
+from utilities import dimensions
+from utilities import response_cache
+from utilities import stats
+from utilities import suggest
+
+
+@pytest.fixture(autouse=True)
+def isolated_scraper(monkeypatch):
+    monkeypatch.setattr(scraper, "_cache", None)    #never serve tests from the on-disk cache
+    monkeypatch.setattr(scraper, "_client", HttpClient(retries=0))  #fail fast when offline
+
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(monkeypatch):
+    #versions restart with every test db, a fresh cache keeps tags from colliding
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ResponseCache(response_cache.MemoryStore()))
 
 
 @pytest.fixture
 def client():
     app.config["TESTING"] = True    #enable test mode
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"    #use in-memory sqlite
+    app.config["RATING_WORKER"] = "sync"    #scrape on the request thread, in-memory db is per thread
     with app.test_client() as client:
         with app.app_context():
             db.create_all() #create tables
             yield client    #run tests with client
             db.session.remove() #close sessions to release db
             db.drop_all()   #clean up db
+            dimensions.clear_cache()    #ids are reused by the next test's db
+            stats.clear_cache()
+            suggest.clear_cache()
+
+
+@pytest.fixture
+def file_client(tmp_path, monkeypatch):
+    #file backed sqlite so concurrent requests on several threads share one db
+    monkeypatch.setitem(app.config, "TESTING", True)
+    monkeypatch.setitem(app.config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'wines.db'}")
+    monkeypatch.setitem(app.config, "SQLALCHEMY_ENGINE_OPTIONS", {"connect_args": {"timeout": 30}})
+    monkeypatch.setitem(app.config, "RATING_WORKER", "external")    #leave ratings pending
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+            dimensions.clear_cache()
+            stats.clear_cache()
+            suggest.clear_cache()
 
 
 @pytest.fixture
@@ -0,0 +1,60 @@
+"""
+CSV I/O tests.
+
+Unit tests for the set-based CSV loader.
+"""
+
+import pytest
+import pandas as pd
+import csv_io.csv_io as csvio
+from models.country import Country
+from models.region import Region
+from models.producer import Producer
+from models.wine import Wine
+from models import db
+
+
+@pytest.fixture
+def rows():
+    return pd.read_csv("test/wines.csv").to_dict(orient="records")
+
+
+def test_insert_dimensions_maps_ids(client, rows):
+    country_map = csvio.insert_countries(rows)
+    region_map = csvio.insert_regions(rows, country_map)
+    producer_map = csvio.insert_producers(rows, region_map)
+
+    assert len(country_map) == Country.query.count() == len({r["country"] for r in rows})
+    assert len(region_map) == Region.query.count() == len({r["region"] for r in rows})
+    assert len(producer_map) == Producer.query.count() == len({r["producer"] for r in rows})
+    for name, id in producer_map.items():
+        assert db.session.get(Producer, id).name == name
+
+
+def test_insert_dimensions_reuses_map(client, rows):
+    country_map = csvio.insert_countries(rows[:10])
+    count = Country.query.count()
+    csvio.insert_countries(rows[:10], country_map)
+    assert Country.query.count() == count
+
+
+def test_insert_wines(client, rows):
+    country_map = csvio.insert_countries(rows)
+    region_map = csvio.insert_regions(rows, country_map)
+    producer_map = csvio.insert_producers(rows, region_map)
+    csvio.insert_wines(rows, producer_map)
+    db.session.commit()
+
+    assert Wine.query.count() == len(rows)
+    wine = Wine.query.filter_by(name=rows[0]["name"], vintage=str(rows[0]["vintage"])).one()
+    assert wine.producer.name == rows[0]["producer"]
+    assert wine.rating == rows[0]["rating"]
+
+
+def test_stream_csv_chunks(client, uploaded_csv):
+    query = db.session.query(Wine.name).order_by(Wine.id)
+    chunks = list(csvio.stream_csv(query, batch_size=10))
+
+    assert chunks[0] == ",".join(csvio.CSV_HEADERS) + "\n"
+    assert len(chunks) == 1 + 9     #header + 86 rows in batches of 10
+    assert "".join(chunks[1:]).count("\n") == Wine.query.count()
@@ -0,0 +1,125 @@
+"""
+Dimension cache tests.
+
+Unit tests for the country/region/producer name -> ID cache.
+"""
+
+import re
+import pytest
+from sqlalchemy import event
+from utilities import dimensions
+from utilities import stats
+from utilities import versions
+from utilities.dimensions import NameCache
+import csv_io.csv_io as csvio
+from models.country import Country
+from models.producer import Producer
+from models.wine import Wine
+from models import db
+from app import app
+
+
+@pytest.fixture
+def dimension_queries(client):
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\b(countries|regions|producers)\b", statement):
+            statements.append(statement)
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_name_cache_evicts_least_recently_used():
+    cache = NameCache(2)
+    cache.update({"France": 1, "Spain": 2})
+    assert cache.get("France") == 1    #France is now the most recent
+    cache.update({"Italy": 3})
+    assert cache.get("Spain") is None
+    assert not cache.has_id(2)
+    assert cache.get("France") == 1 and cache.has_id(3)
+    assert len(cache) == 2
+
+
+def test_resolve_is_cached_after_commit(client, dimension_queries):
+    ids = dimensions.resolve_countries(["Spain"])
+    db.session.commit()
+    dimension_queries.clear()
+
+    assert dimensions.resolve_countries(["Spain"]) == ids
+    assert dimensions.existing_ids(Country, ids.values()) == set(ids.values())
+    assert dimension_queries == []
+
+
+def test_resolve_rollback_is_not_cached(client):
+    dimensions.resolve_countries(["Spain"])
+    db.session.rollback()
+
+    assert Country.query.count() == 0
+    ids = dimensions.resolve_countries(["Spain"])
+    db.session.commit()
+    assert db.session.get(Country, ids["Spain"]).name == "Spain"
+
+
+def test_clear_database_clears_cache(client, data):
+    dimensions.warm()
+    assert dimensions.existing_ids(Producer, [data["producer"].id])
+    csvio.clear_database()
+
+    assert dimensions.existing_ids(Producer, [data["producer"].id]) == set()
+
+
+def test_tables_cleared_by_other_process_drop_cache(client, data, no_rating_worker, monkeypatch):
+    old_id = data["producer"].id
+    dimensions.warm()
+    stats.warm()
+    assert dimensions.existing_ids(Producer, [old_id])
+
+    #another process empties the tables and reuses the producer id, this one's caches are untouched
+    db.session.execute(db.text("DELETE FROM wines"))
+    db.session.execute(db.text("DELETE FROM producers"))
+    db.session.execute(db.text("INSERT INTO producers (id, name, region_id) VALUES (:id, 'Muga', :region)"),
+        {"id": old_id, "region": data["producer"].region_id})
+    versions.bump(dimensions.GENERATION)
+    db.session.commit()
+    db.session.expunge_all()
+    monkeypatch.setitem(dimensions._check, "at", 0)     #the throttle has run out
+
+    assert dimensions.names(Producer, [old_id]) == {old_id: "Muga"}
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2013,
+        "producer_name": "Pol Roger", "region_name": "Champagne", "country_name": "France"})
+    assert response.status_code == 201
+    wine = db.session.get(Wine, response.get_json()["id"])
+    assert wine.producer_id != old_id and wine.producer.name == "Pol Roger"
+
+
+@pytest.fixture
+def no_rating_worker(monkeypatch):
+    monkeypatch.setitem(app.config, "RATING_WORKER", "external")  #keep the rating lookup out of the count
+
+
+def test_add_wine_existing_producer_no_dimension_queries(client, data, dimension_queries, no_rating_worker):
+    producer_id = data["producer"].id
+    dimensions.warm()
+    stats.warm()
+    dimension_queries.clear()
+
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2012,
+        "producer_id": producer_id})
+    assert response.status_code == 201
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2013,
+        "producer_name": "Pol Roger", "region_name": "Champagne", "country_name": "France"})
+    assert response.status_code == 201
+    assert dimension_queries == []
+
+
+def test_add_wine_caches_created_producer(client, dimension_queries, no_rating_worker):
+    payload = {"name": "Castillo Ygay", "vintage": 2011, "producer_name": "Marqués de Murrieta",
+        "region_name": "Rioja", "country_name": "Spain"}
+    assert client.post("/wines", json=payload).status_code == 201
+    dimension_queries.clear()
+
+    payload["vintage"] = 2012
+    assert client.post("/wines", json=payload).status_code == 201
+    assert dimension_queries == []
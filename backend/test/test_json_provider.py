@@ -0,0 +1,38 @@
+"""
+JSON provider tests.
+
+Unit tests for the orjson provider and its stdlib fallback.
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app import app
+import utilities.json_provider as json_provider
+
+pytest.importorskip("orjson")
+
+
+def test_orjson_matches_stdlib():
+    value = {"b": [1, None, "Rosé"], "a": Decimal("1.5"), "c": datetime(2024, 1, 2, 3, 4, 5)}
+    fast = json_provider.OrjsonProvider(app)
+    stdlib = DefaultJSONProvider(app)
+    assert json.loads(fast.dumps(value)) == json.loads(stdlib.dumps(value))
+    assert list(json.loads(fast.dumps(value))) == ["a", "b", "c"]   #sorted like flask
+    assert fast.loads(fast.dumps(value)) == stdlib.loads(stdlib.dumps(value))
+
+
+def test_orjson_response():
+    with app.app_context():
+        response = json_provider.OrjsonProvider(app).response([{"id": 1}])
+    assert response.mimetype == "application/json"
+    assert response.get_data() == b'[{"id":1}]\n'
+
+
+def test_provider_falls_back_to_stdlib(monkeypatch):
+    assert isinstance(json_provider.provider(app), json_provider.OrjsonProvider)
+    assert type(json_provider.provider(app, fast=False)) is DefaultJSONProvider
+    monkeypatch.setattr(json_provider, "orjson", None)
+    assert type(json_provider.provider(app)) is DefaultJSONProvider
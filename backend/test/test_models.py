@@ -26,9 +26,16 @@ def test_country_validate_name_invalid(name) :
         Country.validate_name(name)
 
 @pytest.mark.parametrize("name,expected", [("France", "France"),
-    ("   France ", "France"), ("uNiTed sTAtes", "United States")])
+    ("   France ", "France"), ("uNiTed sTAtes", "United States"), ("USA", "United States"),
+    ("us", "United States"), ("Deutschland", "Germany"), ("DEU", "Germany"),
+    ("Vietnam", "Viet Nam"), ("Cote d\u2019Ivoire", "C\u00f4te d'Ivoire"), ("espa\u00f1a", "Spain")])
 def test_country_validate_name_valid(name, expected) :
     assert Country.validate_name(name) == expected
+
+def test_country_names_table_is_current() :
+    from utilities.build_country_names import build
+    from models.country_names import COUNTRY_NAMES
+    assert COUNTRY_NAMES == build()   #rerun utilities/build_country_names.py after upgrading pycountry
     
 
 #Region
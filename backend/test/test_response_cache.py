@@ -0,0 +1,114 @@
+"""
+Response cache tests.
+
+Unit tests for the response stores, miss coalescing and cached routes.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import jsonify
+from app import app
+from utilities.response_cache import MemoryStore, SqliteStore, TieredStore, ResponseCache
+
+
+def slow_view(calls, delay=0.2):
+    def view():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return jsonify([1, 2, 3]), 200
+    return view
+
+
+def fetch(cache, key, view):
+    with app.test_request_context():
+        response = cache.fetch(key, view)
+        return response.status_code, response.get_json()
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(2)
+    store.set("a", (b"1", ()))
+    store.set("b", (b"2", ()))
+    assert store.get("a") == (b"1", ())
+    store.set("c", (b"3", ()))
+    assert store.get("b") is None
+    assert len(store) == 2
+
+
+def test_sqlite_store_round_trip_and_ttl(tmp_path):
+    store = SqliteStore(str(tmp_path / "responses.db"), ttl=0.1)
+    store.set("a", (b"[1]", (("Content-Type", "application/json"),)))
+    assert store.get("a") == (b"[1]", (("Content-Type", "application/json"),))
+    time.sleep(0.15)
+    assert store.get("a") is None
+
+
+def test_sqlite_store_lease(tmp_path):
+    one = SqliteStore(str(tmp_path / "responses.db"))
+    other = SqliteStore(str(tmp_path / "responses.db"))     #another process
+    assert one.lease("a", 10)
+    assert not other.lease("a", 10)
+    one.release("a")
+    assert other.lease("a", 0.05)
+    time.sleep(0.1)
+    assert one.lease("a", 10)   #expired leases are taken over
+
+
+def test_concurrent_misses_build_once():
+    cache = ResponseCache(MemoryStore())
+    calls = []
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: fetch(cache, "k", slow_view(calls)), range(8)))
+
+    assert len(calls) == 1
+    assert results == [(200, [1, 2, 3])] * 8
+    assert cache.stats() == {"hits": 0, "misses": 1, "coalesced": 7, "entries": 1}
+
+
+def test_concurrent_misses_across_processes_build_once(tmp_path):
+    path = str(tmp_path / "responses.db")
+    caches = [ResponseCache(TieredStore(MemoryStore(), SqliteStore(path)), poll=0.01) for _ in range(4)]
+    calls = []
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda cache: fetch(cache, "k", slow_view(calls)), caches))
+
+    assert len(calls) == 1
+    assert results == [(200, [1, 2, 3])] * 4
+
+
+def test_error_responses_are_not_cached():
+    cache = ResponseCache(MemoryStore())
+    fetch(cache, "k", lambda: (jsonify({"error": "Invalid limit"}), 400))
+    assert cache.stats()["entries"] == 0
+
+
+def test_get_wines_served_from_cache(client, data):
+    first = client.get("/wines")
+    second = client.get("/wines")
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    stats = client.get("/responses/cache").json
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+    #a write bumps the version, the next read is a miss with fresh data
+    client.put("/wines", json={"id": data["wine"].id, "quantity": 7})
+    assert client.get("/wines").json[0]["quantity"] == 7
+    assert client.get("/responses/cache").json["misses"] == 2
+
+
+def test_get_wine_cache_invalidated_by_write(client, data):
+    id = data["wine"].id
+    assert client.get(f"/wines/{id}").json["quantity"] == 1
+    client.post(f"/wines/{id}/adjust", json={"delta": 2})
+    assert client.get(f"/wines/{id}").json["quantity"] == 3
+    client.delete(f"/wines/{id}")
+    assert client.get(f"/wines/{id}").status_code == 404
+
+
+def test_cached_page_keeps_link_header(client, uploaded_csv):
+    first = client.get("/wines?limit=10")
+    second = client.get("/wines?limit=10")
+    assert second.headers["Link"] == first.headers["Link"]
+    assert second.headers["Content-Type"] == "application/json"
+    assert client.get("/responses/cache").json["hits"] == 1
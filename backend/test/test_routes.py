@@ -7,6 +7,11 @@ Unit tests API endpoints.
 import pytest
 from app import app
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from models import db
+from utilities import dimensions
+from utilities.pagination import encode_cursor
 import pandas as pd
 
 
@@ -16,6 +21,187 @@ def test_get_wines_200(client, data):
     assert response.status_code == 200
 
 
+def test_get_wines_expand(client, data):
+    response = client.get("/wines?expand=producer,country")
+    assert response.status_code == 200
+    wine = response.json[0]
+    assert wine["producer"] == {"id": data["producer"].id, "name": "Pol Roger",
+        "region_id": data["region"].id}
+    assert wine["country"] == {"id": data["country"].id, "name": "France"}
+    assert "region" not in wine
+    assert wine["producer_id"] == data["producer"].id
+
+    assert "producer" not in client.get("/wines").json[0]
+    assert client.get("/wines?expand=vineyard").status_code == 400
+
+def test_get_wines_expand_paginated(client, uploaded_csv):
+    plain = client.get("/wines?limit=1000&sort=name").json
+    expanded = []
+    url = "/wines?limit=25&sort=name&expand=region"
+    while url:
+        response = client.get(url)
+        expanded += response.json
+        url = response.headers.get("Link", "").split(";")[0].strip("<>")
+    assert [w["id"] for w in expanded] == [w["id"] for w in plain]
+    regions = {r["id"]: r for r in client.get("/regions?limit=1000").json}
+    producers = {p["id"]: p for p in client.get("/producers?limit=1000").json}
+    for wine in expanded:
+        assert wine["region"] == regions[producers[wine["producer_id"]]["region_id"]]
+
+def test_get_wines_expand_etag(client, data):
+    plain = client.get("/wines").headers["ETag"]
+    expanded = client.get("/wines?expand=producer").headers["ETag"]
+    dimensions.resolve_producers({"Krug": data["region"].id})
+    db.session.commit()
+    #only the expanded listing reads producers
+    assert client.get("/wines", headers={"If-None-Match": plain}).status_code == 304
+    assert client.get("/wines?expand=producer", headers={"If-None-Match": expanded}).status_code == 200
+
+def test_get_wines_ids(client, uploaded_csv):
+    ids = [w["id"] for w in client.get("/wines?limit=200").json][::3]
+    response = client.get("/wines?ids=" + ",".join(map(str, reversed(ids))) + ",999999")
+    assert response.status_code == 200
+    assert [w["id"] for w in response.json] == ids
+    assert "Link" not in response.headers
+
+    assert client.get("/wines?ids=1,x").status_code == 400
+    assert client.get("/wines?ids=0").status_code == 400
+    assert client.get("/wines?ids=1,1000000000000000000000000000000").status_code == 400
+    assert client.get("/wines?ids=" + ",".join(map(str, range(1, 1002)))).status_code == 400
+
+def test_get_wine_expand(client, data):
+    id = data["wine"].id
+    response = client.get(f"/wines/{id}?expand=region")
+    assert response.status_code == 200
+    assert response.json["region"] == {"id": data["region"].id, "name": "Champagne",
+        "country_id": data["country"].id}
+    assert response.json["name"] == "Brut"
+    assert client.get(f"/wines/{id}?expand=x").status_code == 400
+    assert client.get("/wines/999?expand=producer").status_code == 404
+
+
+def test_get_wines_etag_304(client, data):
+    response = client.get("/wines")
+    etag = response.headers["ETag"]
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/wines", headers={"If-None-Match": etag})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+    assert not any("FROM wines" in s for s in statements)    #answered from the version table
+
+def test_get_wines_etag_changes(client, data):
+    etag = client.get("/wines").headers["ETag"]
+    assert client.get("/wines?limit=10").headers["ETag"] != etag    #per URL
+
+    id = data["wine"].id
+    client.post(f"/wines/{id}/adjust", json={"delta": 1})
+    response = client.get("/wines", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json[0]["quantity"] == 2
+
+    etag = response.headers["ETag"]
+    client.delete(f"/wines/{id}")
+    assert client.get("/wines", headers={"If-None-Match": etag}).status_code == 200
+
+def test_upload_csv_changes_etags(client, data, csv_file):
+    etags = {path: client.get(path).headers["ETag"] for path in ["/wines", "/regions"]}
+    client.post("/csv", data={"file": (csv_file, "test.csv")}, content_type="multipart/form-data")
+    for path, etag in etags.items():
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+def test_get_producers_etag(client, data):
+    etag = client.get("/producers").headers["ETag"]
+    countries_etag = client.get("/countries").headers["ETag"]
+    client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_id": data["producer"].id})
+    #a new wine leaves producers and countries unchanged
+    assert client.get("/producers", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_name": "Krug",
+        "region_name": "Champagne", "country_name": "France"})
+    assert client.get("/producers", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/countries", headers={"If-None-Match": countries_etag}).status_code == 304
+
+
+def test_get_wines_paginated(client, uploaded_csv):
+    response = client.get("/wines?limit=50")
+    assert response.status_code == 200
+    assert len(response.json) == 50
+    assert 'rel="next"' in response.headers["Link"]
+
+    next_url = response.headers["Link"].split(";")[0].strip("<>")
+    response = client.get(next_url)
+    assert response.status_code == 200
+    assert len(response.json) == 36
+    assert "Link" not in response.headers
+
+def test_get_wines_cursor_400(client, data):
+    response = client.get("/wines?cursor=bananas")
+    assert response.status_code == 400
+    response = client.get(f"/wines?cursor={encode_cursor([10**30])}")
+    assert response.status_code == 400
+    assert response.json["error"].startswith("Invalid cursor")
+
+@pytest.mark.parametrize("values", [[{"a": 1}, 3], [[1], 3], [True, 3], [90, "3"], [10**30, 3], [90, 10**30],
+    [-10**30, 3], [float("nan"), 3], [float("inf"), 3]])
+def test_get_wines_sorted_cursor_400(client, data, values):
+    response = client.get(f"/wines?sort=rating&cursor={encode_cursor(values)}")
+    assert response.status_code == 400
+
+def test_get_wines_limit_400(client, data):
+    response = client.get("/wines?limit=0")
+    assert response.status_code == 400
+
+
+def test_get_wines_filtered(client, uploaded_csv):
+    df = pd.read_csv("test/wines.csv")
+    expected = df[(df.color == "Red") & (df.rating >= 93) & df.vintage.between(2015, 2019)]
+
+    response = client.get("/wines?color=red&rating_min=93&vintage_min=2015&vintage_max=2019")
+    assert response.status_code == 200
+    assert sorted(w["name"] for w in response.json) == sorted(expected.name)
+
+def test_get_wines_filter_400(client, data):
+    response = client.get("/wines?vintage_min=nv")
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("query", ["producer_id=1000000000000000000000000000000",
+    "producer_id=9223372036854775808", "rating_min=1000000000000000000000000000000", "rating_min=101",
+    "rating_min=-1"])
+def test_get_wines_filter_out_of_range_400(client, data, query):
+    response = client.get(f"/wines?{query}")
+    assert response.status_code == 400
+    assert "error" in response.json
+
+@pytest.mark.parametrize("sort", ["rating", "-rating", "-vintage", "name", "-id"])
+def test_get_wines_sorted_pages(client, uploaded_csv, sort):
+    everything = client.get(f"/wines?sort={sort}&limit=1000").json
+
+    pages = []
+    url = f"/wines?sort={sort}&limit=7"
+    while url:
+        response = client.get(url)
+        pages.extend(response.json)
+        url = response.headers.get("Link", "").split(";")[0].strip("<>")
+    assert [w["id"] for w in pages] == [w["id"] for w in everything]
+
+    key = sort.lstrip("-")
+    values = [w[key] for w in everything]
+    assert values == sorted(values, reverse=sort.startswith("-"))
+
+def test_get_wines_sort_400(client, data):
+    response = client.get("/wines?sort=producer")
+    assert response.status_code == 400
+
+
 def test_get_wine_200(client, data):
     response = client.get("/wines/1")
     assert response.status_code == 200
@@ -56,6 +242,13 @@ def test_add_wine_400(client, data):
     response = client.post("/wines", json=payload)
     assert response.status_code == 400
 
+@pytest.mark.parametrize("parent", [{"region_id": 99}, {"region_name": "Rioja", "country_id": 99}])
+def test_add_wine_unknown_parent_400(client, data, parent):
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_name": "Muga", **parent})
+    assert response.status_code == 400
+    assert response.json["error"].endswith("not found")
+    assert len(client.get("/wines").json) == 1
+
 def test_add_wine_409(client, data):
     payload = {
         "name": data["wine"].name,
@@ -65,6 +258,106 @@ def test_add_wine_409(client, data):
     response = client.post("/wines", json=payload)
     assert response.status_code == 409
 
+def test_add_wine_concurrent_duplicates(file_client):
+    payload = {"name": "Castillo Ygay", "vintage": 2011, "producer_name": "Marqués de Murrieta",
+        "region_name": "Rioja", "country_name": "Spain"}
+    def post(payload):
+        with app.test_client() as client:
+            return client.post("/wines", json=payload).status_code
+    with ThreadPoolExecutor(8) as pool:
+        statuses = list(pool.map(post, [payload] * 16))
+    assert sorted(statuses) == [201] + [409] * 15
+    assert len(file_client.get("/producers").json) == 1
+    assert len(file_client.get("/countries").json) == 1
+
+    #same wine under a known producer, no dimension writes to serialize on
+    producer_id = file_client.get("/producers").json[0]["id"]
+    payload = {"name": "Castillo Ygay", "vintage": 2012, "producer_id": producer_id}
+    with ThreadPoolExecutor(8) as pool:
+        statuses = list(pool.map(post, [payload] * 16))
+    assert sorted(statuses) == [201] + [409] * 15
+    assert len(file_client.get("/wines").json) == 2
+
+
+def test_add_wines_batch(client, data):
+    payload = [
+        {"name": "Brut", "vintage": 2012, "producer_id": data["producer"].id},
+        {"name": "Brut", "vintage": "2010", "producer_id": data["producer"].id},   #exists
+        {"name": "Castillo Ygay", "vintage": 2011, "producer_name": "Marqués de Murrieta",
+            "region_name": "Rioja", "country_name": "Spain"},
+        {"name": "Castillo Ygay", "vintage": 2011, "producer_name": "Marqués de Murrieta",
+            "region_name": "Rioja", "country_name": "Spain"},   #repeated in batch
+        {"name": "Reserva", "vintage": 2015, "producer_name": "Marqués de Murrieta",
+            "region_id": data["region"].id},
+        {"name": "", "vintage": 2011, "producer_id": data["producer"].id},
+        {"name": "Brut", "vintage": 2012, "producer_id": 99},
+        {"name": "Brut", "vintage": 2013, "producer_name": "Muga", "region_id": 99},
+        {"name": "Brut", "vintage": 2014, "producer_name": "Muga", "region_name": "Rioja", "country_id": 99}
+    ]
+    response = client.post("/wines/batch", json=payload)
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json] == [201, 409, 201, 409, 201, 400, 400, 400, 400]
+    assert [r["error"] for r in response.json[-2:]] == ["Region not found", "Country not found"]
+
+    ids = [r["id"] for r in response.json if r["status"] == 201]
+    wines = {w["id"]: w for w in client.get("/wines").json}
+    assert [wines[id]["name"] for id in ids] == ["Brut", "Castillo Ygay", "Reserva"]
+    assert len(client.get("/countries").json) == 2
+    assert len(client.get("/producers").json) == 2
+
+def test_add_wines_batch_400(client, data):
+    response = client.post("/wines/batch", json={"name": "Brut"})
+    assert response.status_code == 400
+
+
+def test_update_quantities_batch(client, uploaded_csv):
+    wines = client.get("/wines").json
+    payload = [{"id": wines[0]["id"], "quantity": 0},
+        {"id": 999, "quantity": 5},
+        {"id": wines[1]["id"], "quantity": "12"}]
+    response = client.put("/wines/batch", json=payload)
+    assert response.status_code == 200
+    assert response.json == {"updated": 2, "not_found": [999]}
+
+    quantities = {w["id"]: w["quantity"] for w in client.get("/wines").json}
+    assert quantities[wines[0]["id"]] == 0
+    assert quantities[wines[1]["id"]] == 12
+
+def test_update_quantities_batch_400(client, uploaded_csv):
+    wines = client.get("/wines").json
+    payload = [{"id": wines[0]["id"], "quantity": 7}, {"id": wines[1]["id"], "quantity": 1001}]
+    response = client.put("/wines/batch", json=payload)
+    assert response.status_code == 400
+    assert "Item 1" in response.json["error"]
+    #nothing was written
+    assert client.get(f"/wines/{wines[0]['id']}").json["quantity"] == wines[0]["quantity"]
+
+    assert client.put("/wines/batch", json={"id": 1, "quantity": 1}).status_code == 400
+    assert client.put("/wines/batch", json=[{"id": "x", "quantity": 1}]).status_code == 400
+
+
+def test_adjust_quantity(client, data):
+    id = data["wine"].id
+    response = client.post(f"/wines/{id}/adjust", json={"delta": 5})
+    assert response.status_code == 200
+    assert response.json == {"id": id, "quantity": 6}
+
+    response = client.post(f"/wines/{id}/adjust", json={"delta": -6})
+    assert response.status_code == 200
+    assert response.json["quantity"] == 0
+
+def test_adjust_quantity_409(client, data):
+    id = data["wine"].id
+    assert client.post(f"/wines/{id}/adjust", json={"delta": -2}).status_code == 409
+    assert client.post(f"/wines/{id}/adjust", json={"delta": 1000}).status_code == 409
+    assert client.get(f"/wines/{id}").json["quantity"] == 1
+
+def test_adjust_quantity_400_404(client, data):
+    id = data["wine"].id
+    assert client.post(f"/wines/{id}/adjust", json={"delta": "1"}).status_code == 400
+    assert client.post(f"/wines/{id}/adjust", json={}).status_code == 400
+    assert client.post("/wines/999/adjust", json={"delta": 1}).status_code == 404
+
 
 def test_update_quantity_200(client, data):
     payload = {
@@ -142,11 +435,137 @@ def test_get_country_404(client, data):
     assert response.status_code == 404
 
 
+def test_get_scraper_cache_200(client):
+    response = client.get("/scraper/cache")
+    assert response.status_code == 200
+    assert response.json == {"enabled": False}
+
+
 def test_csv_upload_200(client, csv_file):
     data = {"file": (csv_file, "test.csv")}
     response = client.post("/csv", data=data, content_type="multipart/form-data")
     assert response.status_code == 200
 
+def test_csv_upload_chunked_200(client, csv_file, monkeypatch):
+    monkeypatch.setitem(app.config, "CSV_CHUNK_SIZE", 10)
+    data = {"file": (csv_file, "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+
+    df_uploaded = pd.read_csv("test/wines.csv")
+    df_downloaded = pd.read_csv(BytesIO(client.get("/csv").data))
+    assert df_uploaded.equals(df_downloaded)
+
+def test_csv_upload_numeric_text_chunk_200(client, monkeypatch):
+    monkeypatch.setitem(app.config, "CSV_CHUNK_SIZE", 2)
+    lines = ["name,vintage,varietal,color,type,rating,quantity,producer,region,country",
+        "Brut,2012,,White,Sparkling,90,6,Pol Roger,Champagne,France",
+        "Reserva,2015,,Red,Still,,2,Muga,Rioja,Spain",
+        "1945,2016,,Red,Still,95,1,1864,2,3",    #chunk of numbers only
+        "1996,2017,,Red,Still,94,1,1864,2,3",
+        "NA,2018,,Red,Still,,,Muga,Rioja,Spain"]
+    data = {"file": (BytesIO("\n".join(lines).encode()), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    wines = {w["name"]: w for w in client.get("/wines?expand=producer").json}
+    assert sorted(wines) == ["1945", "1996", "Brut", "NA", "Reserva"]
+    assert wines["1945"]["producer"]["name"] == "1864"
+    assert wines["NA"]["quantity"] == 1
+
+def test_csv_upload_blank_name_400(client, uploaded_csv):
+    df = pd.read_csv("test/wines.csv")
+    df.loc[3, "name"] = None
+    data = {"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert len(client.get("/wines?limit=1000").json) == 86
+
+def test_csv_upload_bad_later_chunk_keeps_data(client, uploaded_csv, monkeypatch):
+    monkeypatch.setitem(app.config, "CSV_CHUNK_SIZE", 10)
+    lines = open("test/wines.csv", encoding="utf-8").read().splitlines()
+    lines.insert(39, lines[39] + ",extra field")     #line 40, in the fourth chunk
+    data = {"file": (BytesIO("\n".join(lines).encode()), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+
+    assert len(client.get("/wines?limit=1000").json) == 86
+    df_uploaded = pd.read_csv("test/wines.csv")
+    df_downloaded = pd.read_csv(BytesIO(client.get("/csv").data))
+    assert df_uploaded.equals(df_downloaded)
+
+def test_csv_upload_duplicate_row_keeps_data(client, uploaded_csv):
+    lines = open("test/wines.csv", encoding="utf-8").read().splitlines()
+    lines.append(lines[1])
+    data = {"file": (BytesIO("\n".join(lines).encode()), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert response.json["error"] == "Duplicate wine in file"
+
+    assert len(client.get("/wines?limit=1000").json) == 86
+    assert client.get("/producers?limit=1000").json
+
+@pytest.mark.parametrize("mode", ["replace", "merge"])
+def test_csv_upload_blank_quantity_defaults(client, uploaded_csv, mode):
+    df = pd.read_csv("test/wines.csv")
+    df.loc[0, "quantity"] = None
+    df.loc[1, "name"] = "Brand New Cuvée"
+    df.loc[1, "quantity"] = None
+    data = {"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv"), "mode": mode}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    quantities = {(w["name"], w["vintage"]): w["quantity"] for w in client.get("/wines?limit=1000").json}
+    assert quantities[(df.loc[0, "name"], str(df.loc[0, "vintage"]))] == 1
+    assert quantities[("Brand New Cuvée", str(df.loc[1, "vintage"]))] == 1
+
+def test_csv_upload_null_vintage_not_duplicate(client, uploaded_csv):
+    df = pd.read_csv("test/wines.csv")
+    df.loc[0, "vintage"] = None
+    data = {"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert response.json["error"].startswith("Invalid wine in file")
+    assert len(client.get("/wines?limit=1000").json) == 86
+
+def test_csv_upload_merge_200(client, uploaded_csv):
+    before = {(w["name"], w["vintage"], w["producer_id"]): w["id"]
+        for w in client.get("/wines?limit=1000").json}
+
+    df = pd.read_csv("test/wines.csv")
+    df.loc[0, "quantity"] += 1
+    df = df.drop(index=1)
+    new = df.iloc[[0]].assign(name="Brand New Cuvée")
+    df = pd.concat([df, new])
+    data = {"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv"),
+        "mode": "merge", "delete_missing": "true"}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert response.json["inserted"] == 1
+    assert response.json["updated"] == 1
+    assert response.json["unchanged"] == len(df) - 2
+    assert response.json["deleted"] == 1
+
+    after = client.get("/wines?limit=1000").json
+    assert len(after) == len(df)
+    first = df.iloc[0]
+    assert [w["quantity"] for w in after
+        if (w["name"], w["vintage"]) == (first["name"], str(first["vintage"]))] == [first["quantity"]]
+    after = {(w["name"], w["vintage"], w["producer_id"]): w for w in after}
+    for key, wine in after.items():
+        if key in before:
+            assert wine["id"] == before[key]    #ids survive the merge
+
+def test_csv_upload_merge_idempotent(client, uploaded_csv):
+    data = {"file": (open("test/wines.csv", "rb"), "test.csv"), "mode": "merge"}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert response.json["unchanged"] == 86
+    assert response.json["inserted"] == response.json["updated"] == response.json["deleted"] == 0
+
+def test_csv_upload_headers_400(client):
+    data = {"file": (BytesIO(b"name,vintage\nBrut,2010\n"), "test.csv")}
+    response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+
 def test_csv_upload_400(client, csv_file):
     data = {"file": (csv_file, "test.csz")}
     response = client.post("/csv", data=data, content_type="multipart/form-data")
@@ -0,0 +1,58 @@
+"""
+Schema upgrade tests.
+
+Checks that a database created before the rating and uniqueness columns
+were added is brought up to date in place.
+"""
+
+from sqlalchemy import inspect
+from models import db
+from models.wine_stat import WineStat
+from utilities import schema
+
+#wines table as first released, before rating_status, rating_fetched_at and the indexes
+BASELINE_WINES = """CREATE TABLE wines (
+    id INTEGER NOT NULL PRIMARY KEY,
+    quantity INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    vintage VARCHAR(10) NOT NULL,
+    varietal VARCHAR(100),
+    color VARCHAR(50),
+    type VARCHAR(100),
+    producer_id INTEGER NOT NULL REFERENCES producers (id),
+    rating INTEGER)"""
+
+
+def baseline(conn):
+    conn.exec_driver_sql("DROP TABLE wines")
+    conn.exec_driver_sql("DROP TABLE wine_stats")
+    conn.exec_driver_sql(BASELINE_WINES)
+    conn.exec_driver_sql("INSERT INTO wines (quantity, name, vintage, producer_id, rating) "
+        "VALUES (3, 'Brut', '2010', 1, 92)")
+
+
+def test_upgrade_baseline_database(client, data):
+    baseline(db.session.connection())
+    db.session.commit()
+
+    changes = schema.upgrade()
+    assert "added column wines.rating_status" in changes
+    assert "added column wines.rating_fetched_at" in changes
+    assert "added unique constraint uq_wines_name_vintage_producer" in changes
+    assert "created table wine_stats" in changes
+
+    inspector = inspect(db.engine)
+    assert {"rating_status", "rating_fetched_at"} <= {c["name"] for c in inspector.get_columns("wines")}
+    assert "uq_wines_name_vintage_producer" in {i["name"] for i in inspector.get_indexes("wines")}
+
+    response = client.get("/wines")
+    assert response.status_code == 200
+    assert response.json[0]["rating_status"] is None
+    assert WineStat.query.filter_by(dimension="color").one().bottles == 3
+    assert client.get("/search?q=brut").json[0]["name"] == "Brut"
+    assert client.post("/wines", json={"name": "Brut", "vintage": 2010,
+        "producer_id": data["producer"].id}).status_code == 409
+
+
+def test_upgrade_current_database(client):
+    assert schema.upgrade() == []
@@ -6,7 +6,22 @@ Rating scraper tests
 import pytest
 from app import app
 from unittest.mock import patch, Mock
-from scraper.scraper import scrape_rating
+from scraper.scraper import scrape_rating, ScrapeError, parse_rating
+from bs4 import BeautifulSoup
+from scraper.cache import RatingCache, MISSING
+from scraper import scraper
+from scraper.client import HttpClient, RateLimiter
+from models.wine import Wine, RATING_PENDING
+from models import db
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import scraper.worker as rating_worker
+import scraper.scheduler as rating_scheduler
+import scraper.refresh as rating_refresh
 
 
 
@@ -34,6 +49,297 @@ def test_scraper_saved_html():
     response.status_code = 200
     response.text = html
 
-    with patch('requests.get', return_value=response):
+    with patch('requests.Session.get', return_value=response):
         rating = scrape_rating("anyname", "anyvintage", "anyproducer")
         assert rating == expected
+
+
+def test_add_wine_queues_rating(client, data2, monkeypatch):
+    monkeypatch.setitem(app.config, "RATING_WORKER", "external")
+    payload = {"name": "Red Icon", "vintage": "2018", "producer_id": 1}
+    response = client.post("/wines", json=payload)
+    assert response.status_code == 201
+    assert response.json["rating_status"] == "pending"
+
+    wine = client.get("/wines/1").json
+    assert wine["rating"] is None
+    assert wine["rating_status"] == "pending"
+
+    with patch("scraper.worker.lookup_rating", return_value=90):
+        rating_worker.run(once=True)
+    wine = client.get("/wines/1").json
+    assert wine["rating"] == 90
+    assert wine["rating_status"] == "complete"
+
+
+def test_rating_worker_resume(file_client, monkeypatch):
+    payload = {"name": "Red Icon", "vintage": "2018", "producer_name": "Painted Rock",
+        "region_name": "Okanagan Valley", "country_name": "Canada"}
+    assert file_client.post("/wines", json=payload).status_code == 201    #left pending
+    assert rating_worker.resume() == 0  #external mode, nothing to do
+
+    monkeypatch.setitem(app.config, "RATING_WORKER", "thread")
+    with patch("scraper.worker.lookup_rating", return_value=90):
+        assert rating_worker.resume() == 1
+        deadline = time.monotonic() + 10
+        while file_client.get("/wines/1").json["rating_status"] == "pending" and time.monotonic() < deadline:
+            time.sleep(0.05)
+    wine = file_client.get("/wines/1").json
+    assert wine["rating"] == 90
+    assert wine["rating_status"] == "complete"
+
+
+def test_rating_worker_failed(client, data2):
+    payload = {"name": "Red Icon", "vintage": "2018", "producer_id": 1}
+    with patch("scraper.worker.lookup_rating", side_effect=ScrapeError("timeout")):
+        client.post("/wines", json=payload)
+    wine = client.get("/wines/1").json
+    assert wine["rating"] is None
+    assert wine["rating_status"] == "failed"
+
+
+def parse_full_tree(html):
+    soup = BeautifulSoup(html, "html.parser")
+    el_scr = soup.find("span", class_="el scr")
+    if el_scr and el_scr.find("a", class_="action"):
+        return int(float(el_scr.find("a", class_="action").text.strip().split()[0]))
+    return None
+
+@pytest.mark.parametrize("html", [
+    open("test/CellarTracker.html", "r").read(),
+    "<html><body>No wines found</body></html>",
+    '<div class="el scr"><a class="action">80 points</a></div><span class="el scr"><a class="action">91.5 points</a></span>',
+    "<span class='el scr'><a class='action'>88 points</a></span>",
+    '<span class="el scr"><span>stats</span><a class="action">87 points</a></span>',
+    '<span class="el scr">no score</span><span class="el scr"><a class="action">86 points</a></span>',
+    '<span class="el scr foo"><a class="action">85 points</a></span>',
+])
+def test_parse_rating_matches_full_tree(html):
+    assert parse_rating(html) == parse_rating(html, early_exit=False) == parse_full_tree(html)
+
+
+def test_rating_cache_hit(tmp_path, monkeypatch):
+    cache = RatingCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(scraper, "_cache", cache)
+    with open("test/CellarTracker.html", "r") as f:
+        response = Mock(status_code=200, text=f.read())
+
+    with patch('requests.Session.get', return_value=response) as get:
+        assert scrape_rating("Red Icon", "2018", "Painted Rock") == 90
+        assert scrape_rating("red icon", "2018", "Painted  Rock") == 90
+        assert get.call_count == 1
+    assert scraper.cache_stats() == {"enabled": True, "hits": 1, "misses": 1, "entries": 1}
+
+    #shared with other processes through the file
+    assert RatingCache(str(tmp_path / "cache.db")).get(scraper.build_url("Red Icon", "2018", "Painted Rock")) == 90
+
+
+def test_rating_cache_negative_and_ttl(tmp_path, monkeypatch):
+    cache = RatingCache(str(tmp_path / "cache.db"), ttl=60, negative_ttl=0)
+    monkeypatch.setattr(scraper, "_cache", cache)
+    response = Mock(status_code=200, text="<html></html>")
+
+    with patch('requests.Session.get', return_value=response) as get:
+        assert scrape_rating("Red Icon", "2018", "Painted Rock") is None
+        assert scrape_rating("Red Icon", "2018", "Painted Rock") is None
+        assert get.call_count == 2  #negative entry already expired
+
+    cache.negative_ttl = 60
+    with patch('requests.Session.get', return_value=response) as get:
+        scrape_rating("Red Icon", "2018", "Painted Rock")
+        scrape_rating("Red Icon", "2018", "Painted Rock")
+        assert get.call_count == 1
+
+
+def test_rating_cache_skips_errors(tmp_path, monkeypatch):
+    cache = RatingCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(scraper, "_cache", cache)
+
+    with patch('requests.Session.get', side_effect=requests.ConnectionError("down")):
+        assert scrape_rating("Red Icon", "2018", "Painted Rock") is None
+    assert cache.get(scraper.build_url("Red Icon", "2018", "Painted Rock")) is MISSING
+
+
+@pytest.fixture
+def server():
+    """Local stand-in for Cellar Tracker that replies with a scripted list of statuses."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   #keep-alive
+
+        def do_GET(self):
+            self.server.connections.add(self.client_address)
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+            body = b"<html></html>"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.connections = set()
+    httpd.statuses = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_client_reuses_connection(server):
+    client = HttpClient(pool_size=1)
+    url = f"http://127.0.0.1:{server.server_port}/list.asp"
+    for _ in range(5):
+        assert client.get(url).status_code == 200
+    assert len(server.connections) == 1
+    client.close()
+
+
+def test_client_retry_schedule(server):
+    server.statuses = [503, 500, 429]
+    client = HttpClient(retries=3, backoff=0.5, backoff_max=1.5)
+    url = f"http://127.0.0.1:{server.server_port}/list.asp"
+    with patch("scraper.client.time.sleep") as sleep:
+        assert client.get(url).status_code == 200
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert len(delays) == 3
+    for delay, cap in zip(delays, [0.5, 1.0, 1.5]):    #doubling, capped at backoff_max
+        assert cap / 2 <= delay <= cap
+    assert len(server.connections) == 1     #retries reuse the pooled connection
+    client.close()
+
+
+def test_client_gives_up(server):
+    server.statuses = [503] * 10
+    client = HttpClient(retries=2)
+    url = f"http://127.0.0.1:{server.server_port}/list.asp"
+    with patch("scraper.client.time.sleep") as sleep:
+        with pytest.raises(requests.HTTPError):
+            client.get(url)
+    assert sleep.call_count == 2
+    assert server.statuses == [503] * 7     #1 try + 2 retries
+    client.close()
+
+
+def test_client_retries_connection_errors():
+    client = HttpClient(retries=2, connect_timeout=0.5)
+    with patch("scraper.client.time.sleep") as sleep:
+        with pytest.raises(requests.ConnectionError):
+            client.get("http://127.0.0.1:9/")   #discard port, nothing listening
+    assert sleep.call_count == 2
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire("www.cellartracker.com")
+    assert time.monotonic() - start >= 0.19     #2 burst + 4 at 20/s
+    start = time.monotonic()
+    limiter.acquire("other.example.com")    #buckets are per host
+    assert time.monotonic() - start < 0.05
+
+
+def test_refresh_ratings_missing(client, uploaded_csv):
+    db.session.query(Wine).filter(Wine.id <= 3).update({"rating": None})
+    db.session.commit()
+
+    results = dict(zip([w.name for w in Wine.query.filter(Wine.id <= 3).order_by(Wine.id)],
+        [91, None, ScrapeError("timeout")]))
+    def lookup(name, vintage, producer):
+        if isinstance(results[name], Exception):
+            raise results[name]
+        return results[name]
+
+    with patch("scraper.refresh.lookup_rating", side_effect=lookup):
+        response = client.post("/ratings/refresh", json={"target": "missing"})
+    assert response.status_code == 200
+    report = response.json
+    assert (report["processed"], report["rated"], report["not_found"], report["failed"]) == (3, 1, 1, 1)
+    statuses = {w["id"]: (w["rating"], w["rating_status"]) for w in client.get("/wines?limit=3").json}
+    assert statuses == {1: (91, "complete"), 2: (None, "complete"), 3: (None, "failed")}
+
+
+def test_refresh_ratings_all_limit(client, uploaded_csv):
+    with patch("scraper.refresh.lookup_rating", return_value=88) as lookup:
+        response = client.post("/ratings/refresh", json={"target": "all", "limit": 10})
+    assert response.json["rated"] == 10
+    assert lookup.call_count == 10
+    assert [w["rating"] for w in client.get("/wines?rating_min=88&sort=rating&limit=10").json] == [88] * 10
+
+
+def test_refresh_ratings_default_limit_skips_pending(client, uploaded_csv, monkeypatch):
+    monkeypatch.setattr(rating_refresh, "DEFAULT_LIMIT", 5)
+    db.session.query(Wine).update({"rating": None})
+    db.session.query(Wine).filter(Wine.id <= 3).update({"rating_status": RATING_PENDING})
+    db.session.commit()
+    with patch("scraper.refresh.lookup_rating", return_value=88) as lookup:
+        response = client.post("/ratings/refresh", json={"target": "missing"})
+    assert response.json["processed"] == 5
+    assert not {call.args[:2] for call in lookup.call_args_list} & \
+        {(w.name, w.vintage) for w in Wine.query.filter(Wine.id <= 3)}
+    assert [w.rating for w in Wine.query.filter(Wine.id <= 3)] == [None] * 3
+
+
+@pytest.mark.parametrize("limit", [0, 201, "x"])
+def test_refresh_ratings_limit_400(client, limit):
+    response = client.post("/ratings/refresh", json={"limit": limit})
+    assert response.status_code == 400
+
+
+def test_refresh_ratings_400(client):
+    response = client.post("/ratings/refresh", json={"target": "stale-ish"})
+    assert response.status_code == 400
+
+
+def test_scheduler_never_scraped_newest_first(client, uploaded_csv):
+    db.session.query(Wine).update({"rating_fetched_at": datetime.utcnow(), "rating_status": "complete"})
+    for id, quantity in [(1, 50), (2, 1), (3, 20)]:
+        db.session.query(Wine).filter(Wine.id == id).update(
+            {"rating_fetched_at": None, "quantity": quantity, "rating_status": None})
+    db.session.commit()
+
+    due = rating_scheduler.due(timedelta(days=30), timedelta(hours=1)).all()
+    assert [w.id for w in due] == [3, 2, 1]
+
+
+def test_scheduler_skips_pending(client, uploaded_csv):
+    db.session.query(Wine).update({"rating_fetched_at": datetime.utcnow(), "rating_status": "complete"})
+    db.session.query(Wine).filter(Wine.id <= 2).update({"rating_fetched_at": None, "rating_status": None})
+    db.session.query(Wine).filter(Wine.id == 1).update({"rating_status": RATING_PENDING})   #just queued
+    db.session.commit()
+
+    due = rating_scheduler.due(timedelta(days=30), timedelta(hours=1)).all()
+    assert [w.id for w in due] == [2]
+
+
+def test_scheduler_tick_priority(client, uploaded_csv):
+    now = datetime.utcnow()
+    db.session.query(Wine).update({"rating_fetched_at": now, "rating_status": "complete"})
+    for id, fetched_at, quantity, status in [
+            (1, None, 1, None),                           #never scraped
+            (2, now - timedelta(days=60), 50, "complete"),  #stale, many bottles
+            (3, now - timedelta(days=40), 5, "complete"),   #stale, few bottles
+            (4, now - timedelta(hours=2), 0, "failed"),     #failed, due for retry
+            (5, now - timedelta(minutes=10), 0, "failed")]: #failed, too recent
+        db.session.query(Wine).filter(Wine.id == id).update(
+            {"rating_fetched_at": fetched_at, "quantity": quantity, "rating_status": status})
+    db.session.commit()
+
+    scraped = []
+    def lookup(name, vintage, producer):
+        scraped.append(name)
+        return 90
+
+    args = (timedelta(days=30), timedelta(hours=1))
+    with ThreadPoolExecutor(max_workers=1) as pool, patch("scraper.refresh.lookup_rating", side_effect=lookup):
+        first = [w.id for w in rating_scheduler.due(*args).all()]
+        assert first == [1, 2, 3, 4]
+        assert rating_scheduler.tick(pool, 3, *args)["rated"] == 3
+        assert [w.id for w in rating_scheduler.due(*args).all()] == [4]
+        assert rating_scheduler.tick(pool, 3, *args)["processed"] == 1
+        assert rating_scheduler.tick(pool, 3, *args)["processed"] == 0
+    assert len(scraped) == 4
+    assert Wine.query.filter(Wine.rating_fetched_at < now).count() == 1   #only wine 5 left
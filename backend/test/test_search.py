@@ -0,0 +1,127 @@
+"""
+Search tests.
+
+Covers the trigram index behind GET /search and keeping it in sync with
+wine writes.
+"""
+
+from io import BytesIO
+import pandas as pd
+from sqlalchemy import event, text
+from models import db
+from models.wine import Wine
+from utilities import search
+
+
+def indexed() -> list:
+    return [tuple(row) for row in db.session.execute(text("SELECT rowid, * FROM wine_search ORDER BY rowid"))]
+
+
+def find(client, q, **params):
+    response = client.get("/search", query_string={"q": q, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_trigrams():
+    assert search.trigrams("Rosé  Brut") == {"ros", "ose", "bru", "rut"}
+    assert search.trigrams("a to") == set()
+
+
+def test_upload_indexes_every_wine(client, uploaded_csv):
+    assert len(indexed()) == Wine.query.count()
+
+
+def test_search_exact(client, uploaded_csv):
+    results = find(client, "pinot noir reserve huff-flynn 2016")
+    assert results[0]["name"] == "Pinot Noir Reserve"
+    assert results[0]["vintage"] == "2016"
+    assert results[0]["score"] == 1
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_tolerates_typos_and_order(client, uploaded_csv):
+    results = find(client, "2016 huf-flyn reserv pinto noir")
+    assert results[0]["name"] == "Pinot Noir Reserve"
+    assert results[0]["vintage"] == "2016"
+    assert results[0]["score"] < 1
+
+    #no trigram of "nior" or "brt" is in the wine, any trigram is enough then
+    assert "Pinot Noir" in find(client, "pinot nior brt")[0]["name"]
+
+
+def test_search_folds_accents(client, uploaded_csv):
+    results = find(client, "syrah rose")
+    assert results[0]["name"] == "Syrah Rosé Reserve"
+
+
+def test_search_region_and_expand(client, uploaded_csv):
+    results = find(client, "napa valley", expand="region")
+    assert results
+    assert results[0]["region"]["name"] == "Napa Valley"
+
+
+def test_search_limit(client, uploaded_csv):
+    assert len(find(client, "reserve", limit=3)) == 3
+
+
+def test_search_invalid(client, uploaded_csv):
+    assert client.get("/search").status_code == 400
+    assert client.get("/search?q=ab").status_code == 400
+    assert client.get("/search?q=reserve&expand=grape").status_code == 400
+
+
+def test_search_follows_writes(client, uploaded_csv):
+    response = client.post("/wines", json={"name": "Cuvée Sir Winston Churchill", "vintage": 2008,
+        "producer_name": "Pol Roger", "region_name": "Champagne", "country_name": "France"})
+    id = response.get_json()["id"]
+    assert find(client, "sir winston pol roger")[0]["id"] == id
+
+    response = client.post("/wines/batch", json=[{"name": "Blanc de Blancs", "vintage": 2012,
+        "producer_name": "Pol Roger", "region_name": "Champagne", "country_name": "France"}])
+    batch_id = response.get_json()[0]["id"]
+    assert find(client, "blanc de blancs pol roger")[0]["id"] == batch_id
+
+    client.delete(f"/wines/{id}")
+    assert id not in [r["id"] for r in find(client, "sir winston pol roger")]
+
+    db.session.remove()
+    incremental = indexed()
+    search.rebuild()
+    assert incremental == indexed()
+
+
+def test_create_skips_index_delete(client, uploaded_csv):
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_name": "Pol Roger",
+            "region_name": "Champagne", "country_name": "France"})
+        client.post("/wines/batch", json=[{"name": "Rosé", "vintage": 2012, "producer_name": "Pol Roger",
+            "region_name": "Champagne", "country_name": "France"}])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert [s for s in statements if "INSERT INTO wine_search" in s]
+    assert not [s for s in statements if "DELETE FROM wine_search" in s]
+
+
+def test_search_after_merge_and_clear(client, uploaded_csv):
+    df = pd.read_csv("test/wines.csv")
+    df.loc[0, "varietal"] = "Nebbiolo"
+    df = df.drop(index=1)
+    df = pd.concat([df, df.iloc[[0]].assign(name="Brand New Cuvée", producer="New Producer")])
+    client.post("/csv", data={"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv"),
+        "mode": "merge", "delete_missing": "true"}, content_type="multipart/form-data")
+    db.session.remove()
+    incremental = indexed()
+    assert len(incremental) == Wine.query.count()
+    search.rebuild()
+    assert incremental == indexed()
+    assert find(client, "brand new cuvee new producer")[0]["name"] == "Brand New Cuvée"
+
+    with open("test/wines.csv", "rb") as file:
+        client.post("/csv", data={"file": (file, "test.csv")}, content_type="multipart/form-data")
+    assert len(indexed()) == Wine.query.count()
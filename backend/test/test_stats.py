@@ -0,0 +1,132 @@
+"""
+Stats tests.
+
+Checks the incrementally maintained totals against a full recompute and
+covers the /stats endpoints.
+"""
+
+from io import BytesIO
+from unittest.mock import patch
+import pandas as pd
+import pytest
+from models import db
+from models.wine import Wine
+from models.wine_stat import WineStat
+import scraper.refresh as rating_refresh
+from utilities import stats
+
+
+def totals() -> dict:
+    #zero rows left behind by deletes are equivalent to missing rows
+    return {(s.dimension, s.key): (s.wines, s.bottles, s.rated, s.rating_sum)
+        for s in WineStat.query.all() if (s.wines, s.bottles, s.rated, s.rating_sum) != (0, 0, 0, 0)}
+
+
+def assert_matches_rebuild():
+    incremental = totals()
+    stats.rebuild()
+    assert incremental == totals()
+
+
+def test_upload_builds_stats(client, uploaded_csv):
+    assert totals()
+    assert_matches_rebuild()
+
+
+def test_writes_keep_stats_in_sync(client, uploaded_csv):
+    wines = [id for id, in db.session.query(Wine.id).order_by(Wine.id).limit(4)]
+    with patch("scraper.worker.lookup_rating", return_value=91):
+        assert client.post("/wines", json={"name": "Brut", "vintage": 2012, "quantity": 6,
+            "color": "White", "producer_name": "Pol Roger", "region_name": "Champagne",
+            "country_name": "France"}).status_code == 201
+    assert client.post("/wines/batch", json=[
+        {"name": "Cuvée A", "vintage": 2015, "producer_id": 1},
+        {"name": "Cuvée B", "vintage": 2016, "quantity": 3, "color": "Red", "producer_id": 2}
+    ]).status_code == 200
+    assert client.put("/wines", json={"id": wines[0], "quantity": 7}).status_code == 200
+    assert client.put("/wines/batch", json=[{"id": wines[1], "quantity": 0},
+        {"id": wines[2], "quantity": 12}, {"id": 9999, "quantity": 1}]).status_code == 200
+    assert client.post(f"/wines/{wines[3]}/adjust", json={"delta": -2}).status_code == 200
+    assert client.post(f"/wines/{wines[3]}/adjust", json={"delta": -5000}).status_code == 409
+    assert client.delete(f"/wines/{wines[2]}").status_code == 200
+    db.session.remove()
+    assert_matches_rebuild()
+
+
+def test_rating_refresh_keeps_stats_in_sync(client, uploaded_csv):
+    with patch("scraper.refresh.lookup_rating", return_value=80):
+        rating_refresh.refresh_ratings(rating_refresh.candidates("all"), threads=2, limit=5)
+    db.session.remove()
+    assert_matches_rebuild()
+
+
+def test_merge_keeps_stats_in_sync(client, uploaded_csv):
+    df = pd.read_csv("test/wines.csv")
+    df.loc[0, "quantity"] += 3
+    df.loc[1, "color"] = "White"
+    df = df.drop(index=2)
+    df = pd.concat([df, df.iloc[[0]].assign(name="Brand New Cuvée", producer="New Producer")])
+    data = {"file": (BytesIO(df.to_csv(index=False).encode()), "test.csv"),
+        "mode": "merge", "delete_missing": "true"}
+    with patch("utilities.stats.rebuild", side_effect=AssertionError("merge rebuilt the stats")), \
+            patch("utilities.search.rebuild", side_effect=AssertionError("merge rebuilt the index")):
+        response = client.post("/csv", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert (response.json["inserted"], response.json["updated"], response.json["deleted"]) == (1, 2, 1)
+    db.session.remove()
+    assert_matches_rebuild()
+
+
+def test_missing_region_matches_rebuild(client, uploaded_csv):
+    db.session.execute(db.text("INSERT INTO producers (id, name, region_id) VALUES (9000, 'Orphan', 9999)"))
+    db.session.commit()
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_id": 9000})
+    assert response.status_code == 201
+    assert None in [g["key"] for g in client.get("/stats/region").get_json()]
+    db.session.remove()
+    assert_matches_rebuild()
+
+
+def test_get_stats(client, uploaded_csv):
+    response = client.get("/stats")
+    assert response.status_code == 200
+    body = response.get_json()
+    wines = Wine.query.all()
+    assert body["wines"] == len(wines)
+    assert body["bottles"] == sum(w.quantity for w in wines)
+    assert "country" in body["dimensions"]
+
+
+@pytest.mark.parametrize("dimension", stats.DIMENSIONS)
+def test_get_stats_by(client, uploaded_csv, dimension):
+    response = client.get(f"/stats/{dimension}")
+    assert response.status_code == 200
+    groups = response.get_json()
+    assert sum(g["wines"] for g in groups) == Wine.query.count()
+    bottles = [g["bottles"] for g in groups]
+    assert bottles == sorted(bottles, reverse=True)
+    assert all((g["name"] is not None) == (dimension in stats.NAMED) for g in groups)
+
+
+def test_get_stats_by_country_values(client, uploaded_csv):
+    spain = next(g for g in client.get("/stats/country").get_json() if g["name"] == "Spain")
+    wines = [w for w in Wine.query.all() if w.producer.region.country.name == "Spain"]
+    assert spain["wines"] == len(wines)
+    assert spain["bottles"] == sum(w.quantity for w in wines)
+    rated = [w.rating for w in wines if w.rating is not None]
+    assert spain["avg_rating"] == round(sum(rated) / len(rated), 1)
+
+
+def test_get_stats_invalidated_by_write(client, uploaded_csv):
+    first = client.get("/stats/color")
+    wine = Wine.query.first()
+    client.post(f"/wines/{wine.id}/adjust", json={"delta": 1})
+    second = client.get("/stats/color", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert sum(g["bottles"] for g in second.get_json()) == sum(g["bottles"] for g in first.get_json()) + 1
+
+
+def test_get_stats_invalid_dimension(client):
+    response = client.get("/stats/varietal")
+    assert response.status_code == 400
+    assert "Invalid dimension" in response.get_json()["error"]
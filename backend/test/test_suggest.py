@@ -0,0 +1,147 @@
+"""
+Suggest tests.
+
+Unit tests for the prefix index and tests for GET /suggest staying in
+step with writes.
+"""
+
+import pytest
+from sqlalchemy import event
+from models import db
+from models.wine import Wine
+from models.producer import Producer
+from utilities import suggest
+from utilities.suggest import PrefixIndex
+
+
+@pytest.fixture
+def no_refresh(monkeypatch):
+    monkeypatch.setattr(suggest, "REFRESH_SECONDS", 3600)   #only writes of this process change the index
+
+
+@pytest.fixture
+def statements(client):
+    recorded = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def names(client, field, prefix, **params) -> list:
+    response = client.get("/suggest", query_string={"field": field, "prefix": prefix, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_prefix_index_matches_any_word():
+    index = PrefixIndex({1: "Pol Roger", 2: "Roederer", 3: "Château Rayas"}, {1: 5, 2: 9})
+    assert [s["name"] for s in index.top("ro", 10)] == ["Roederer", "Pol Roger"]
+    assert [s["name"] for s in index.top("CHATEAU r", 10)] == ["Château Rayas"]
+    assert index.top("ray", 10) == [{"id": 3, "name": "Château Rayas", "wines": 0}]
+    assert index.top("x", 10) == []
+    assert len(index.top("r", 1)) == 1
+
+
+def test_prefix_index_updates():
+    index = PrefixIndex({1: "Pol Roger"}, {1: 1})
+    index.add({2: "Pommery"})
+    index.count({2: 3, 1: -1})
+    assert index.top("po", 10) == [{"id": 2, "name": "Pommery", "wines": 3},
+        {"id": 1, "name": "Pol Roger", "wines": 0}]
+
+
+def test_suggest_ranked_by_wines(client, uploaded_csv):
+    results = names(client, "country", "u")
+    assert results
+    for result in results:
+        assert result["wines"] == Wine.query.join(Wine.producer).join(Producer.region) \
+            .filter_by(country_id=result["id"]).count()
+    wines = [r["wines"] for r in results]
+    assert wines == sorted(wines, reverse=True)
+
+
+def test_suggest_warm_queries_nothing(client, uploaded_csv, no_refresh, statements):
+    names(client, "producer", "ma")
+    statements.clear()
+    assert names(client, "producer", "mar")
+    assert statements == []
+
+
+def test_suggest_follows_writes(client, uploaded_csv, no_refresh):
+    assert names(client, "producer", "pol") == []
+    region = names(client, "region", "champagne")[0]
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_name": "Pol Roger",
+        "region_name": "Champagne", "country_name": "France"})
+    id = response.get_json()["id"]
+    producer = names(client, "producer", "pol")
+    assert producer == [{"id": producer[0]["id"], "name": "Pol Roger", "wines": 1}]
+    assert names(client, "region", "champagne")[0] == {**region, "wines": region["wines"] + 1}
+
+    client.post("/wines/batch", json=[{"name": "Rosé", "vintage": 2015, "producer_id": producer[0]["id"]}])
+    assert names(client, "producer", "roger")[0]["wines"] == 2
+
+    #rolled back duplicate changes nothing
+    assert client.post("/wines", json={"name": "Brut", "vintage": 2012,
+        "producer_id": producer[0]["id"]}).status_code == 409
+    assert names(client, "producer", "roger")[0]["wines"] == 2
+
+    client.delete(f"/wines/{id}")
+    assert names(client, "producer", "roger")[0]["wines"] == 1
+
+
+def other_process(statement, **params):
+    """Write as another process would, without this process's version bookkeeping."""
+    db.session.execute(db.text(statement), params)
+    db.session.commit()
+
+
+def test_suggest_reloads_after_other_writers(client, uploaded_csv, monkeypatch):
+    names(client, "producer", "ma")
+    loaded = suggest._indexes["producer"]
+    monkeypatch.setattr(suggest, "_checked_at", 0)
+    names(client, "producer", "ma")
+    assert suggest._indexes["producer"] is loaded     #versions unchanged
+
+    other_process("INSERT INTO producers (name, region_id) VALUES ('Marcassin', 1)")
+    other_process("UPDATE table_versions SET version = version + 1 WHERE name = 'producers'")
+    monkeypatch.setattr(suggest, "_checked_at", 0)
+    assert "Marcassin" in [r["name"] for r in names(client, "producer", "marc")]
+
+
+def test_suggest_own_writes_keep_index(client, uploaded_csv, monkeypatch):
+    names(client, "producer", "ma")
+    loaded = suggest._indexes["producer"]
+    response = client.post("/wines", json={"name": "Brut", "vintage": 2012, "producer_name": "Pol Roger",
+        "region_name": "Champagne", "country_name": "France"})
+    client.delete(f"/wines/{response.get_json()['id']}")
+    monkeypatch.setattr(suggest, "_checked_at", 0)
+    assert names(client, "producer", "pol")[0]["wines"] == 0
+    assert suggest._indexes["producer"] is loaded
+
+
+def test_suggest_recounts_after_other_wine_writes(client, uploaded_csv, monkeypatch):
+    top = names(client, "producer", "ma")[0]
+    loaded = suggest._indexes["producer"]
+    other_process("UPDATE wine_stats SET wines = wines + 100 WHERE dimension = 'producer' AND `key` = :key",
+        key=str(top["id"]))
+    other_process("UPDATE table_versions SET version = version + 1 WHERE name = 'wines'")
+    monkeypatch.setattr(suggest, "_checked_at", 0)
+    assert names(client, "producer", "ma")[0] == {**top, "wines": top["wines"] + 100}
+    assert suggest._indexes["producer"] is loaded
+
+
+def test_suggest_after_upload(client, uploaded_csv, no_refresh):
+    names(client, "country", "s")
+    with open("test/wines.csv", "rb") as file:
+        client.post("/csv", data={"file": (file, "test.csv")}, content_type="multipart/form-data")
+    assert names(client, "country", "spain")[0]["wines"] == next(
+        g["wines"] for g in client.get("/stats/country").get_json() if g["name"] == "Spain")
+
+
+@pytest.mark.parametrize("query", ["field=grape&prefix=a", "field=producer", "field=producer&prefix=%20",
+    "field=producer&prefix=a&limit=0", "field=producer&prefix=a&limit=51"])
+def test_suggest_invalid(client, query):
+    assert client.get(f"/suggest?{query}").status_code == 400
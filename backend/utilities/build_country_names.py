@@ -0,0 +1,92 @@
+"""
+Generate models/country_names.py from pycountry.
+
+The generated module holds a single dict mapping every accepted spelling of
+a country, normalized with models.country.normalize_name, to the canonical
+pycountry name stored in the database. Accepted spellings are the ISO
+name, official and common names, alpha-2 and alpha-3 codes, and the
+aliases below.
+
+Usage, from the backend directory after upgrading pycountry:
+    python -m utilities.build_country_names
+"""
+
+import os
+import pprint
+import pycountry
+from models.country import normalize_name
+
+OUTPUT = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "models", "country_names.py"))
+
+#other spellings in use on labels and in cellar exports, by alpha-2 code
+ALIASES = {
+    "US": ["USA", "U.S.A.", "U.S.", "America", "Estados Unidos"],
+    "GB": ["UK", "U.K.", "Great Britain", "Britain", "England", "Scotland", "Wales", "Northern Ireland"],
+    "DE": ["Deutschland", "Allemagne", "Alemania", "Germania"],
+    "FR": ["Frankreich", "Francia"],
+    "IT": ["Italia", "Italien", "Italie"],
+    "ES": ["España", "Spanien", "Espagne", "Spagna"],
+    "AT": ["Österreich", "Autriche"],
+    "CH": ["Schweiz", "Suisse", "Svizzera"],
+    "NL": ["Holland", "The Netherlands", "Nederland"],
+    "GR": ["Hellas"],
+    "HU": ["Magyarország"],
+    "HR": ["Hrvatska"],
+    "SI": ["Slovenija"],
+    "RU": ["Russia"],
+    "TR": ["Turkey"],
+    "MK": ["Macedonia"],
+    "SZ": ["Swaziland"],
+    "CV": ["Cape Verde"],
+    "CI": ["Ivory Coast"],
+    "VA": ["Vatican", "Vatican City"],
+    "CD": ["DR Congo", "DRC"],
+    "NZ": ["Aotearoa"],
+}
+
+HEADER = '''"""
+Country name lookup table.
+
+Generated by utilities/build_country_names.py from pycountry; do not edit.
+Maps normalized spellings, codes and aliases to canonical country names.
+"""
+
+'''
+
+
+def build() -> dict:
+    """
+    Collect every accepted spelling of every country.
+
+    Returns:
+        dict: Mapping of normalized spelling to canonical name.
+
+    Raises:
+        ValueError: If one spelling would map to two countries.
+    """
+    names = {}
+    def add(spelling, name):
+        key = normalize_name(spelling)
+        if names.setdefault(key, name) != name:
+            raise ValueError(f"'{spelling}' matches both '{names[key]}' and '{name}'")
+
+    for c in pycountry.countries:
+        for spelling in (c.name, getattr(c, "official_name", None), getattr(c, "common_name", None),
+                c.alpha_2, c.alpha_3):
+            if spelling:
+                add(spelling, c.name)
+    for code, aliases in ALIASES.items():
+        name = pycountry.countries.get(alpha_2=code).name
+        for alias in aliases:
+            add(alias, name)
+    return names
+
+
+if __name__ == "__main__":
+    names = build()
+    with open(OUTPUT, "w", encoding="utf-8", newline="\r\n") as file:
+        file.write(HEADER)
+        file.write("COUNTRY_NAMES = ")
+        file.write(pprint.pformat(names, width=100))
+        file.write("\n")
+    print(f"Wrote {len(names)} spellings of {len(set(names.values()))} countries to {OUTPUT}")
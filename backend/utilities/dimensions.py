@@ -0,0 +1,298 @@
+"""
+Set-based find-or-create for countries, regions and producers.
+
+Each level is resolved with one SELECT mapping names to IDs and, only when
+some names are new, one insert-or-ignore batch and a SELECT for those,
+regardless of how many names there are. Inserting bumps the table version.
+
+Resolved names are kept in a bounded in-process name -> ID cache per table,
+so creating a wine for an existing producer issues no dimension queries.
+Entries found or created inside a transaction only become visible to other
+requests once it commits; a rollback discards them.
+
+Dimension rows are only ever deleted all at once, by csv_io.clear_database,
+which also bumps the GENERATION counter in table_versions. Every process
+compares it with the one its caches were filled at, at most every
+check_seconds, and drops them when it moved, so other worker processes stop
+handing out the deleted IDs.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from models.country import Country
+from models.region import Region
+from models.producer import Producer
+from models import db
+from utilities.upsert import upsert
+import utilities.versions as versions
+import utilities.suggest as suggest
+
+CACHE_SIZE = 10000  #names per table
+CHECK_SECONDS = 1   #between checks for dimension rows deleted by other processes
+GENERATION = "dimension_generation"     #table_versions row bumped when dimension rows are deleted
+
+
+class NameCache:
+    """
+    Thread-safe LRU mapping of dimension names to IDs.
+
+    Args:
+        size (int): Maximum number of names kept; least recently used go first.
+    """
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._ids = OrderedDict()   #name -> id, oldest first
+        self._names = {}    #id -> name
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Return the ID of a name, or None if it is not cached."""
+        with self._lock:
+            id = self._ids.get(name)
+            if id is not None:
+                self._ids.move_to_end(name)
+            return id
+
+    def has_id(self, id: int) -> bool:
+        """Return True if a row with this ID is cached."""
+        with self._lock:
+            return id in self._names
+
+    def name(self, id: int):
+        """Return the name of a cached ID, or None if it is not cached."""
+        with self._lock:
+            return self._names.get(id)
+
+    def update(self, mapping: dict):
+        """Add or refresh name -> ID entries, evicting the least recently used."""
+        with self._lock:
+            for name, id in mapping.items():
+                old = self._ids.pop(name, None)
+                if old is not None:
+                    self._names.pop(old, None)
+                self._ids[name] = id
+                self._names[id] = name
+            while len(self._ids) > self.size:
+                name, id = self._ids.popitem(last=False)
+                self._names.pop(id, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+    def __len__(self):
+        return len(self._ids)
+
+
+_caches = {Country: NameCache(), Region: NameCache(), Producer: NameCache()}
+_listeners = []     #functions dropping other caches keyed by dimension IDs
+_check = {"seconds": CHECK_SECONDS, "at": 0, "generation": None}
+_check_lock = threading.Lock()
+
+
+def configure_cache(size: int, check_seconds: float = CHECK_SECONDS):
+    """
+    Set the number of names cached per table.
+
+    Args:
+        size (int): Maximum entries per table.
+        check_seconds (float): Seconds between checks for dimension rows
+            deleted by other processes.
+    """
+    for model in _caches:
+        _caches[model] = NameCache(size)
+    _check["seconds"] = check_seconds
+
+
+def on_clear(listener):
+    """
+    Register a function to call whenever the cached IDs are dropped.
+
+    Args:
+        listener (function): Called with no arguments.
+    """
+    _listeners.append(listener)
+
+
+def clear_cache():
+    """Drop every cached name, e.g. after the dimension tables are emptied."""
+    for cache in _caches.values():
+        cache.clear()
+    for listener in _listeners:
+        listener()
+    with _check_lock:
+        _check["at"] = 0
+        _check["generation"] = None     #the next check adopts the new generation
+
+
+def check():
+    """Drop the caches if another process deleted dimension rows since they were filled."""
+    now = time.monotonic()
+    if now - _check["at"] < _check["seconds"]:
+        return
+    generation, = versions.current(GENERATION)
+    with _check_lock:
+        moved = _check["generation"] is not None and generation != _check["generation"]
+        _check["generation"] = generation
+        _check["at"] = now
+    if moved:
+        clear_cache()
+        with _check_lock:
+            _check["generation"] = generation
+            _check["at"] = now
+
+
+def warm():
+    """Fill the caches from the database, up to their size, with one SELECT per table."""
+    check()
+    for model, cache in _caches.items():
+        cache.update({name: id for name, id in
+            db.session.query(model.name, model.id).order_by(model.id).limit(cache.size)})
+
+
+def _stage(model, mapping: dict):
+    """Remember entries until the current transaction commits."""
+    if mapping:
+        db.session.info.setdefault("dimension_cache", []).append((model, mapping))
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish(session):
+    for model, mapping in session.info.pop("dimension_cache", []):
+        _caches[model].update(mapping)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _discard(session, transaction):
+    #runs after _publish on commit, and alone on rollback or close
+    if transaction.parent is None:
+        session.info.pop("dimension_cache", None)
+
+
+def _resolve(model, records: list) -> dict:
+    """Map every record's name to its ID, inserting the names that are new."""
+    check()
+    cache = _caches[model]
+    result = {}
+    missing = []
+    for record in records:
+        id = cache.get(record["name"])
+        if id is None:
+            missing.append(record)
+        else:
+            result[record["name"]] = id
+    if missing:
+        found = _lookup(model, {r["name"] for r in missing})
+        new = [r for r in missing if r["name"] not in found]
+        if new:
+            #insert-or-ignore, a concurrent request may have just created some of them
+            upsert(model.__table__, new, ["name"], [])
+            created = _lookup(model, {r["name"] for r in new})
+            suggest.stage(model, names={id: name for name, id in created.items()})
+            found.update(created)
+            versions.bump(model.__tablename__)
+        _stage(model, found)
+        result.update(found)
+    return result
+
+
+def _lookup(model, names: set) -> dict:
+    """Map names that exist to their IDs with one SELECT."""
+    return {name: id for name, id in
+        db.session.query(model.name, model.id).filter(model.name.in_(names))}
+
+
+def resolve_countries(names) -> dict:
+    """
+    Find or create countries by name.
+
+    Args:
+        names (iterable[str]): Validated country names.
+
+    Returns:
+        dict: Mapping of country name to database ID.
+    """
+    return _resolve(Country, [{"name": name} for name in set(names)])
+
+
+def resolve_regions(regions: dict) -> dict:
+    """
+    Find or create regions by name.
+
+    Args:
+        regions (dict): Mapping of validated region name to country ID,
+            used when the region has to be created.
+
+    Returns:
+        dict: Mapping of region name to database ID.
+    """
+    return _resolve(Region, [{"name": name, "country_id": country_id}
+        for name, country_id in regions.items()])
+
+
+def resolve_producers(producers: dict) -> dict:
+    """
+    Find or create producers by name.
+
+    Args:
+        producers (dict): Mapping of validated producer name to region ID,
+            used when the producer has to be created.
+
+    Returns:
+        dict: Mapping of producer name to database ID.
+    """
+    return _resolve(Producer, [{"name": name, "region_id": region_id}
+        for name, region_id in producers.items()])
+
+
+def names(model, ids) -> dict:
+    """
+    Map IDs of a dimension table to names, querying only the uncached ones.
+
+    Args:
+        model: Country, Region or Producer.
+        ids (iterable[int]): IDs to look up.
+
+    Returns:
+        dict: Mapping of ID to name for the IDs that exist.
+    """
+    check()
+    cache = _caches[model]
+    result = {}
+    for id in set(ids):
+        name = cache.name(id)
+        if name is not None:
+            result[id] = name
+    missing = set(ids) - result.keys()
+    if missing:
+        rows = db.session.query(model.name, model.id).filter(model.id.in_(missing)).all()
+        _stage(model, {name: id for name, id in rows})
+        result.update({id: name for name, id in rows})
+    return result
+
+
+def existing_ids(model, ids) -> set:
+    """
+    Find which IDs of a dimension table exist, querying only the uncached ones.
+
+    Args:
+        model: Country, Region or Producer.
+        ids (iterable[int]): IDs to check.
+
+    Returns:
+        set: The IDs that exist.
+    """
+    check()
+    cache = _caches[model]
+    ids = set(ids)
+    found = {id for id in ids if cache.has_id(id)}
+    if ids - found:
+        rows = db.session.query(model.name, model.id).filter(model.id.in_(ids - found)).all()
+        _stage(model, {name: id for name, id in rows})
+        found.update(id for _, id in rows)
+    return found
@@ -0,0 +1,58 @@
+"""
+Fast JSON provider.
+
+Serializes responses with orjson when it is installed, falling back to
+Flask's stdlib based provider otherwise. Output keeps Flask's conventions:
+sorted keys, HTTP dates for datetimes and the same handling of Decimal,
+UUID and dataclasses.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:     #optional, the stdlib provider is used instead
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, pretty printing through the stdlib."""
+
+    def _options(self) -> int:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:  #indent, separators and such are stdlib only
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def provider(app, fast: bool = True):
+    """
+    Pick the JSON provider for an app.
+
+    Args:
+        app: Flask app.
+        fast (bool): Use orjson if it is installed.
+
+    Returns:
+        JSONProvider: OrjsonProvider, or Flask's default provider.
+    """
+    if fast and orjson is not None:
+        return OrjsonProvider(app)
+    return DefaultJSONProvider(app)
@@ -0,0 +1,169 @@
+"""
+Keyset pagination helpers.
+
+Pages list queries with opaque cursors that seek past the last row seen
+instead of using OFFSET, so every page costs the same as the first.
+"""
+
+import base64
+import json
+import math
+from flask import request, url_for, jsonify
+from sqlalchemy import and_, or_
+from models import MAX_ID
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the key values of the last row on a page into an opaque cursor.
+
+    Args:
+        values (list): Key values of the last row, in sort order.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Cursor string from the request.
+
+    Returns:
+        list: Key values of the last row on the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"Invalid cursor: '{cursor}'")
+    return values
+
+
+def validate_limit(limit) -> int:
+    """
+    Validate page size.
+
+    Args:
+        limit: Input value to validate, or None for the default.
+
+    Returns:
+        int: Validated page size.
+
+    Raises:
+        ValueError: If limit is not an integer between 1 and MAX_LIMIT.
+    """
+    if limit is None or limit == "":
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {limit}.  Must be integer.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"Invalid limit: {limit}. Out of range 1 - {MAX_LIMIT}.")
+    return limit
+
+
+def paginate(query, column, limit: int, cursor: str = None, sort=None, descending: bool = False):
+    """
+    Fetch one page of a query ordered by a unique integer column.
+
+    When a sort column is given the page is ordered by (sort, column) and
+    the cursor carries both values. NULL sort values are treated as the
+    lowest, matching the default ordering of SQLite and MySQL.
+
+    Args:
+        query: SQLAlchemy query to page through.
+        column: Unique column to order and seek on, usually the primary key.
+        limit (int): Page size.
+        cursor (str): Cursor from the previous page, or None for the first page.
+        sort: Optional non-unique column to order by before column.
+        descending (bool): Order descending instead of ascending.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    keys = [column] if sort is None else [sort, column]
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys) or not isinstance(values[-1], int) or isinstance(values[-1], bool) \
+                or not 0 <= values[-1] <= MAX_ID:
+            raise ValueError(f"Invalid cursor: '{cursor}'")
+        #sort values are bound as parameters, only scalars the driver can hold can be
+        if len(values) == 2 and not _bindable(values[0]):
+            raise ValueError(f"Invalid cursor: '{cursor}'")
+        query = query.filter(_seek(keys, values, descending))
+
+    order = [k.desc() if descending else k.asc() for k in keys]
+
+    #fetch one extra row to know if there is a next page
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], k.key) for k in keys])
+
+
+def _bindable(value) -> bool:
+    """Whether a decoded sort value is a scalar that fits a database column."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -MAX_ID - 1 <= value <= MAX_ID
+    if isinstance(value, float):
+        return math.isfinite(value)     #json accepts NaN and Infinity
+    return isinstance(value, (str, type(None)))
+
+
+def _seek(keys: list, values: list, descending: bool):
+    """Build the WHERE clause selecting rows after the cursor position."""
+    if len(keys) == 1:
+        return keys[0] < values[0] if descending else keys[0] > values[0]
+
+    sort, column = keys
+    value, last = values
+    after = column < last if descending else column > last
+    if value is None:
+        if descending:
+            return and_(sort.is_(None), after)
+        return or_(and_(sort.is_(None), after), sort.isnot(None))
+    if descending:
+        return or_(sort < value, and_(sort == value, after), sort.is_(None))
+    return or_(sort > value, and_(sort == value, after))
+
+
+def page_response(result: list, next_cursor: str, limit: int):
+    """
+    Build a JSON list response with an RFC 8288 'next' Link header.
+
+    Args:
+        result (list): Serialized rows of the current page.
+        next_cursor (str): Cursor of the next page, or None on the last page.
+        limit (int): Page size to carry over to the next link.
+
+    Returns:
+        Response: JSON response with status 200.
+    """
+    response = jsonify(result)
+    if next_cursor:
+        args = request.args.to_dict()
+        args.update(cursor=next_cursor, limit=limit)
+        url = url_for(request.endpoint, **request.view_args, **args)
+        response.headers["Link"] = f'<{url}>; rel="next"'
+    return response
@@ -0,0 +1,327 @@
+"""
+Response cache for read endpoints.
+
+Caches the serialized body of successful GET responses under the request's
+ETag, which already combines the URL with the versions of the tables read.
+A write bumps those versions, so it invalidates exactly the entries built
+from the tables it changed and nothing else.
+
+Stores are pluggable: MemoryStore is a per-process LRU, SqliteStore is a
+file shared by every worker process on the host, and TieredStore puts the
+first in front of the second. Concurrent misses on the same key are
+coalesced so only one thread, and with a shared store only one process,
+runs the view.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from utilities.sqlite import ThreadConnections
+
+CACHED_HEADERS = ("Content-Type", "Link")   #headers stored with the body
+PURGE_EVERY = 256   #sets between purges of expired shared entries
+
+
+class MemoryStore:
+    """
+    Thread-safe LRU of response entries held by this process.
+
+    Args:
+        size (int): Maximum number of entries.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the entry stored under key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: tuple):
+        """Store an entry, evicting the least recently used."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def lease(self, key: str, seconds: float) -> bool:
+        """Threads of one process are coalesced by ResponseCache, nothing to share."""
+        return True
+
+    def release(self, key: str):
+        pass
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteStore:
+    """
+    TTL store of response entries in a SQLite file shared between processes.
+
+    Also holds short leases so that only one process rebuilds a missing entry.
+
+    Args:
+        path (str): Database file.
+        ttl (float): Seconds an entry is kept.
+    """
+
+    def __init__(self, path: str, ttl: float = 300):
+        self.path = path
+        self.ttl = ttl
+        self._sets = 0
+        self._connections = ThreadConnections(path, [
+            """CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                expires_at REAL NOT NULL)""",
+            """CREATE TABLE IF NOT EXISTS response_leases (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL)"""])
+
+    def _connect(self):
+        return self._connections.connect()
+
+    def get(self, key: str):
+        """Return the fresh entry stored under key, or None."""
+        row = self._connect().execute(
+            "SELECT body, headers FROM response_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), tuple(tuple(h) for h in json.loads(row[1]))
+
+    def set(self, key: str, entry: tuple):
+        """Store an entry for ttl seconds, purging expired entries now and then."""
+        body, headers = entry
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, headers, body, expires_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(headers), body, now + self.ttl))
+        self._sets += 1
+        if self._sets % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM response_leases WHERE expires_at <= ?", (now,))
+
+    def lease(self, key: str, seconds: float) -> bool:
+        """
+        Try to become the process that builds key.
+
+        Args:
+            key (str): Entry key.
+            seconds (float): How long the lease holds if it is never released.
+
+        Returns:
+            bool: True if no other process holds a live lease on key.
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            """INSERT INTO response_leases (key, expires_at) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at
+            WHERE response_leases.expires_at <= ?""",
+            (key, now + seconds, now))
+        return cursor.rowcount == 1
+
+    def release(self, key: str):
+        """Give up a lease taken with lease."""
+        self._connect().execute("DELETE FROM response_leases WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM response_cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+
+class TieredStore:
+    """
+    Per-process MemoryStore in front of a shared store.
+
+    Args:
+        local: Store checked first, usually a MemoryStore.
+        shared: Store shared between processes, usually a SqliteStore.
+    """
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: str):
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: tuple):
+        self.shared.set(key, entry)
+        self.local.set(key, entry)
+
+    def lease(self, key: str, seconds: float) -> bool:
+        return self.shared.lease(key, seconds)
+
+    def release(self, key: str):
+        self.shared.release(key)
+
+    def __len__(self):
+        return len(self.shared)
+
+
+class ResponseCache:
+    """
+    Serve views from a store, running each view once per key.
+
+    Args:
+        store: MemoryStore, SqliteStore or TieredStore.
+        wait (float): Seconds to wait for another thread or process to build
+            an entry before building it anyway.
+        poll (float): Seconds between checks of the store while waiting on
+            another process.
+    """
+
+    def __init__(self, store, wait: float = 10, poll: float = 0.05):
+        self.store = store
+        self.wait = wait
+        self.poll = poll
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._building = {}     #key -> Event set when the leader finishes
+        self._lock = threading.Lock()
+
+    def fetch(self, key: str, view):
+        """
+        Return the cached response for key, building it with view on a miss.
+
+        Only 200 responses are stored; anything else is returned uncached.
+
+        Args:
+            key (str): Entry key, the response's ETag.
+            view (function): Builds the response, called with no arguments.
+
+        Returns:
+            Response: Flask response.
+        """
+        entry = self.store.get(key)
+        if entry is not None:
+            self._count("hits")
+            return _response(entry)
+
+        with self._lock:
+            done = self._building.get(key)
+            leader = done is None
+            if leader:
+                done = self._building[key] = threading.Event()
+        if not leader:
+            #another thread of this process is building the entry
+            done.wait(self.wait)
+            entry = self.store.get(key)
+            if entry is not None:
+                self._count("coalesced")
+                return _response(entry)
+            self._count("misses")
+            return current_app.make_response(view())
+
+        try:
+            return self._build(key, view)
+        finally:
+            with self._lock:
+                del self._building[key]
+            done.set()
+
+    def _build(self, key: str, view):
+        """Build an entry as this process's leader, waiting on other processes first."""
+        if not self.store.lease(key, self.wait):
+            deadline = time.monotonic() + self.wait
+            while time.monotonic() < deadline:
+                time.sleep(self.poll)
+                entry = self.store.get(key)
+                if entry is not None:
+                    self._count("coalesced")
+                    return _response(entry)
+            leased = False
+        else:
+            leased = True
+
+        self._count("misses")
+        try:
+            response = current_app.make_response(view())
+            if response.status_code == 200 and not response.is_streamed:
+                headers = tuple((k, v) for k, v in response.headers.items() if k in CACHED_HEADERS)
+                self.store.set(key, (response.get_data(), headers))
+            return response
+        finally:
+            if leased:
+                self.store.release(key)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        """
+        Get counters of this process and the number of stored entries.
+
+        Returns:
+            dict: hits, misses, coalesced and entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+            "entries": len(self.store)}
+
+
+def _response(entry: tuple):
+    """Rebuild a Flask response from a stored entry."""
+    body, headers = entry
+    return current_app.response_class(body, status=200, headers=list(headers))
+
+
+_cache = None   #ResponseCache, or None to disable caching
+
+
+def configure_cache(cache):
+    """
+    Set the response cache used by versions.conditional views.
+
+    Args:
+        cache (ResponseCache or None): Cache to use, None disables caching.
+    """
+    global _cache
+    _cache = cache
+
+
+def fetch(key: str, view):
+    """
+    Serve view through the configured cache, or call it directly if there is none.
+
+    Args:
+        key (str): Entry key, the response's ETag.
+        view (function): Builds the response, called with no arguments.
+
+    Returns:
+        Response: Flask response.
+    """
+    if _cache is None:
+        return current_app.make_response(view())
+    return _cache.fetch(key, view)
+
+
+def stats() -> dict:
+    """
+    Get response cache counters.
+
+    Returns:
+        dict: enabled flag, plus hits, misses, coalesced and entries when enabled.
+    """
+    if _cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **_cache.stats()}
@@ -0,0 +1,77 @@
+"""
+In-place schema upgrade for existing databases.
+
+db.create_all() only creates missing tables, it never alters existing ones.
+upgrade() adds the columns, indexes and unique constraints the models have
+gained since a table was created, creates the new tables and fills the
+derived ones (wine stats and the search index) from the wines.
+"""
+
+from sqlalchemy import inspect, UniqueConstraint
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from models import db
+import utilities.stats as stats
+import utilities.search as search
+import utilities.versions as versions
+
+
+def _add_column(conn, table, column):
+    """ALTER TABLE ADD COLUMN with the model's column definition."""
+    quote = conn.dialect.identifier_preparer.quote
+    conn.exec_driver_sql(f"ALTER TABLE {quote(table.name)} ADD COLUMN "
+        f"{CreateColumn(column).compile(dialect=conn.dialect)}")
+
+
+def _add_unique(conn, table, constraint):
+    """Add a unique constraint as a unique index of the same name, which both dialects support."""
+    quote = conn.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(c.name) for c in constraint.columns)
+    conn.exec_driver_sql(f"CREATE UNIQUE INDEX {quote(constraint.name)} ON {quote(table.name)} ({columns})")
+
+
+def upgrade() -> list:
+    """
+    Bring an existing database up to the current models.
+
+    Returns:
+        list[str]: Description of each change made, empty if none were needed.
+
+    Raises:
+        IntegrityError: If existing rows violate a new unique constraint, ex:
+            duplicate (name, vintage, producer_id) wines. Fix the rows and run
+            it again; the changes already made are skipped.
+    """
+    changes = []
+    conn = db.session.connection()
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                _add_column(conn, table, column)
+                changes.append(f"added column {table.name}.{column.name}")
+        names = {i["name"] for i in inspector.get_indexes(table.name)}
+        names |= {c["name"] for c in inspector.get_unique_constraints(table.name)}
+        for index in table.indexes:
+            if index.name not in names:
+                conn.execute(CreateIndex(index))
+                changes.append(f"added index {index.name}")
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name and constraint.name not in names:
+                _add_unique(conn, table, constraint)
+                changes.append(f"added unique constraint {constraint.name}")
+
+    db.metadata.create_all(conn)    #new tables, and the search index
+    created = set(inspect(conn).get_table_names()) - existing_tables
+    changes += [f"created table {name}" for name in sorted(created)
+        if name in db.metadata.tables or name == "wine_search"]    #not the FTS5 shadow tables
+
+    stats.rebuild()
+    search.rebuild()
+    versions.bump("wines")
+    db.session.commit()
+    return changes
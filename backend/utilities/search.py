@@ -0,0 +1,234 @@
+"""
+Full-text wine search.
+
+Keeps one row per wine in the wine_search table holding the text users
+search by: wine name, varietal, vintage, producer name and region name,
+case and accent folded. SQLite indexes it with an FTS5 trigram table,
+MySQL with a FULLTEXT index using the ngram parser (run the server with
+ngram_token_size=3).
+
+Queries are split into trigrams, so a typo only loses the trigrams it
+touches instead of the whole word. On SQLite each word must match at least
+one of its trigrams, which keeps common trigrams from pulling in the whole
+table; only if that finds nothing is any trigram enough. The index returns
+the best candidates, which are then ranked by the share of the query's
+trigrams they contain.
+
+Write paths call index() and remove() for the wines they create or delete,
+bulk loads call rebuild(). Producer and region names never change once
+created, so other writes leave the index alone, and index() reads them
+from the dimension caches rather than joining for them.
+"""
+
+import re
+from sqlalchemy import event, func, table, column, text
+from models import db
+from models.wine import Wine
+from models.producer import Producer
+from models.region import Region
+from models.country import normalize_name
+import utilities.dimensions as dimensions
+import utilities.stats as stats
+
+TEXT_COLUMNS = ["name", "varietal", "vintage", "producer", "region"]
+CANDIDATES = 200    #rows fetched from the index before ranking
+MIN_SCORE = 0.3     #share of query trigrams a result must contain
+BATCH_SIZE = 1000   #wines indexed per statement
+
+_KEY = {"sqlite": "rowid", "mysql": "wine_id"}   #column holding the wine id
+
+_CREATE = {
+    "sqlite": f"""CREATE VIRTUAL TABLE IF NOT EXISTS wine_search
+        USING fts5({", ".join(TEXT_COLUMNS)}, tokenize='trigram')""",
+    "mysql": f"""CREATE TABLE IF NOT EXISTS wine_search (
+        wine_id INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        varietal VARCHAR(100) NOT NULL,
+        vintage VARCHAR(10) NOT NULL,
+        producer VARCHAR(255) NOT NULL,
+        region VARCHAR(255) NOT NULL,
+        FULLTEXT INDEX ft_wine_search ({", ".join(TEXT_COLUMNS)}) WITH PARSER ngram
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+}
+
+_MATCH = {
+    "sqlite": text(f"""SELECT rowid, {", ".join(TEXT_COLUMNS)} FROM wine_search
+        WHERE wine_search MATCH :query ORDER BY bm25(wine_search) LIMIT :candidates"""),
+    "mysql": text(f"""SELECT wine_id, {", ".join(TEXT_COLUMNS)} FROM wine_search
+        WHERE MATCH ({", ".join(TEXT_COLUMNS)}) AGAINST (:query IN NATURAL LANGUAGE MODE)
+        LIMIT :candidates""")    #natural language matches come back most relevant first
+}
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create(target, connection, **kw):
+    statement = _CREATE.get(connection.dialect.name)
+    if statement is not None:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(db.metadata, "after_drop")
+def _drop(target, connection, **kw):
+    if connection.dialect.name in _CREATE:
+        connection.exec_driver_sql("DROP TABLE IF EXISTS wine_search")
+
+
+def _dialect():
+    """Name of the database dialect, or None if it has no text index."""
+    dialect = db.engine.dialect.name
+    return dialect if dialect in _KEY else None
+
+
+def _table(dialect: str):
+    return table("wine_search", column(_KEY[dialect]), *(column(c) for c in TEXT_COLUMNS))
+
+
+def word_trigrams(value: str) -> list:
+    """
+    Split text into the trigrams of each word.
+
+    Args:
+        value (str): Text to split.
+
+    Returns:
+        list[set[str]]: Folded three character substrings per word; words
+        shorter than three characters are left out.
+    """
+    return [{word[i:i + 3] for i in range(len(word) - 2)}
+        for word in re.findall(r"\w+", normalize_name(value)) if len(word) >= 3]
+
+
+def trigrams(value: str) -> set:
+    """
+    Split text into the trigrams the index matches on.
+
+    Args:
+        value (str): Text to split.
+
+    Returns:
+        set[str]: Trigrams of every word of value.
+    """
+    return set().union(*word_trigrams(value))
+
+
+def _any(grams) -> str:
+    """FTS5 expression matching any of grams."""
+    return "(" + " OR ".join('"' + g.replace('"', '""') + '"' for g in sorted(grams)) + ")"
+
+
+def _rows(dialect: str, query) -> list:
+    """Turn (wine id, name, varietal, vintage, producer, region) rows into index records."""
+    key = _KEY[dialect]
+    return [{key: id, "name": normalize_name(name), "varietal": normalize_name(varietal or ""),
+        "vintage": vintage, "producer": normalize_name(producer), "region": normalize_name(region)}
+        for id, name, varietal, vintage, producer, region in query]
+
+
+def _source():
+    return (db.session.query(Wine.id, Wine.name, Wine.varietal, Wine.vintage,
+            func.coalesce(Producer.name, ""), func.coalesce(Region.name, ""))
+        .outerjoin(Producer, Wine.producer_id == Producer.id)     #keep wines with missing parents
+        .outerjoin(Region, Producer.region_id == Region.id))
+
+
+def _insert(dialect: str, records: list):
+    for start in range(0, len(records), BATCH_SIZE):
+        db.session.execute(_table(dialect).insert(), records[start:start + BATCH_SIZE])
+
+
+def index(wines: list, new: bool = False):
+    """
+    Add or replace the index rows of wines.
+
+    Args:
+        wines (list): Wine objects or dicts with id, name, varietal, vintage
+            and producer_id, created or changed in this transaction.
+        new (bool): The wines were just created so have no rows to replace.
+    """
+    dialect = _dialect()
+    if dialect is None or not wines:
+        return
+    wines = [w if isinstance(w, dict) else {c: getattr(w, c) for c in
+        ("id", "name", "varietal", "vintage", "producer_id")} for w in wines]
+    producer_ids = {w["producer_id"] for w in wines}
+    parents = stats.places(producer_ids)
+    producers = dimensions.names(Producer, producer_ids)
+    regions = dimensions.names(Region, {region_id for region_id, _ in parents.values()})
+    regions[None] = ""  #a producer whose region row is missing, like the outer join of rebuild()
+    if not new:
+        remove(w["id"] for w in wines)
+    _insert(dialect, _rows(dialect, [(w["id"], w["name"], w["varietal"], w["vintage"],
+        producers.get(w["producer_id"], ""), regions[parents.get(w["producer_id"], (None, None))[0]])
+        for w in wines]))
+
+
+def remove(wine_ids):
+    """
+    Drop the index rows of wines.
+
+    Args:
+        wine_ids (iterable[int]): IDs of wines deleted in this transaction.
+    """
+    dialect = _dialect()
+    ids = sorted(set(wine_ids))
+    if dialect is None or not ids:
+        return
+    search_table = _table(dialect)
+    db.session.execute(search_table.delete().where(search_table.c[_KEY[dialect]].in_(ids)))
+
+
+def remove_all():
+    """Empty the index, e.g. when every wine is deleted."""
+    dialect = _dialect()
+    if dialect is not None:
+        db.session.execute(_table(dialect).delete())
+
+
+def rebuild():
+    """Re-index every wine, e.g. after a CSV import."""
+    dialect = _dialect()
+    if dialect is None:
+        return
+    remove_all()
+    _insert(dialect, _rows(dialect, _source().order_by(Wine.id)))
+
+
+def search(query: str, limit: int) -> list:
+    """
+    Find the wines best matching a free text query.
+
+    Args:
+        query (str): Words from any of the indexed columns, in any order.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list[tuple]: (wine id, score) pairs, best first. score is the share
+        of the query's trigrams found in the wine's text, from MIN_SCORE to 1.
+
+    Raises:
+        ValueError: If the query has no word of three or more characters or
+            the database has no text index.
+    """
+    dialect = _dialect()
+    if dialect is None:
+        raise ValueError(f"Search not supported for dialect: {db.engine.dialect.name}")
+    words = word_trigrams(query or "")
+    if not words:
+        raise ValueError(f"Invalid query: {query}.  Must have a word of at least 3 characters.")
+    grams = set().union(*words)
+
+    params = {"candidates": max(CANDIDATES, limit)}
+    if dialect == "sqlite":
+        rows = db.session.execute(_MATCH[dialect], {"query": " AND ".join(map(_any, words)), **params}).all()
+        if not rows and len(words) > 1:
+            rows = db.session.execute(_MATCH[dialect], {"query": _any(grams), **params}).all()
+    else:
+        rows = db.session.execute(_MATCH[dialect], {"query": normalize_name(query), **params}).all()
+
+    scored = []
+    for order, (id, *values) in enumerate(rows):
+        score = len(grams & trigrams(" ".join(values))) / len(grams)
+        if score >= MIN_SCORE:
+            scored.append((-score, order, id))
+    scored.sort()
+    return [(id, round(-score, 3)) for score, order, id in scored[:limit]]
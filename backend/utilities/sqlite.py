@@ -0,0 +1,37 @@
+"""
+Per-thread SQLite connections for the file backed caches.
+
+sqlite3 connections cannot be shared between threads, so every thread opens
+its own, in autocommit mode with WAL journaling so readers don't block the
+writer, and creates the tables on first use.
+"""
+
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """
+    One SQLite connection per thread to a database file.
+
+    Args:
+        path (str): Database file.
+        schema (list[str]): CREATE TABLE IF NOT EXISTS statements run on
+            each new connection.
+    """
+
+    def __init__(self, path: str, schema: list):
+        self.path = path
+        self.schema = list(schema)
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open this thread's connection and create the tables on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")     #readers don't block the writer
+            for statement in self.schema:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
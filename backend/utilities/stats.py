@@ -0,0 +1,251 @@
+"""
+Incrementally maintained inventory statistics.
+
+Wine counts, bottle counts and rating totals are kept per country, region,
+producer, color, type and vintage in the wine_stats table. Write paths
+snapshot the wines they change before and after the change and apply the
+difference with one increment upsert, so reads never GROUP BY the wines
+table. rebuild() recomputes everything after bulk loads.
+
+A producer never changes region, so the region and country of each producer
+seen are cached in process and only become visible once the transaction
+that read them commits, like the dimension name cache. A wine whose
+producer or region row is missing counts under the empty region and
+country groups, both incrementally and in rebuild().
+"""
+
+import threading
+from collections import defaultdict
+from sqlalchemy import func, event
+from models import db
+from models.wine import Wine
+from models.producer import Producer
+from models.region import Region
+from models.country import Country
+from models.wine_stat import WineStat
+from utilities.upsert import increment
+import utilities.suggest as suggest
+import utilities.dimensions as dimensions
+
+DIMENSIONS = ("country", "region", "producer", "color", "type", "vintage")
+NAMED = {"country": Country, "region": Region, "producer": Producer}   #keys are ids of these
+COUNTERS = ["wines", "bottles", "rated", "rating_sum"]
+
+#wine columns a snapshot needs to place a wine in its groups
+SNAPSHOT_COLUMNS = (Wine.id, Wine.producer_id, Wine.color, Wine.type, Wine.vintage,
+    Wine.quantity, Wine.rating)
+
+PARENTS_SIZE = 10000    #producers whose region and country are cached
+
+_parents = {}   #producer id -> (region id, country id)
+_parents_lock = threading.Lock()
+
+_GROUP_COLUMNS = {
+    "country": Region.country_id,
+    "region": Region.id,    #not Producer.region_id, a missing region groups like in apply()
+    "producer": Wine.producer_id,
+    "color": Wine.color,
+    "type": Wine.type,
+    "vintage": Wine.vintage
+}
+
+
+def clear_cache():
+    """Drop every cached producer, e.g. after the dimension tables are emptied."""
+    with _parents_lock:
+        _parents.clear()
+
+
+dimensions.on_clear(clear_cache)    #producer IDs may be reused once the tables are emptied
+
+
+def warm():
+    """Cache the region and country of producers, up to PARENTS_SIZE, with one SELECT."""
+    with _parents_lock:
+        _parents.update({id: (region_id, country_id) for id, region_id, country_id in
+            db.session.query(Producer.id, Producer.region_id, Region.country_id)
+            .join(Region, Producer.region_id == Region.id)
+            .order_by(Producer.id).limit(PARENTS_SIZE)})
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish(session):
+    staged = session.info.pop("stats_parents", None)
+    if staged:
+        with _parents_lock:
+            if len(_parents) + len(staged) > PARENTS_SIZE:
+                _parents.clear()
+            _parents.update(staged)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _discard(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("stats_parents", None)
+
+
+def places(producer_ids: set) -> dict:
+    """
+    Map producers to their region and country, querying only uncached producers.
+
+    Args:
+        producer_ids (set[int]): Producer IDs.
+
+    Returns:
+        dict: Mapping of producer ID to (region ID, country ID).
+    """
+    dimensions.check()
+    with _parents_lock:
+        result = {id: _parents[id] for id in producer_ids if id in _parents}
+    missing = producer_ids - result.keys()
+    if missing:
+        found = {id: (region_id, country_id) for id, region_id, country_id in
+            db.session.query(Producer.id, Producer.region_id, Region.country_id)
+            .join(Region, Producer.region_id == Region.id)
+            .filter(Producer.id.in_(missing))}
+        db.session.info.setdefault("stats_parents", {}).update(found)
+        result.update(found)
+    return result
+
+
+def snapshot(ids, lock: bool = True) -> dict:
+    """
+    Read the grouping columns of wines about to change.
+
+    Args:
+        ids (iterable[int]): Wine IDs.
+        lock (bool): Lock the rows until commit so concurrent writers
+            cannot change them between the snapshot and the write.
+
+    Returns:
+        dict: Mapping of wine ID to a snapshot dict, missing wines left out.
+    """
+    ids = set(ids)
+    if not ids:
+        return {}
+    query = db.session.query(*SNAPSHOT_COLUMNS).filter(Wine.id.in_(ids))
+    if lock:
+        query = query.with_for_update()
+    return {row.id: row._asdict() for row in query}
+
+
+def snapshot_of(wine) -> dict:
+    """
+    Snapshot a Wine object, or any mapping of the snapshot columns, without a query.
+
+    Args:
+        wine (Wine or dict): Wine to snapshot.
+
+    Returns:
+        dict: Values of the snapshot columns.
+    """
+    if isinstance(wine, dict):
+        return {column.key: wine.get(column.key) for column in SNAPSHOT_COLUMNS}
+    return {column.key: getattr(wine, column.key) for column in SNAPSHOT_COLUMNS}
+
+
+def _key(value) -> str:
+    return "" if value is None else str(value)
+
+
+def apply(before: list, after: list):
+    """
+    Add the difference between two sets of wine snapshots to the totals.
+
+    A created wine only has an after snapshot, a deleted one only a before
+    snapshot and a changed one both.
+
+    Args:
+        before (list[dict]): Snapshots of the wines before the change.
+        after (list[dict]): Snapshots of the wines after the change.
+    """
+    wines = before + after
+    if not wines:
+        return
+    parents = places({w["producer_id"] for w in wines})
+
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for sign, snapshots in ((-1, before), (1, after)):
+        for w in snapshots:
+            region_id, country_id = parents.get(w["producer_id"], (None, None))
+            groups = {"country": country_id, "region": region_id, "producer": w["producer_id"],
+                "color": w["color"], "type": w["type"], "vintage": w["vintage"]}
+            rated = w["rating"] is not None
+            for dimension, value in groups.items():
+                delta = deltas[(dimension, _key(value))]
+                delta[0] += sign
+                delta[1] += sign * w["quantity"]
+                delta[2] += sign * rated
+                delta[3] += sign * (w["rating"] or 0)
+
+    records = [{"dimension": dimension, "key": key, **dict(zip(COUNTERS, delta))}
+        for (dimension, key), delta in sorted(deltas.items()) if any(delta)]
+    increment(WineStat.__table__, records, ["dimension", "key"], COUNTERS)
+    for dimension, model in NAMED.items():
+        suggest.stage(model, counts={int(r["key"]): r["wines"] for r in records
+            if r["dimension"] == dimension and r["key"] and r["wines"]})
+
+
+def rebuild():
+    """Recompute every total from the wines table, one GROUP BY per dimension."""
+    db.session.query(WineStat).delete()
+    records = []
+    for dimension, column in _GROUP_COLUMNS.items():
+        rows = (db.session.query(column, func.count(Wine.id), func.sum(Wine.quantity),
+                func.count(Wine.rating), func.sum(Wine.rating))
+            .select_from(Wine)
+            .outerjoin(Producer, Wine.producer_id == Producer.id)    #keep wines with missing parents
+            .outerjoin(Region, Producer.region_id == Region.id)
+            .group_by(column))
+        records += [{"dimension": dimension, "key": _key(value), "wines": wines,
+            "bottles": bottles or 0, "rated": rated, "rating_sum": rating_sum or 0}
+            for value, wines, bottles, rated, rating_sum in rows]
+    if records:
+        db.session.execute(WineStat.__table__.insert(), records)
+
+
+def _row(stat, name=None) -> dict:
+    return {"key": stat.key or None, "name": name, "wines": stat.wines, "bottles": stat.bottles,
+        "avg_rating": round(stat.rating_sum / stat.rated, 1) if stat.rated else None}
+
+
+def groups(dimension: str) -> list:
+    """
+    Read the totals of every group of a dimension.
+
+    Args:
+        dimension (str): One of DIMENSIONS.
+
+    Returns:
+        list[dict]: key, name (for country, region and producer), wines,
+        bottles and avg_rating per group holding at least one wine, most
+        bottles first.
+
+    Raises:
+        ValueError: If dimension is not one of DIMENSIONS.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Invalid dimension: {dimension}")
+    stats = (WineStat.query.filter(WineStat.dimension == dimension, WineStat.wines > 0)
+        .order_by(WineStat.bottles.desc(), WineStat.key).all())
+    names = {}
+    if dimension in NAMED:
+        model = NAMED[dimension]
+        ids = [int(stat.key) for stat in stats if stat.key]
+        names = {str(id): name for id, name in
+            db.session.query(model.id, model.name).filter(model.id.in_(ids))} if ids else {}
+    return [_row(stat, names.get(stat.key)) for stat in stats]
+
+
+def totals() -> dict:
+    """
+    Read cellar wide totals.
+
+    Returns:
+        dict: wines, bottles and avg_rating over every wine.
+    """
+    wines, bottles, rated, rating_sum = (db.session.query(func.sum(WineStat.wines),
+        func.sum(WineStat.bottles), func.sum(WineStat.rated), func.sum(WineStat.rating_sum))
+        .filter(WineStat.dimension == "color").one())   #every wine has exactly one color group
+    return {"wines": wines or 0, "bottles": bottles or 0,
+        "avg_rating": round(rating_sum / rated, 1) if rated else None}
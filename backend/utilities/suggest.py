@@ -0,0 +1,245 @@
+"""
+Typeahead over country, region and producer names.
+
+Each field has an in-process PrefixIndex: a sorted array of folded names,
+one entry per word a name can be typed from, searched with bisect, plus the
+number of wines per name for ranking. It is loaded from the dimension
+tables and wine_stats on first use.
+
+Writes stage new names and wine count changes on the session, and they are
+applied to the index when the transaction commits, so the writing process
+sees them right away, and the table versions it committed are recorded as
+already seen. Other processes notice that the versions moved on their next
+check, at most every REFRESH_SECONDS: new dimension rows reload the
+indexes, wine writes only re-read the counts from wine_stats.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import event
+from models import db
+from models.country import Country, normalize_name
+from models.region import Region
+from models.producer import Producer
+from models.wine_stat import WineStat
+import utilities.versions as versions
+
+FIELDS = {"country": Country, "region": Region, "producer": Producer}
+_FIELD_OF = {model: field for field, model in FIELDS.items()}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+REFRESH_SECONDS = 5     #between checks for writes by other processes
+DIMENSION_TABLES = ("countries", "regions", "producers")
+TABLES = DIMENSION_TABLES + ("wines",)
+
+
+def _keys(name: str) -> list:
+    """Folded name starting at each of its words, ex: "pol roger", "roger"."""
+    words = normalize_name(name).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Thread-safe prefix index of names ranked by wine count.
+
+    Args:
+        names (dict): Mapping of ID to name.
+        counts (dict): Mapping of ID to number of wines.
+    """
+
+    def __init__(self, names: dict, counts: dict):
+        self._names = dict(names)
+        self._counts = dict(counts)
+        self._entries = sorted((key, id) for id, name in self._names.items() for key in _keys(name))
+        self._lock = threading.Lock()
+
+    def add(self, names: dict):
+        """Index new ID -> name entries."""
+        with self._lock:
+            for id, name in names.items():
+                if id not in self._names:
+                    self._names[id] = name
+                    for key in _keys(name):
+                        insort(self._entries, (key, id))
+
+    def count(self, deltas: dict):
+        """Add ID -> wine count changes."""
+        with self._lock:
+            for id, delta in deltas.items():
+                self._counts[id] = self._counts.get(id, 0) + delta
+
+    def recount(self, counts: dict):
+        """Replace every wine count with ID -> number of wines."""
+        with self._lock:
+            self._counts = dict(counts)
+
+    def top(self, prefix: str, limit: int) -> list:
+        """
+        Find the names with a word starting with prefix.
+
+        Args:
+            prefix (str): Typed text, folded like the names.
+            limit (int): Maximum number of names.
+
+        Returns:
+            list[dict]: id, name and wines of each match, most wines first.
+        """
+        prefix = normalize_name(prefix)
+        with self._lock:
+            start = bisect_left(self._entries, (prefix,))
+            end = bisect_left(self._entries, (prefix + "\U0010ffff",), start)
+            ids = {id for _, id in self._entries[start:end]}
+            best = heapq.nsmallest(limit, ids, key=lambda id: (-self._counts.get(id, 0), self._names[id]))
+            return [{"id": id, "name": self._names[id], "wines": self._counts.get(id, 0)} for id in best]
+
+    def __len__(self):
+        return len(self._names)
+
+
+_indexes = {}   #field -> PrefixIndex, loaded on first use
+_lock = threading.Lock()
+_checked_at = 0
+_seen = None    #table -> version the indexes are up to date with
+
+
+def _counts(fields) -> dict:
+    """Read the wine counts of fields from wine_stats with one query."""
+    counts = {field: {} for field in fields}
+    for dimension, key, wines in db.session.query(WineStat.dimension, WineStat.key, WineStat.wines) \
+            .filter(WineStat.dimension.in_(counts), WineStat.key != ""):
+        counts[dimension][int(key)] = wines
+    return counts
+
+
+def _load(field: str) -> PrefixIndex:
+    """Build a field's index with one query for names and one for wine counts."""
+    model = FIELDS[field]
+    names = dict(db.session.query(model.id, model.name))
+    return PrefixIndex(names, _counts([field])[field])
+
+
+def _refresh():
+    """Catch up with the tables if another process changed them since the last check."""
+    global _checked_at, _seen
+    now = time.monotonic()
+    if now - _checked_at < REFRESH_SECONDS:
+        return
+    current = dict(zip(TABLES, versions.current(*TABLES)))
+    recount = False
+    with _lock:
+        if _seen is None or any(current[t] != _seen[t] for t in DIMENSION_TABLES):
+            _indexes.clear()
+        else:
+            recount = current["wines"] != _seen["wines"]
+        _seen = current
+        _checked_at = now
+    if recount:
+        indexes = dict(_indexes)
+        for field, counts in _counts(indexes).items():
+            indexes[field].recount(counts)
+
+
+def clear_cache():
+    """Drop every index, e.g. after a bulk load. They reload on next use."""
+    global _checked_at, _seen
+    with _lock:
+        _indexes.clear()
+        _checked_at = 0
+        _seen = None
+
+
+def suggest(field: str, prefix: str, limit: int = DEFAULT_LIMIT) -> list:
+    """
+    Suggest names of a field starting with what has been typed.
+
+    Args:
+        field (str): One of FIELDS.
+        prefix (str): Start of the name or of any word in it.
+        limit (int): Maximum number of names.
+
+    Returns:
+        list[dict]: id, name and wines of each match, most wines first.
+
+    Raises:
+        ValueError: If field is unknown or prefix is empty.
+    """
+    if field not in FIELDS:
+        raise ValueError(f"Invalid field: {field}")
+    if not prefix or not prefix.strip():
+        raise ValueError("Missing prefix")
+    _refresh()
+    index = _indexes.get(field)
+    if index is None:
+        index = _load(field)
+        with _lock:
+            index = _indexes.setdefault(field, index)
+    return index.top(prefix, limit)
+
+
+def validate_limit(limit) -> int:
+    """
+    Validate the number of suggestions.
+
+    Args:
+        limit: Input value to validate, or None for the default.
+
+    Returns:
+        int: Validated limit.
+
+    Raises:
+        ValueError: If limit is not an integer between 1 and MAX_LIMIT.
+    """
+    if limit is None or limit == "":
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {limit}.  Must be integer.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"Invalid limit: {limit}. Out of range 1 - {MAX_LIMIT}.")
+    return limit
+
+
+def stage(model, names: dict = None, counts: dict = None):
+    """
+    Remember index changes until the current transaction commits.
+
+    Args:
+        model: Country, Region or Producer.
+        names (dict): New ID -> name entries.
+        counts (dict): ID -> wine count changes.
+    """
+    if names or counts:
+        db.session.info.setdefault("suggest", []).append((_FIELD_OF[model], names or {}, counts or {}))
+
+
+@event.listens_for(db.session, "before_commit")
+def _committing(session):
+    #versions this transaction commits, read while it still holds their rows
+    bumped = {t: n for t, n in session.info.get("versions_bumped", {}).items() if t in TABLES}
+    if bumped and _seen is not None:
+        session.info["suggest_versions"] = {table: (version, bumped[table])
+            for table, version in zip(bumped, versions.current(*bumped))}
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish(session):
+    for field, names, counts in session.info.pop("suggest", []):
+        index = _indexes.get(field)
+        if index is not None:
+            index.add(names)
+            index.count(counts)
+    with _lock:
+        for table, (version, bumps) in session.info.pop("suggest_versions", {}).items():
+            if _seen is not None and _seen[table] == version - bumps:
+                _seen[table] = version  #only this transaction's writes, already applied
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _discard(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("suggest", None)
+        session.info.pop("suggest_versions", None)
@@ -0,0 +1,88 @@
+"""
+Dialect-native upsert helpers.
+
+Builds INSERT ... ON CONFLICT (SQLite, PostgreSQL) or
+INSERT ... ON DUPLICATE KEY UPDATE (MySQL) statements.
+"""
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models import db
+
+_DIALECTS = {
+    "sqlite": sqlite,
+    "postgresql": postgresql,
+    "mysql": mysql
+}
+
+
+def upsert_statement(table, index_elements: list, update_columns: list):
+    """
+    Build an insert that updates the given columns when the row already exists.
+
+    Args:
+        table: SQLAlchemy Table to insert into.
+        index_elements (list[str]): Columns of the unique key rows conflict on.
+        update_columns (list[str]): Columns to overwrite on conflict, or an
+            empty list to leave the existing row untouched.
+
+    Returns:
+        Insert: Dialect specific insert statement.
+
+    Raises:
+        ValueError: If the database dialect has no native upsert.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in _DIALECTS:
+        raise ValueError(f"Upsert not supported for dialect: {dialect}")
+    stmt = _DIALECTS[dialect].insert(table)
+
+    if dialect == "mysql":
+        #mysql needs at least one assignment, a no-op one leaves the row untouched
+        if not update_columns:
+            return stmt.on_duplicate_key_update({index_elements[0]: table.c[index_elements[0]]})
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements,
+        set_={c: stmt.excluded[c] for c in update_columns})
+
+
+def upsert(table, records: list, index_elements: list, update_columns: list):
+    """
+    Insert records, updating update_columns of rows that already exist.
+
+    Args:
+        table: SQLAlchemy Table to insert into.
+        records (list[dict]): Column values for each row.
+        index_elements (list[str]): Columns of the unique key rows conflict on.
+        update_columns (list[str]): Columns to overwrite on conflict.
+    """
+    if records:
+        db.session.execute(upsert_statement(table, index_elements, update_columns), records)
+
+
+def increment(table, records: list, index_elements: list, counter_columns: list):
+    """
+    Insert records, adding their counter_columns to rows that already exist.
+
+    Args:
+        table: SQLAlchemy Table to insert into.
+        records (list[dict]): Column values for each row, counters as deltas.
+        index_elements (list[str]): Columns of the unique key rows conflict on.
+        counter_columns (list[str]): Columns to add to on conflict.
+
+    Raises:
+        ValueError: If the database dialect has no native upsert.
+    """
+    if not records:
+        return
+    dialect = db.engine.dialect.name
+    if dialect not in _DIALECTS:
+        raise ValueError(f"Upsert not supported for dialect: {dialect}")
+    stmt = _DIALECTS[dialect].insert(table)
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in counter_columns})
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements,
+            set_={c: table.c[c] + stmt.excluded[c] for c in counter_columns})
+    db.session.execute(stmt, records)
@@ -0,0 +1,107 @@
+"""
+Per-table change versions and conditional GET support.
+
+Every write path bumps the version of the tables it changes in the same
+transaction. List endpoints derive a strong ETag from those versions and
+the request URL, so If-None-Match is answered with a single primary key
+lookup instead of running the list query. The same tag keys the response
+cache, so a write invalidates exactly the cached responses of its tables.
+"""
+
+import functools
+import hashlib
+from flask import request, current_app
+from sqlalchemy import event
+from models import db
+from models.table_version import TableVersion
+from utilities.upsert import upsert
+import utilities.response_cache as response_cache
+
+_versions = TableVersion.__table__
+
+
+def bump(*tables: str):
+    """
+    Advance the version of tables changed by the current transaction.
+
+    The number of bumps per table is kept in session.info["versions_bumped"]
+    until the transaction ends, so caches can tell their own process's
+    writes from other processes'.
+
+    Args:
+        *tables (str): Table names, ex: "wines".
+    """
+    bumped = db.session.info.setdefault("versions_bumped", {})
+    for table in tables:
+        bumped[table] = bumped.get(table, 0) + 1
+    result = db.session.execute(_versions.update()
+        .where(_versions.c.name.in_(tables))
+        .values(version=_versions.c.version + 1))
+    if result.rowcount < len(tables):
+        #first change to a table, start its counter
+        upsert(_versions, [{"name": table, "version": 1} for table in tables], ["name"], [])
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _forget(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("versions_bumped", None)
+
+
+def current(*tables: str) -> tuple:
+    """
+    Read the versions of tables with one query.
+
+    Args:
+        *tables (str): Table names.
+
+    Returns:
+        tuple: Version of each table, 0 if it was never changed.
+    """
+    versions = dict(db.session.query(TableVersion.name, TableVersion.version)
+        .filter(TableVersion.name.in_(tables)))
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def etag(*tables: str) -> str:
+    """
+    Build the ETag of the current request's response from table versions.
+
+    Args:
+        *tables (str): Tables the response is read from.
+
+    Returns:
+        str: Opaque entity tag, unquoted.
+    """
+    key = f"{request.full_path}|{current(*tables)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def conditional(*tables: str):
+    """
+    Decorate a GET view to send ETags and answer If-None-Match with 304.
+
+    The view only runs when the client's copy is stale and the response
+    cache has no entry for the tag.
+
+    Args:
+        *tables (str): Tables the view reads, or a single function returning
+            them when they depend on the request.
+
+    Returns:
+        function: Decorator for a Flask view.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            tag = etag(*(tables[0]() if callable(tables[0]) else tables))
+            if request.if_none_match.contains(tag):
+                response = current_app.response_class(status=304)
+                response.set_etag(tag)
+                return response
+            response = response_cache.fetch(tag, lambda: view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(tag)
+            return response
+        return wrapper
+    return decorator